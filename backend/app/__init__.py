@@ -1,9 +1,10 @@
 ﻿from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
+from flask_jwt_extended import JWTManager, jwt_required
 import os
 
-def create_app():
+def create_app(config_name=None):
     app = Flask(__name__)
     
     # Configuration
@@ -11,11 +12,48 @@ def create_app():
     app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///expense_tracker.db')
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    if config_name:
+        from app.config import config
+        app.config.from_object(config[config_name])
+    
     # Initialize extensions
     from app.database import db
+    from app import models  # registers models and the rollup session hooks
     db.init_app(app)
     
+    from flask_migrate import Migrate
+    Migrate(app, db, directory=os.path.join(os.path.dirname(app.root_path), 'migrations'))
+    
     CORS(app)
+    JWTManager(app)
+    
+    # API blueprints
+    from app.routes import auth_bp, expenses_bp, dashboard_bp, upload_bp
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(expenses_bp, url_prefix='/api/expenses')
+    app.register_blueprint(dashboard_bp, url_prefix='/api/dashboard')
+    app.register_blueprint(upload_bp, url_prefix='/api/upload')
+    
+    from app.services.category_registry import init_category_registry
+    init_category_registry(app)
+    
+    from app.services.model_registry import init_model_registry
+    init_model_registry(app)
+    
+    from app.services.receipt_storage import init_receipt_storage
+    init_receipt_storage(app)
+    
+    from app.services.dashboard_cache import init_dashboard_cache
+    init_dashboard_cache(app)
+    
+    from app.services.http_cache import init_http_cache
+    init_http_cache(app)
+    
+    from app.services.ocr_jobs import init_ocr_jobs
+    init_ocr_jobs(app)
+    
+    from app.cli import register_commands
+    register_commands(app)
     
     # Basic routes
     @app.route('/')
@@ -26,15 +64,37 @@ def create_app():
     def health():
         return {'status': 'healthy', 'service': 'Smart Expense Tracker API'}
     
+    @app.route('/api/cache/stats')
+    @jwt_required()
+    def cache_stats():
+        from app.services.dashboard_cache import get_dashboard_cache
+        from app.services.http_cache import get_route_hit_counter
+        return {
+            'status': 'success',
+            'data': {
+                'conditional_reads': get_route_hit_counter().snapshot(),
+                'dashboard_cache': dict(get_dashboard_cache().stats)
+            }
+        }
+    
     @app.route('/api/categories')
     def get_categories():
         try:
-            from app.models.category import Category
-            categories = Category.query.filter_by(is_active=True).all()
-            return {
+            from flask import request, jsonify
+            from app.services.category_registry import get_category_registry
+            from app.utils.helpers import not_modified_response
+            
+            registry = get_category_registry()
+            etag = registry.etag
+            if request.if_none_match.contains(etag):
+                return not_modified_response(etag)
+            
+            response = jsonify({
                 'status': 'success',
-                'data': [cat.to_dict() for cat in categories]
-            }
+                'data': [cat.to_dict() for cat in registry.all()]
+            })
+            response.set_etag(etag)
+            return response
         except Exception as e:
             return {'status': 'error', 'message': str(e)}, 500
     
@@ -0,0 +1,83 @@
+"""
+Smart Expense Tracker - CLI Commands
+Maintenance commands registered on the Flask CLI
+"""
+
+import click
+from flask.cli import AppGroup
+
+rollups_cli = AppGroup('rollups', help='Maintain the monthly expense rollup table.')
+
+@rollups_cli.command('rebuild')
+@click.option('--user-id', type=int, default=None, help='Only rebuild rows for this user.')
+def rebuild_rollups(user_id):
+    """Recompute rollup rows from raw expenses"""
+    from app.services.rollup_service import RollupService
+
+    rows = RollupService().rebuild(user_id)
+    click.echo(f'Rebuilt {rows} rollup rows')
+
+@rollups_cli.command('check')
+@click.option('--user-id', type=int, default=None, help='Only check rows for this user.')
+@click.option('--fix', is_flag=True, help='Rebuild the affected users when mismatches are found.')
+def check_rollups(user_id, fix):
+    """Compare rollup rows against raw expenses"""
+    from app.services.rollup_service import RollupService
+
+    service = RollupService()
+    mismatches = service.check_consistency(user_id)
+
+    if not mismatches:
+        click.echo('Rollups are consistent')
+        return
+
+    for mismatch in mismatches:
+        click.echo(
+            f"user={mismatch['user_id']} {mismatch['year']}-{mismatch['month']:02d} "
+            f"category={mismatch['category_id']}: expected {mismatch['expected']}, found {mismatch['actual']}"
+        )
+
+    if fix:
+        affected_users = sorted({mismatch['user_id'] for mismatch in mismatches})
+        for affected_user in affected_users:
+            service.rebuild(affected_user)
+        click.echo(f'Rebuilt rollups for {len(affected_users)} users')
+    else:
+        raise SystemExit(1)
+
+ocr_jobs_cli = AppGroup('ocr-jobs', help='Run and maintain the receipt OCR queue.')
+
+@ocr_jobs_cli.command('work')
+@click.option('--poll-interval', type=float, default=1.0, help='Seconds to wait when the queue is empty.')
+@click.option('--once', is_flag=True, help='Exit once the queue is drained.')
+def work_ocr_jobs(poll_interval, once):
+    """Process queued OCR jobs with a local process pool"""
+    from app.services.ocr_jobs import get_ocr_jobs
+
+    jobs = get_ocr_jobs()
+    click.echo(f'Processing OCR jobs with {jobs.max_workers} workers')
+    jobs.work(poll_interval=poll_interval, once=once)
+
+@ocr_jobs_cli.command('requeue-stale')
+def requeue_stale_ocr_jobs():
+    """Requeue jobs stuck in processing past OCR_JOB_TIMEOUT"""
+    from app.services.ocr_jobs import get_ocr_jobs
+
+    click.echo(f'Requeued {get_ocr_jobs().requeue_stale()} jobs')
+
+uploads_cli = AppGroup('uploads', help='Maintain receipt upload metadata.')
+
+@uploads_cli.command('backfill')
+def backfill_uploads():
+    """Register existing upload files and link their expenses"""
+    from flask import current_app
+    from app.services.receipt_uploads import ReceiptUploadService
+
+    registered, linked = ReceiptUploadService(current_app.instance_path).backfill()
+    click.echo(f'Registered {registered} receipt uploads, linked {linked} expenses')
+
+def register_commands(app):
+    """Attach all CLI command groups to the app"""
+    app.cli.add_command(rollups_cli)
+    app.cli.add_command(ocr_jobs_cli)
+    app.cli.add_command(uploads_cli)
@@ -26,13 +26,40 @@ class Config:
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'app/static/uploads'
     MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))  # 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf'}
+    BULK_UPLOAD_MAX_FILES = int(os.environ.get('BULK_UPLOAD_MAX_FILES', 10))
+
+    # Receipt storage (content-addressed; local files under the instance folder or S3)
+    RECEIPT_STORAGE_BACKEND = os.environ.get('RECEIPT_STORAGE_BACKEND', 'local')  # local or s3 (needs boto3)
+    RECEIPT_S3_BUCKET = os.environ.get('RECEIPT_S3_BUCKET')
+    RECEIPT_S3_PREFIX = os.environ.get('RECEIPT_S3_PREFIX', 'receipts/')
+    RECEIPT_S3_ENDPOINT_URL = os.environ.get('RECEIPT_S3_ENDPOINT_URL')  # MinIO and other S3-compatible stores
+    RECEIPT_S3_CACHE_DIR = os.environ.get('RECEIPT_S3_CACHE_DIR')  # local copies for OCR; defaults to instance/blob-cache
 
     # OCR settings
     TESSERACT_CMD = os.environ.get('TESSERACT_CMD')
+    OCR_JOB_MODE = os.environ.get('OCR_JOB_MODE', 'pool')  # pool, external or inline
+    OCR_POOL_WORKERS = int(os.environ.get('OCR_POOL_WORKERS', 2))
+    OCR_MAX_PENDING_JOBS = int(os.environ.get('OCR_MAX_PENDING_JOBS', 100))
+    OCR_JOB_TIMEOUT = int(os.environ.get('OCR_JOB_TIMEOUT', 300))  # seconds before a stuck job is requeued
+    OCR_MAX_ATTEMPTS = int(os.environ.get('OCR_MAX_ATTEMPTS', 3))  # claims before a stuck job is failed
+    OCR_RECOVERY_INTERVAL = int(os.environ.get('OCR_RECOVERY_INTERVAL', 30))  # seconds between pool-mode recovery runs
+    BULK_OCR_WORKERS = int(os.environ.get('BULK_OCR_WORKERS', 0))  # 0 = available cores / WEB_CONCURRENCY
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))  # web worker processes, as read by gunicorn
+    OCR_CACHE_ENABLED = os.environ.get('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+    OCR_CACHE_MAX_BYTES = int(os.environ.get('OCR_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    OCR_CACHE_TOUCH_INTERVAL = int(os.environ.get('OCR_CACHE_TOUCH_INTERVAL', 60))  # seconds between recency writes per entry
+
+    # Dashboard response cache (in-process LRU, plus Redis when a URL is set)
+    DASHBOARD_CACHE_ENABLED = os.environ.get('DASHBOARD_CACHE_ENABLED', 'true').lower() == 'true'
+    DASHBOARD_CACHE_REDIS_URL = os.environ.get('DASHBOARD_CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))  # seconds an entry may live
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 1024))  # L1 entries per worker
 
     # ML Model settings
     MODEL_PATH = os.environ.get('MODEL_PATH') or 'ml_models/trained_models/'
+    MODEL_CHECK_INTERVAL = float(os.environ.get('MODEL_CHECK_INTERVAL', 2.0))  # seconds between model file stats
     ENABLE_AI_CATEGORIZATION = os.environ.get('ENABLE_AI_CATEGORIZATION', 'true').lower() == 'true'
+    SUGGEST_BATCH_MAX_ITEMS = int(os.environ.get('SUGGEST_BATCH_MAX_ITEMS', 5000))
 
     # Pagination
     EXPENSES_PER_PAGE = 20
@@ -73,6 +100,8 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
     WTF_CSRF_ENABLED = False
+    OCR_JOB_MODE = 'inline'
+    DASHBOARD_CACHE_REDIS_URL = 'memory://'
 
 config = {
     'development': DevelopmentConfig,
@@ -1,9 +1,53 @@
 ﻿from flask_sqlalchemy import SQLAlchemy
+from contextlib import contextmanager
 from datetime import datetime
+from sqlalchemy import insert, update, delete
 
 # Initialize SQLAlchemy
 db = SQLAlchemy()
 
+# Rows per bulk statement; keeps IN lists under SQLite's bound-parameter limit
+BULK_BATCH_SIZE = 500
+
+@contextmanager
+def unit_of_work():
+    """Run a block as one transaction.
+
+    ``save()``, ``delete()`` and the bulk helpers only flush inside the block;
+    it commits once when the block finishes and rolls back if it raises.
+    Nested blocks join the outermost one.
+    """
+    info = db.session.info
+    depth = info.get('unit_of_work_depth', 0)
+    info['unit_of_work_depth'] = depth + 1
+    try:
+        yield db.session
+        if depth == 0:
+            db.session.commit()
+    except BaseException:
+        if depth == 0:
+            db.session.rollback()
+        raise
+    finally:
+        info['unit_of_work_depth'] = depth
+
+def in_unit_of_work():
+    return db.session.info.get('unit_of_work_depth', 0) > 0
+
+def _finish(commit):
+    """Commit unless told not to, or a unit of work will commit later"""
+    if commit is None:
+        commit = not in_unit_of_work()
+    if commit:
+        db.session.commit()
+    else:
+        db.session.flush()
+
+def _batches(items, size=BULK_BATCH_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
 class TimestampMixin:
     """Mixin to add timestamp fields to models"""
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -15,16 +59,56 @@ class BaseModel(db.Model):
     
     id = db.Column(db.Integer, primary_key=True)
     
-    def save(self):
-        """Save instance to database"""
+    def save(self, commit=None):
+        """Save instance to database; deferred to the end of a unit of work"""
         db.session.add(self)
-        db.session.commit()
+        _finish(commit)
         return self
     
-    def delete(self):
-        """Delete instance from database"""
+    def delete(self, commit=None):
+        """Delete instance from database; deferred to the end of a unit of work"""
         db.session.delete(self)
-        db.session.commit()
+        _finish(commit)
+    
+    @classmethod
+    def _owned(cls, ids, user_id):
+        criteria = [cls.id.in_(ids)]
+        if user_id is not None:
+            criteria.append(cls.user_id == user_id)
+        return criteria
+    
+    @classmethod
+    def bulk_insert(cls, rows, commit=None):
+        """Insert dicts of attribute values, one INSERT per batch; returns the row count"""
+        count = 0
+        for batch in _batches(rows):
+            db.session.execute(insert(cls), batch)
+            count += len(batch)
+        _finish(commit)
+        return count
+    
+    @classmethod
+    def bulk_update(cls, ids, values, user_id=None, commit=None):
+        """Apply the same values to rows by id, one UPDATE per batch; returns the rows matched"""
+        count = 0
+        for batch in _batches(dict.fromkeys(ids)):
+            result = db.session.execute(update(cls).where(*cls._owned(batch, user_id)).values(**values))
+            count += result.rowcount
+        _finish(commit)
+        return count
+    
+    @classmethod
+    def bulk_delete(cls, ids, user_id=None, commit=None):
+        """Delete rows by id, optionally only those owned by ``user_id``, one DELETE per batch.
+
+        Returns the number of rows deleted.
+        """
+        count = 0
+        for batch in _batches(dict.fromkeys(ids)):
+            result = db.session.execute(delete(cls).where(*cls._owned(batch, user_id)))
+            count += result.rowcount
+        _finish(commit)
+        return count
     
     def to_dict(self):
         """Convert model instance to dictionary"""
@@ -6,5 +6,14 @@ Contains all database models for the application
 from .user import User
 from .category import Category  
 from .expense import Expense
+from .rollup import ExpenseMonthlyRollup
+from .cache_version import CacheVersion
+from .ocr_job import OcrJob
+from .ocr_cache import OcrCacheEntry
+from .receipt_upload import ReceiptUpload
+from .stored_blob import StoredBlob
 
-__all__ = ['User', 'Category', 'Expense']
+__all__ = [
+    'User', 'Category', 'Expense', 'ExpenseMonthlyRollup', 'CacheVersion',
+    'OcrJob', 'OcrCacheEntry', 'ReceiptUpload', 'StoredBlob'
+]
@@ -0,0 +1,143 @@
+from flask import g, has_app_context
+from sqlalchemy import event, select, update, inspect
+from sqlalchemy.orm import Session
+from app.database import db, BaseModel
+from app.models.category import Category
+from app.models.expense import Expense
+
+CATEGORIES_VERSION_KEY = 'categories'
+
+# session.info keys: the open transaction has written categories, and the
+# registry snapshot built from that uncommitted state for this session only
+PENDING_CATEGORY_WRITES = 'pending_category_writes'
+PRIVATE_CATEGORY_SNAPSHOT = 'private_category_snapshot'
+
+def user_data_key(user_id):
+    """Version key covering everything derived from one user's expenses"""
+    return f'user_data:{int(user_id)}'
+
+class CacheVersion(BaseModel):
+    """Monotonic version stamp for a cached data set.
+
+    Writers bump the stamp in the same transaction as the data change; every
+    worker process compares it with the version of its in-memory copy.
+    """
+    __tablename__ = 'cache_versions'
+
+    key = db.Column(db.String(100), unique=True, nullable=False)
+    version = db.Column(db.Integer, default=0, nullable=False)
+
+def get_version(key, connection=None):
+    """Read the current version for ``key`` (0 when it was never bumped)"""
+    table = CacheVersion.__table__
+    stmt = select(table.c.version).where(table.c.key == key)
+    executor = connection if connection is not None else db.session
+    return executor.execute(stmt).scalar() or 0
+
+def get_versions(keys):
+    """Read several versions in one query, as a tuple in the order of ``keys``"""
+    table = CacheVersion.__table__
+    stored = dict(db.session.execute(select(table.c.key, table.c.version).where(table.c.key.in_(keys))).all())
+    return tuple(stored.get(key, 0) for key in keys)
+
+def user_data_stamp(user_id):
+    """(user data version, categories version) for responses built from a user's expenses.
+
+    Read once per request; writes in the same request clear it.
+    """
+    stamps = g.setdefault('_user_data_stamps', {}) if has_app_context() else {}
+    if user_id not in stamps:
+        stamps[user_id] = get_versions([user_data_key(user_id), CATEGORIES_VERSION_KEY])
+    return stamps[user_id]
+
+def bump_version(connection, key):
+    """Increment the version for ``key`` on the given connection"""
+    table = CacheVersion.__table__
+    dialect = connection.dialect.name
+
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(key=key, version=1).on_conflict_do_update(
+            index_elements=['key'], set_={'version': table.c.version + 1}
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(update(table).where(table.c.key == key).values(version=table.c.version + 1))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(key=key, version=1))
+
+def bump_user_data_versions(connection, user_ids):
+    """Bump the data version of every user in ``user_ids``"""
+    for user_id in sorted({int(user_id) for user_id in user_ids if user_id is not None}):
+        bump_version(connection, user_data_key(user_id))
+    if has_app_context():
+        g.pop('_user_data_stamps', None)
+
+@event.listens_for(Session, 'after_flush')
+def _bump_category_version(session, flush_context):
+    """Invalidate every worker's category registry when a Category is written"""
+    changed = (
+        any(isinstance(obj, Category) for obj in session.new)
+        or any(isinstance(obj, Category) for obj in session.deleted)
+        or any(isinstance(obj, Category) and session.is_modified(obj) for obj in session.dirty)
+    )
+    if not changed:
+        return
+
+    bump_version(session.connection(), CATEGORIES_VERSION_KEY)
+    _mark_category_writes(session)
+
+@event.listens_for(Session, 'do_orm_execute')
+def _bump_category_version_for_bulk(orm_execute_state):
+    """Same invalidation for INSERT/UPDATE/DELETE statements run against Category"""
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if state.bind_mapper is None or state.bind_mapper.class_ is not Category:
+        return
+
+    bump_version(state.session.connection(), CATEGORIES_VERSION_KEY)
+    _mark_category_writes(state.session)
+
+def _mark_category_writes(session):
+    # Until commit, this session's registry reads use a private snapshot;
+    # uncommitted rows must never be published to the worker-wide one
+    session.info[PENDING_CATEGORY_WRITES] = True
+    session.info.pop(PRIVATE_CATEGORY_SNAPSHOT, None)
+    if has_app_context():
+        g.pop('_category_registry_checked', None)
+        g.pop('_user_data_stamps', None)
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _settle_category_writes(session):
+    """Once category writes are committed or rolled back, the next read checks the stored version"""
+    if session.info.pop(PENDING_CATEGORY_WRITES, None):
+        session.info.pop(PRIVATE_CATEGORY_SNAPSHOT, None)
+        if has_app_context():
+            g.pop('_category_registry_checked', None)
+            g.pop('_user_data_stamps', None)
+
+@event.listens_for(Session, 'after_flush')
+def _bump_user_data_versions(session, flush_context):
+    """Invalidate cached dashboards of every user whose expenses were written.
+
+    Bulk statements are covered by the rollup listener, which already knows
+    the rows they touched.
+    """
+    user_ids = set()
+    for obj in session.new | session.deleted:
+        if isinstance(obj, Expense):
+            user_ids.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, Expense) and session.is_modified(obj):
+            history = inspect(obj).attrs.user_id.history
+            user_ids.update(history.deleted)
+            user_ids.add(obj.user_id)
+
+    if user_ids:
+        bump_user_data_versions(session.connection(), user_ids)
@@ -3,18 +3,30 @@ from datetime import date
 
 class Expense(BaseModel, TimestampMixin):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        # Shaped after the queries: the date-sorted list, per-category totals, top merchants
+        db.Index('ix_expenses_user_date_created', 'user_id', 'date', 'created_at'),
+        db.Index('ix_expenses_user_category_date', 'user_id', 'category_id', 'date'),
+        db.Index('ix_expenses_user_merchant', 'user_id', 'merchant_name'),
+    )
     
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     description = db.Column(db.String(255), nullable=False)
     amount = db.Column(db.Float, nullable=False)
+    merchant_name = db.Column(db.String(255), nullable=True)
     currency = db.Column(db.String(3), default='USD', nullable=False)
     date = db.Column(db.Date, default=date.today, nullable=False)
     notes = db.Column(db.Text, nullable=True)
+    receipt_upload_id = db.Column(db.Integer, db.ForeignKey('receipt_uploads.id'), nullable=True, index=True)
+    receipt_image_path = db.Column(db.String(500), nullable=True)
+    created_by_ai = db.Column(db.Boolean, default=False, nullable=False)
+    ai_confidence_score = db.Column(db.Float, nullable=True)
     
     # Relationships
     user = db.relationship('User', backref='expenses')
     category = db.relationship('Category', backref='expenses')
+    receipt_upload = db.relationship('ReceiptUpload', backref='expenses')
     
     def __init__(self, user_id, category_id, description, amount, currency='USD', date=None):
         self.user_id = user_id
@@ -24,8 +36,8 @@ class Expense(BaseModel, TimestampMixin):
         self.currency = currency
         self.date = date if date else date.today()
     
-    def to_dict(self):
-        return {
+    def to_dict(self, include_receipt=False):
+        data = {
             'id': self.id,
             'user_id': self.user_id,
             'category_id': self.category_id,
@@ -36,3 +48,13 @@ class Expense(BaseModel, TimestampMixin):
             'date': self.date.isoformat(),
             'notes': self.notes
         }
+        
+        if include_receipt:
+            data.update({
+                'receipt_file_id': self.receipt_upload.file_id if self.receipt_upload else None,
+                'receipt_image_path': self.receipt_image_path,
+                'created_by_ai': self.created_by_ai,
+                'ai_confidence_score': self.ai_confidence_score
+            })
+        
+        return data
@@ -0,0 +1,24 @@
+"""
+Smart Expense Tracker - Query Loading Options
+Eager-loading options applied to every expense list query
+"""
+
+from sqlalchemy.orm import joinedload, contains_eager
+from app.models.expense import Expense
+
+def expense_list_options(include_user=False, category_joined=False):
+    """Loader options that fetch related rows together with the expense list.
+
+    to_dict() and the analytics code read ``expense.category`` for every row,
+    which is one lazy SELECT per expense without these options. Pass
+    ``category_joined`` when the query already joins Category (e.g. to sort
+    by its name) so that join is reused instead of adding a second one.
+    """
+    options = [contains_eager(Expense.category) if category_joined else joinedload(Expense.category)]
+    if include_user:
+        options.append(joinedload(Expense.user))
+    return options
+
+def expense_list_query(user_id, include_user=False):
+    """Base query for a user's expenses with their relations eagerly loaded"""
+    return Expense.query.options(*expense_list_options(include_user)).filter(Expense.user_id == user_id)
@@ -0,0 +1,17 @@
+from datetime import datetime
+from app.database import db, BaseModel
+
+class OcrCacheEntry(BaseModel):
+    """Extracted receipt data keyed by image content and OCR pipeline fingerprint"""
+    __tablename__ = 'ocr_cache_entries'
+    __table_args__ = (
+        db.UniqueConstraint('content_hash', 'fingerprint', name='uq_ocr_cache_hash_fingerprint'),
+    )
+
+    content_hash = db.Column(db.String(64), nullable=False)  # sha256 of the image bytes
+    fingerprint = db.Column(db.String(32), nullable=False)
+    result = db.Column(db.Text, nullable=False)  # JSON extracted data
+    size = db.Column(db.Integer, nullable=False)  # bytes of result, for eviction
+    hit_count = db.Column(db.Integer, default=0, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -0,0 +1,55 @@
+import json
+import uuid
+from app.database import db, BaseModel, TimestampMixin
+
+class OcrJob(BaseModel, TimestampMixin):
+    """Queued OCR work for an uploaded receipt; the table is the queue"""
+    __tablename__ = 'ocr_jobs'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_PROCESSING = 'processing'
+    STATUS_COMPLETED = 'completed'
+    STATUS_FAILED = 'failed'
+    PENDING_STATUSES = (STATUS_QUEUED, STATUS_PROCESSING)
+
+    job_id = db.Column(db.String(32), unique=True, nullable=False, default=lambda: uuid.uuid4().hex)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    kind = db.Column(db.String(20), default='upload', nullable=False)
+    file_id = db.Column(db.String(50), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    file_path = db.Column(db.String(500), nullable=False)  # receipt storage key
+    content_hash = db.Column(db.String(64), nullable=True)  # sha256 of the uploaded bytes
+    status = db.Column(db.String(20), default=STATUS_QUEUED, nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    result = db.Column(db.Text, nullable=True)  # JSON payload once completed
+    error = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def __init__(self, user_id, file_id, filename, file_path, kind='upload'):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.file_id = file_id
+        self.filename = filename
+        self.file_path = file_path
+        self.kind = kind
+        self.status = self.STATUS_QUEUED
+        self.attempts = 0
+
+    @property
+    def is_pending(self):
+        return self.status in self.PENDING_STATUSES
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'kind': self.kind,
+            'status': self.status,
+            'file_id': self.file_id,
+            'attempts': self.attempts,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'error': self.error,
+            'result': json.loads(self.result) if self.result else None
+        }
@@ -0,0 +1,54 @@
+from datetime import datetime
+from app.database import db, BaseModel
+
+class ReceiptUpload(BaseModel):
+    """An uploaded receipt file; replaces scanning the upload directories"""
+    __tablename__ = 'receipt_uploads'
+    __table_args__ = (
+        db.Index('ix_receipt_uploads_user_created', 'user_id', 'created_at'),
+    )
+
+    OCR_PENDING = 'pending'
+    OCR_COMPLETED = 'completed'
+    OCR_FAILED = 'failed'
+    OCR_PASSES = ('text', 'fast', 'full')
+
+    file_id = db.Column(db.String(50), unique=True, nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    path = db.Column(db.String(500), nullable=False, index=True)  # storage key, shared by identical files
+    original_filename = db.Column(db.String(255), nullable=True)
+    size = db.Column(db.Integer, nullable=False)
+    sha256 = db.Column(db.String(64), nullable=False, index=True)
+    mime = db.Column(db.String(100), nullable=True)
+    ocr_status = db.Column(db.String(20), default=OCR_PENDING, nullable=False)
+    ocr_pass = db.Column(db.String(10), nullable=True)  # text, fast or full, see OCRService.extract_receipt_data
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __init__(self, file_id, user_id, path, size, sha256, mime=None, original_filename=None):
+        self.file_id = file_id
+        self.user_id = user_id
+        self.path = path
+        self.size = size
+        self.sha256 = sha256
+        self.mime = mime
+        self.original_filename = original_filename
+        self.ocr_status = self.OCR_PENDING
+
+    @property
+    def filename(self):
+        # Stored blobs are named by their hash, so prefer the name the user uploaded
+        return self.original_filename or self.path.replace('\\', '/').rsplit('/', 1)[-1]
+
+    def to_dict(self):
+        return {
+            'file_id': self.file_id,
+            'filename': self.filename,
+            'original_filename': self.original_filename,
+            'file_path': self.path,
+            'size': self.size,
+            'sha256': self.sha256,
+            'mime': self.mime,
+            'ocr_status': self.ocr_status,
+            'ocr_pass': self.ocr_pass,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
@@ -0,0 +1,251 @@
+from datetime import date
+from sqlalchemy import event, inspect, select, delete, update, case, func
+from sqlalchemy.orm import Session
+from app.database import db, BaseModel
+from app.models.expense import Expense
+from app.models.cache_version import bump_user_data_versions
+
+class ExpenseMonthlyRollup(BaseModel):
+    """Per-user, per-category monthly spending aggregate.
+
+    Rows are maintained in the same transaction as every Expense write by the
+    session hooks below, so dashboard reads never need to touch raw expenses.
+    """
+    __tablename__ = 'expense_monthly_rollups'
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'year', 'month', 'category_id', name='uq_expense_monthly_rollups_bucket'),
+    )
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    month = db.Column(db.Integer, nullable=False)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    total_amount = db.Column(db.Float, default=0.0, nullable=False)
+    expense_count = db.Column(db.Integer, default=0, nullable=False)
+    min_amount = db.Column(db.Float, nullable=True)
+    max_amount = db.Column(db.Float, nullable=True)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'year': self.year,
+            'month': self.month,
+            'category_id': self.category_id,
+            'total_amount': self.total_amount,
+            'expense_count': self.expense_count,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount
+        }
+
+BUCKET_COLUMNS = ('user_id', 'year', 'month', 'category_id')
+
+def bucket_for(user_id, category_id, expense_date):
+    """Return the rollup bucket key for an expense, or None if incomplete"""
+    if user_id is None or category_id is None or expense_date is None:
+        return None
+    return (int(user_id), expense_date.year, expense_date.month, int(category_id))
+
+def month_bounds(year, month):
+    """Return [start, end) dates for a calendar month"""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+def _bucket_filter(table, key):
+    return [getattr(table.c, column) == value for column, value in zip(BUCKET_COLUMNS, key)]
+
+def _upsert(connection, key, total, count, min_amount, max_amount, increment):
+    """Insert a bucket row or merge into the existing one.
+
+    With ``increment`` the values are added to the stored aggregate, otherwise
+    they replace it.
+    """
+    table = ExpenseMonthlyRollup.__table__
+    values = dict(zip(BUCKET_COLUMNS, key))
+    values.update(total_amount=total, expense_count=count, min_amount=min_amount, max_amount=max_amount)
+
+    if increment:
+        merged = {
+            'total_amount': table.c.total_amount + total,
+            'expense_count': table.c.expense_count + count,
+            'min_amount': case((table.c.min_amount.is_(None), min_amount),
+                               (table.c.min_amount > min_amount, min_amount),
+                               else_=table.c.min_amount),
+            'max_amount': case((table.c.max_amount.is_(None), max_amount),
+                               (table.c.max_amount < max_amount, max_amount),
+                               else_=table.c.max_amount)
+        }
+    else:
+        merged = {
+            'total_amount': total,
+            'expense_count': count,
+            'min_amount': min_amount,
+            'max_amount': max_amount
+        }
+
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table).values(**values).on_conflict_do_update(
+            index_elements=list(BUCKET_COLUMNS), set_=merged
+        )
+        connection.execute(stmt)
+        return
+
+    # Portable fallback: update first, insert when the bucket does not exist yet
+    result = connection.execute(update(table).where(*_bucket_filter(table, key)).values(**merged))
+    if result.rowcount == 0:
+        connection.execute(table.insert().values(**values))
+
+def recompute_bucket(connection, key):
+    """Recompute one bucket from raw expense rows"""
+    user_id, year, month, category_id = key
+    start, end = month_bounds(year, month)
+    expenses = Expense.__table__
+
+    row = connection.execute(
+        select(
+            func.coalesce(func.sum(expenses.c.amount), 0.0),
+            func.count(expenses.c.id),
+            func.min(expenses.c.amount),
+            func.max(expenses.c.amount)
+        ).where(
+            expenses.c.user_id == user_id,
+            expenses.c.category_id == category_id,
+            expenses.c.date >= start,
+            expenses.c.date < end
+        )
+    ).one()
+
+    total, count, min_amount, max_amount = row
+    if count == 0:
+        table = ExpenseMonthlyRollup.__table__
+        connection.execute(delete(table).where(*_bucket_filter(table, key)))
+    else:
+        _upsert(connection, key, float(total), count, min_amount, max_amount, increment=False)
+
+def apply_rollup_changes(connection, additions, recompute):
+    """Apply pending bucket changes on the flushing connection.
+
+    ``additions`` maps bucket keys to lists of inserted amounts and is merged
+    incrementally. Buckets in ``recompute`` lost rows or had rows moved, so
+    their min/max cannot be derived from deltas and are rebuilt instead.
+    """
+    for key in sorted(recompute):
+        recompute_bucket(connection, key)
+
+    for key, amounts in sorted(additions.items()):
+        if key in recompute or not amounts:
+            continue
+        _upsert(connection, key, float(sum(amounts)), len(amounts), min(amounts), max(amounts), increment=True)
+
+def _pending_changes(session):
+    return session.info.setdefault('rollup_recompute', set())
+
+@event.listens_for(Session, 'before_flush')
+def _capture_expense_changes(session, flush_context, instances):
+    """Record buckets touched by updates and deletes before their old values are gone"""
+    recompute = _pending_changes(session)
+
+    for obj in session.deleted:
+        if isinstance(obj, Expense):
+            key = bucket_for(obj.user_id, obj.category_id, obj.date)
+            if key:
+                recompute.add(key)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Expense) or not session.is_modified(obj):
+            continue
+
+        state = inspect(obj)
+        old_values = {}
+        changed = False
+        unknown = False
+        for attr in ('user_id', 'category_id', 'date', 'amount'):
+            history = state.attrs[attr].history
+            if history.has_changes():
+                changed = True
+                # Assigning to an expired attribute leaves no previous value
+                unknown = unknown or not history.deleted
+            old_values[attr] = history.deleted[0] if history.deleted else getattr(obj, attr)
+
+        if not changed:
+            continue
+
+        if unknown and obj.id is not None:
+            expenses = Expense.__table__
+            stored = session.connection().execute(
+                select(expenses.c.user_id, expenses.c.category_id, expenses.c.date)
+                .where(expenses.c.id == obj.id)
+            ).first()
+            if stored:
+                old_values.update(user_id=stored.user_id, category_id=stored.category_id, date=stored.date)
+
+        for key in (bucket_for(old_values['user_id'], old_values['category_id'], old_values['date']),
+                    bucket_for(obj.user_id, obj.category_id, obj.date)):
+            if key:
+                recompute.add(key)
+
+@event.listens_for(Session, 'after_flush')
+def _apply_expense_changes(session, flush_context):
+    """Fold the flushed expense changes into the rollup table"""
+    recompute = session.info.pop('rollup_recompute', set())
+    additions = {}
+
+    for obj in session.new:
+        if isinstance(obj, Expense):
+            key = bucket_for(obj.user_id, obj.category_id, obj.date)
+            if key and obj.amount is not None:
+                additions.setdefault(key, []).append(float(obj.amount))
+
+    if additions or recompute:
+        apply_rollup_changes(session.connection(), additions, recompute)
+
+def _bulk_buckets(connection, criteria):
+    """Ids and rollup buckets of the expense rows matched by ``criteria``"""
+    expenses = Expense.__table__
+    query = select(expenses.c.id, expenses.c.user_id, expenses.c.category_id, expenses.c.date)
+    if criteria is not None:
+        query = query.where(criteria)
+    rows = connection.execute(query).all()
+    return [row.id for row in rows], {bucket_for(row.user_id, row.category_id, row.date) for row in rows}
+
+@event.listens_for(Session, 'do_orm_execute')
+def _apply_bulk_expense_changes(orm_execute_state):
+    """Keep rollups current for INSERT/UPDATE/DELETE statements run against Expense.
+
+    These bypass the flush hooks above. Inserted rows are merged incrementally;
+    buckets touched by an UPDATE or DELETE are recomputed after it runs.
+    """
+    state = orm_execute_state
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return
+    if state.bind_mapper is None or state.bind_mapper.class_ is not Expense:
+        return
+
+    connection = state.session.connection()
+
+    if state.is_insert:
+        result = state.invoke_statement()
+        rows = state.parameters if isinstance(state.parameters, list) else [state.parameters or {}]
+        additions = {}
+        for row in rows:
+            key = bucket_for(row.get('user_id'), row.get('category_id'), row.get('date') or date.today())
+            if key and row.get('amount') is not None:
+                additions.setdefault(key, []).append(float(row['amount']))
+        apply_rollup_changes(connection, additions, set())
+        bump_user_data_versions(connection, [key[0] for key in additions])
+        return result
+
+    ids, recompute = _bulk_buckets(connection, state.statement.whereclause)
+    result = state.invoke_statement()
+    if state.is_update and ids:
+        # Rows may have moved to another user, category or month
+        recompute |= _bulk_buckets(connection, Expense.__table__.c.id.in_(ids))[1]
+    recompute.discard(None)
+    apply_rollup_changes(connection, {}, recompute)
+    bump_user_data_versions(connection, [key[0] for key in recompute])
+    return result
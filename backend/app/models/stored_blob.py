@@ -0,0 +1,11 @@
+from datetime import datetime
+from app.database import db, BaseModel
+
+class StoredBlob(BaseModel):
+    """A stored receipt file, shared by every upload with the same bytes"""
+    __tablename__ = 'stored_blobs'
+
+    sha256 = db.Column(db.String(64), unique=True, nullable=False)
+    size = db.Column(db.Integer, nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)  # receipt uploads pointing at this blob
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
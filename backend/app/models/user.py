@@ -1,5 +1,6 @@
 ﻿from app.database import db, BaseModel, TimestampMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
 
 class User(BaseModel, TimestampMixin):
     __tablename__ = 'users'
@@ -10,6 +11,8 @@ class User(BaseModel, TimestampMixin):
     last_name = db.Column(db.String(50), nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    failed_login_attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_login_at = db.Column(db.DateTime, nullable=True)
     
     def __init__(self, email, username, first_name, last_name, password):
         self.email = email
@@ -24,8 +27,17 @@ class User(BaseModel, TimestampMixin):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
-    def to_dict(self):
-        return {
+    def increment_failed_login(self):
+        self.failed_login_attempts = (self.failed_login_attempts or 0) + 1
+        self.save()
+    
+    def update_login_info(self):
+        self.failed_login_attempts = 0
+        self.last_login_at = datetime.utcnow()
+        self.save()
+    
+    def to_dict(self, include_sensitive=False):
+        data = {
             'id': self.id,
             'email': self.email,
             'username': self.username,
@@ -33,3 +45,7 @@ class User(BaseModel, TimestampMixin):
             'last_name': self.last_name,
             'full_name': f'{self.first_name} {self.last_name}'
         }
+        if include_sensitive:
+            data['is_active'] = self.is_active
+            data['last_login_at'] = self.last_login_at.isoformat() if self.last_login_at else None
+        return data
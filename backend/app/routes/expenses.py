@@ -9,20 +9,47 @@ from datetime import datetime, date, timedelta
 from app.models.expense import Expense
 from app.models.category import Category
 from app.models.user import User
+from app.models.loading import expense_list_options, expense_list_query
 from app.database import db
 from app.utils.validators import (
     validate_amount, validate_description, validate_date,
     validate_category_id, validate_tags
 )
-from app.utils.helpers import generate_response, paginate_query
-from app.services.ml_service import MLService
+from app.utils.helpers import (
+    generate_response, not_modified_response, paginate_query, paginate_keyset,
+    encode_cursor, decode_cursor
+)
+from app.services.category_registry import get_category_registry
+from app.services.model_registry import get_ml_service
+from app.services.http_cache import conditional_read
 
 expenses_bp = Blueprint('expenses', __name__)
 
+# Sort key columns (ending in a unique column) and their cursor value types
+EXPENSE_SORT_KEYS = {
+    'date': ((Expense.date, Expense.created_at, Expense.id), (date, datetime, int)),
+    'amount': ((Expense.amount, Expense.id), (float, int)),
+    'category': ((Category.name, Expense.id), (str, int))
+}
+
+def _sort_values(expense, sort_by):
+    """Sort key values of an expense, matching EXPENSE_SORT_KEYS"""
+    if sort_by == 'amount':
+        return (expense.amount, expense.id)
+    if sort_by == 'category':
+        return (expense.category.name, expense.id)
+    return (expense.date, expense.created_at, expense.id)
+
 @expenses_bp.route('', methods=['GET'])
 @jwt_required()
+@conditional_read
 def get_expenses():
-    """Get user's expenses with filtering and pagination"""
+    """Get user's expenses with filtering and pagination.
+
+    Pass ``limit`` (and ``cursor`` from the previous page's ``next_cursor``)
+    for keyset pagination; ``with_total=1`` adds the total count. Without
+    them the legacy ``page``/``per_page`` offset mode is used.
+    """
     try:
         current_user_id = get_jwt_identity()
 
@@ -67,31 +94,55 @@ def get_expenses():
                 )
             )
 
-        # Apply sorting
-        if sort_by == 'amount':
-            if sort_order == 'asc':
-                query = query.order_by(Expense.amount.asc())
-            else:
-                query = query.order_by(Expense.amount.desc())
-        elif sort_by == 'category':
-            query = query.join(Category).order_by(
-                Category.name.asc() if sort_order == 'asc' else Category.name.desc()
+        if sort_by not in EXPENSE_SORT_KEYS:
+            sort_by = 'date'
+        if sort_order != 'asc':
+            sort_order = 'desc'
+        descending = sort_order == 'desc'
+        sort_columns, value_types = EXPENSE_SORT_KEYS[sort_by]
+
+        # Load categories with the page itself rather than one SELECT per row
+        if sort_by == 'category':
+            query = query.join(Category).options(*expense_list_options(category_joined=True))
+        else:
+            query = query.options(*expense_list_options())
+
+        # Keyset mode: opaque cursor over the sort key, no OFFSET scan
+        if 'cursor' in request.args or 'limit' in request.args:
+            limit = request.args.get('limit', 20, type=int)
+            with_total = request.args.get('with_total', '0').lower() in ('1', 'true')
+            cursor = request.args.get('cursor')
+
+            after = None
+            if cursor:
+                try:
+                    after = decode_cursor(cursor, sort_by, sort_order, value_types)
+                except ValueError as e:
+                    return generate_response('error', str(e), status_code=400)
+
+            result = paginate_keyset(query, sort_columns, descending=descending, after=after,
+                                     limit=limit, with_total=with_total)
+
+            items = result['items']
+            pagination = result['pagination']
+            pagination['next_cursor'] = (
+                encode_cursor(sort_by, sort_order, _sort_values(items[-1], sort_by))
+                if pagination['has_next'] else None
             )
-        else:  # sort by date (default)
-            if sort_order == 'asc':
-                query = query.order_by(Expense.date.asc(), Expense.created_at.asc())
-            else:
-                query = query.order_by(Expense.date.desc(), Expense.created_at.desc())
+        else:
+            query = query.order_by(*[column.desc() if descending else column.asc() for column in sort_columns])
 
-        # Paginate results
-        result = paginate_query(query, page=page, per_page=per_page)
+            # Paginate results
+            result = paginate_query(query, page=page, per_page=per_page)
+            items = result['items']
+            pagination = result['pagination']
 
         # Convert to dictionaries
-        expenses_data = [expense.to_dict() for expense in result['items']]
+        expenses_data = [expense.to_dict() for expense in items]
 
         return generate_response('success', 'Expenses retrieved successfully', {
             'expenses': expenses_data,
-            'pagination': result['pagination']
+            'pagination': pagination
         })
 
     except Exception as e:
@@ -123,8 +174,8 @@ def create_expense():
             return generate_response('error', category_validation['message'], status_code=400)
 
         # Validate category exists and belongs to user or is system category
-        category = Category.query.get(category_validation['category_id'])
-        if not category or not category.is_active:
+        category = get_category_registry().get(category_validation['category_id'])
+        if not category:
             return generate_response('error', 'Invalid category', status_code=400)
 
         # Validate optional date
@@ -225,8 +276,8 @@ def update_expense(expense_id):
             if not category_validation['valid']:
                 return generate_response('error', category_validation['message'], status_code=400)
 
-            category = Category.query.get(category_validation['category_id'])
-            if not category or not category.is_active:
+            category = get_category_registry().get(category_validation['category_id'])
+            if not category:
                 return generate_response('error', 'Invalid category', status_code=400)
 
             expense.category_id = category_validation['category_id']
@@ -294,20 +345,16 @@ def delete_expense(expense_id):
 def get_categories():
     """Get all available categories"""
     try:
-        current_user_id = get_jwt_identity()
-
-        categories = Category.query.filter_by(is_active=True).order_by(
-            Category.sort_order.asc(), Category.name.asc()
-        ).all()
+        registry = get_category_registry()
+        etag = registry.etag
+        if request.if_none_match.contains(etag):
+            return not_modified_response(etag)
 
-        categories_data = [
-            category.to_dict(include_stats=True, user_id=current_user_id) 
-            for category in categories
-        ]
+        categories_data = [category.to_dict() for category in registry.all()]
 
         return generate_response('success', 'Categories retrieved successfully', {
             'categories': categories_data
-        })
+        }, etag=etag)
 
     except Exception as e:
         current_app.logger.error(f"Get categories error: {e}")
@@ -328,20 +375,15 @@ def bulk_delete_expenses():
         if not isinstance(expense_ids, list):
             return generate_response('error', 'expense_ids must be an array', status_code=400)
 
-        # Validate all IDs belong to the user
-        expenses = Expense.query.filter(
-            Expense.id.in_(expense_ids),
-            Expense.user_id == current_user_id
-        ).all()
-
-        if len(expenses) != len(expense_ids):
+        # One DELETE scoped to the user; undone unless every ID matched
+        deleted = Expense.bulk_delete(expense_ids, user_id=current_user_id, commit=False)
+        if deleted != len(set(expense_ids)):
+            db.session.rollback()
             return generate_response('error', 'Some expenses not found or not authorized', status_code=400)
 
-        # Delete all expenses
-        for expense in expenses:
-            expense.delete()
+        db.session.commit()
 
-        return generate_response('success', f'{len(expenses)} expenses deleted successfully')
+        return generate_response('success', f'{deleted} expenses deleted successfully')
 
     except Exception as e:
         current_app.logger.error(f"Bulk delete expenses error: {e}")
@@ -365,13 +407,14 @@ def suggest_category():
             return generate_response('error', 'Description or merchant name required', status_code=400)
 
         # Use ML service to predict category
-        ml_service = MLService()
+        ml_service = get_ml_service()
         predicted_category, confidence = ml_service.predict_category(
             description, merchant_name, amount
         )
 
         # Find the category object
-        category = Category.query.filter_by(name=predicted_category, is_active=True).first()
+        registry = get_category_registry()
+        category = registry.get_by_name(predicted_category)
 
         if category:
             return generate_response('success', 'Category suggestion retrieved', {
@@ -380,7 +423,7 @@ def suggest_category():
             })
         else:
             # Fallback to default category
-            default_category = Category.query.filter_by(name='Other', is_active=True).first()
+            default_category = registry.get_by_name('Other')
             return generate_response('success', 'Category suggestion retrieved', {
                 'suggested_category': default_category.to_dict() if default_category else None,
                 'confidence_score': 0.3
@@ -390,8 +433,75 @@ def suggest_category():
         current_app.logger.error(f"Suggest category error: {e}")
         return generate_response('error', 'Failed to suggest category', status_code=500)
 
+def _suggestion_item_error(item):
+    """Why a batch suggestion item cannot be scored, or None when it can"""
+    if not isinstance(item, dict):
+        return 'Item must be an object'
+    for field in ('description', 'merchant_name'):
+        if item.get(field) is not None and not isinstance(item[field], str):
+            return f'{field} must be a string'
+    if not (item.get('description') or item.get('merchant_name')):
+        return 'Description or merchant name required'
+    return None
+
+@expenses_bp.route('/suggest-category/batch', methods=['POST'])
+@jwt_required()
+def suggest_categories_batch():
+    """Get AI-suggested categories for many expenses in one call"""
+    try:
+        data = request.get_json()
+
+        if not data or not isinstance(data.get('items'), list):
+            return generate_response('error', 'A list of items is required', status_code=400)
+
+        items = data['items']
+        max_items = current_app.config.get('SUGGEST_BATCH_MAX_ITEMS', 5000)
+        if not items or len(items) > max_items:
+            return generate_response('error', f'Provide between 1 and {max_items} items', status_code=400)
+
+        errors = {index: _suggestion_item_error(item) for index, item in enumerate(items)}
+        valid_indexes = [index for index, error in errors.items() if error is None]
+        predictions = get_ml_service().predict_categories([items[index] for index in valid_indexes])
+        predicted = dict(zip(valid_indexes, predictions))
+
+        registry = get_category_registry()
+        default_category = registry.get_by_name('Other')
+        suggestions = []
+
+        for index in range(len(items)):
+            if index not in predicted:
+                suggestions.append({
+                    'index': index,
+                    'error': errors[index]
+                })
+                continue
+
+            category_name, confidence = predicted[index]
+            category = registry.get_by_name(category_name)
+            if category:
+                suggestions.append({
+                    'index': index,
+                    'suggested_category': category.to_dict(),
+                    'confidence_score': round(confidence, 2)
+                })
+            else:
+                suggestions.append({
+                    'index': index,
+                    'suggested_category': default_category.to_dict() if default_category else None,
+                    'confidence_score': 0.3
+                })
+
+        return generate_response('success', 'Category suggestions retrieved', {
+            'suggestions': suggestions
+        })
+
+    except Exception as e:
+        current_app.logger.error(f"Batch suggest category error: {e}")
+        return generate_response('error', 'Failed to suggest categories', status_code=500)
+
 @expenses_bp.route('/stats', methods=['GET'])
 @jwt_required()
+@conditional_read
 def get_expense_stats():
     """Get expense statistics"""
     try:
@@ -408,8 +518,7 @@ def get_expense_stats():
             start_date = current_date.replace(day=1)
 
         # Get expenses for the period
-        expenses = Expense.query.filter(
-            Expense.user_id == current_user_id,
+        expenses = expense_list_query(current_user_id).filter(
             Expense.date >= start_date.date()
         ).all()
 
@@ -3,20 +3,22 @@ Smart Expense Tracker - Upload Routes
 File upload and OCR processing for receipts
 """
 
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from werkzeug.utils import secure_filename
-import os
-import uuid
+import time
 from datetime import datetime
+from sqlalchemy import func
 from app.models.expense import Expense
-from app.models.category import Category
 from app.models.user import User
+from app.models.ocr_job import OcrJob
+from app.models.receipt_upload import ReceiptUpload
 from app.database import db
-from app.services.ocr_service import OCRService
-from app.services.ml_service import MLService
+from app.services.model_registry import get_ml_service
+from app.services.category_registry import get_category_registry
+from app.services.ocr_jobs import get_ocr_jobs
+from app.services.receipt_uploads import ReceiptUploadService
 from app.utils.helpers import generate_response, generate_unique_filename
-from app.utils.validators import validate_file_upload
+from app.utils.validators import validate_file_upload, validate_category_id
 
 upload_bp = Blueprint('upload', __name__)
 
@@ -38,74 +40,86 @@ def upload_receipt():
         if not file_validation['valid']:
             return generate_response('error', file_validation['message'], status_code=400)
 
-        # Create upload directory if it doesn't exist
-        upload_dir = os.path.join(current_app.instance_path, 'uploads', str(current_user_id))
-        os.makedirs(upload_dir, exist_ok=True)
+        jobs = get_ocr_jobs()
+        if jobs.is_full():
+            return generate_response('error', 'Receipt processing queue is full, please retry shortly', status_code=503)
 
-        # Generate unique filename
-        original_filename = secure_filename(file.filename)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        unique_id = str(uuid.uuid4())[:8]
+        upload = ReceiptUploadService(current_app.instance_path).save(file, current_user_id)
+        db.session.commit()
 
-        # Split filename and extension
-        if '.' in original_filename:
-            name, ext = original_filename.rsplit('.', 1)
-            filename = f"{name}_{timestamp}_{unique_id}.{ext}"
-        else:
-            filename = f"{original_filename}_{timestamp}_{unique_id}"
-
-        file_path = os.path.join(upload_dir, filename)
-
-        # Save the file
-        file.save(file_path)
-
-        # Process with OCR
-        ocr_service = OCRService()
-        extracted_data = ocr_service.extract_receipt_data(file_path)
-
-        # Get AI category suggestion if ML is enabled
-        suggested_category = None
-        confidence_score = 0.0
-
-        if current_app.config.get('ENABLE_AI_CATEGORIZATION', True):
-            ml_service = MLService()
-            category_name, confidence_score = ml_service.predict_category(
-                extracted_data.get('raw_text', ''),
-                extracted_data.get('merchant_name', ''),
-                extracted_data.get('total_amount', 0)
-            )
-
-            suggested_category = Category.query.filter_by(
-                name=category_name, is_active=True
-            ).first()
-
-        # Store relative path for database
-        relative_path = os.path.relpath(file_path, current_app.instance_path)
-
-        # Prepare response data
-        response_data = {
-            'file_id': unique_id,
-            'filename': filename,
-            'file_path': relative_path,
-            'extracted_data': {
-                'merchant_name': extracted_data.get('merchant_name'),
-                'total_amount': extracted_data.get('total_amount'),
-                'date': extracted_data['date'].isoformat() if extracted_data.get('date') else None,
-                'tax_amount': extracted_data.get('tax_amount', 0),
-                'items': extracted_data.get('items', []),
-                'confidence_score': extracted_data.get('confidence_score', 0),
-                'raw_text': extracted_data.get('raw_text', '')[:500] + '...' if len(extracted_data.get('raw_text', '')) > 500 else extracted_data.get('raw_text', '')
-            },
-            'suggested_category': suggested_category.to_dict() if suggested_category else None,
-            'ai_confidence': round(confidence_score, 2)
-        }
+        # OCR and categorization run outside the request
+        job = jobs.enqueue(current_user_id, upload.file_id, upload.filename, upload.path,
+                           content_hash=upload.sha256)
 
-        return generate_response('success', 'Receipt uploaded and processed successfully', response_data)
+        return generate_response('success', 'Receipt uploaded, processing started', _job_response(job), status_code=202)
 
     except Exception as e:
         current_app.logger.error(f"Upload receipt error: {e}")
         return generate_response('error', 'Failed to upload and process receipt', status_code=500)
 
+@upload_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_ocr_job(job_id):
+    """Poll the status and result of a receipt processing job"""
+    try:
+        current_user_id = get_jwt_identity()
+
+        job = OcrJob.query.filter_by(job_id=job_id, user_id=current_user_id).first()
+        if not job:
+            return generate_response('error', 'Job not found', status_code=404)
+
+        return generate_response('success', 'Job retrieved successfully', job.to_dict())
+
+    except Exception as e:
+        current_app.logger.error(f"Get OCR job error: {e}")
+        return generate_response('error', 'Failed to retrieve job', status_code=500)
+
+@upload_bp.route('/ocr-cache/stats', methods=['GET'])
+@jwt_required()
+def get_ocr_cache_stats():
+    """OCR result cache hit/miss counters"""
+    try:
+        cache = get_ocr_jobs().cache
+        if cache is None:
+            return generate_response('success', 'OCR cache is disabled', {'enabled': False})
+
+        return generate_response('success', 'OCR cache statistics retrieved', dict(cache.stats(), enabled=True))
+
+    except Exception as e:
+        current_app.logger.error(f"OCR cache stats error: {e}")
+        return generate_response('error', 'Failed to retrieve OCR cache statistics', status_code=500)
+
+@upload_bp.route('/ocr-passes/stats', methods=['GET'])
+@jwt_required()
+def get_ocr_pass_stats():
+    """How many of the user's processed receipts the fast OCR pass handled versus the full pipeline"""
+    try:
+        current_user_id = get_jwt_identity()
+        counts = dict(db.session.query(ReceiptUpload.ocr_pass, func.count(ReceiptUpload.id)).filter(
+            ReceiptUpload.user_id == current_user_id,
+            ReceiptUpload.ocr_pass.isnot(None)
+        ).group_by(ReceiptUpload.ocr_pass).all())
+        total = sum(counts.values())
+
+        passes = {
+            ocr_pass: {
+                'count': counts.get(ocr_pass, 0),
+                'fraction': round(counts.get(ocr_pass, 0) / total, 3) if total else 0.0
+            }
+            for ocr_pass in ReceiptUpload.OCR_PASSES
+        }
+
+        return generate_response('success', 'OCR pass statistics retrieved', {'receipts': total, 'passes': passes})
+
+    except Exception as e:
+        current_app.logger.error(f"OCR pass stats error: {e}")
+        return generate_response('error', 'Failed to retrieve OCR pass statistics', status_code=500)
+
+def _job_response(job):
+    data = job.to_dict()
+    data['status_url'] = url_for('upload.get_ocr_job', job_id=job.job_id)
+    return data
+
 @upload_bp.route('/receipt/create-expense', methods=['POST'])
 @jwt_required()
 def create_expense_from_receipt():
@@ -118,15 +132,30 @@ def create_expense_from_receipt():
             return generate_response('error', 'No data provided', status_code=400)
 
         # Required fields
-        required_fields = ['file_path', 'description', 'amount', 'category_id']
+        required_fields = ['description', 'amount', 'category_id']
         missing_fields = [field for field in required_fields if not data.get(field)]
+        if not data.get('file_id') and not data.get('file_path'):
+            missing_fields.insert(0, 'file_id')
 
         if missing_fields:
             return generate_response('error', f'Missing required fields: {", ".join(missing_fields)}', status_code=400)
 
+        # Resolve the uploaded receipt
+        if data.get('file_id'):
+            upload = ReceiptUpload.query.filter_by(file_id=data['file_id'], user_id=current_user_id).first()
+        else:
+            upload = ReceiptUpload.query.filter_by(path=data['file_path'], user_id=current_user_id).first()
+
+        if not upload:
+            return generate_response('error', 'Receipt file not found', status_code=404)
+
         # Validate category
-        category = Category.query.get(data['category_id'])
-        if not category or not category.is_active:
+        category_validation = validate_category_id(data['category_id'])
+        if not category_validation['valid']:
+            return generate_response('error', category_validation['message'], status_code=400)
+
+        category = get_category_registry().get(category_validation['category_id'])
+        if not category:
             return generate_response('error', 'Invalid category', status_code=400)
 
         # Validate amount
@@ -148,7 +177,7 @@ def create_expense_from_receipt():
         # Create expense
         expense = Expense(
             user_id=current_user_id,
-            category_id=data['category_id'],
+            category_id=category_validation['category_id'],
             description=data['description'].strip(),
             amount=amount,
             date=expense_date,
@@ -169,7 +198,8 @@ def create_expense_from_receipt():
             expense.notes = data['notes'].strip()
 
         # Receipt-specific fields
-        expense.receipt_image_path = data['file_path']
+        expense.receipt_upload_id = upload.id
+        expense.receipt_image_path = upload.path
         expense.receipt_text = data.get('raw_text', '')
         expense.created_by_ai = True
         expense.ai_confidence_score = data.get('ai_confidence', 0.0)
@@ -197,54 +227,20 @@ def reprocess_receipt(file_id):
     try:
         current_user_id = get_jwt_identity()
 
-        # Find file by searching in user's upload directory
-        upload_dir = os.path.join(current_app.instance_path, 'uploads', str(current_user_id))
-
-        file_path = None
-        for filename in os.listdir(upload_dir):
-            if file_id in filename:
-                file_path = os.path.join(upload_dir, filename)
-                break
-
-        if not file_path or not os.path.exists(file_path):
+        upload = ReceiptUpload.query.filter_by(file_id=file_id, user_id=current_user_id).first()
+        if not upload or not ReceiptUploadService(current_app.instance_path).exists(upload):
             return generate_response('error', 'File not found', status_code=404)
 
-        # Reprocess with OCR
-        ocr_service = OCRService()
-        extracted_data = ocr_service.extract_receipt_data(file_path)
-
-        # Get new AI category suggestion
-        suggested_category = None
-        confidence_score = 0.0
-
-        if current_app.config.get('ENABLE_AI_CATEGORIZATION', True):
-            ml_service = MLService()
-            category_name, confidence_score = ml_service.predict_category(
-                extracted_data.get('raw_text', ''),
-                extracted_data.get('merchant_name', ''),
-                extracted_data.get('total_amount', 0)
-            )
-
-            suggested_category = Category.query.filter_by(
-                name=category_name, is_active=True
-            ).first()
-
-        response_data = {
-            'file_id': file_id,
-            'extracted_data': {
-                'merchant_name': extracted_data.get('merchant_name'),
-                'total_amount': extracted_data.get('total_amount'),
-                'date': extracted_data['date'].isoformat() if extracted_data.get('date') else None,
-                'tax_amount': extracted_data.get('tax_amount', 0),
-                'items': extracted_data.get('items', []),
-                'confidence_score': extracted_data.get('confidence_score', 0),
-                'raw_text': extracted_data.get('raw_text', '')
-            },
-            'suggested_category': suggested_category.to_dict() if suggested_category else None,
-            'ai_confidence': round(confidence_score, 2)
-        }
+        jobs = get_ocr_jobs()
+        if jobs.is_full():
+            return generate_response('error', 'Receipt processing queue is full, please retry shortly', status_code=503)
+
+        upload.ocr_status = ReceiptUpload.OCR_PENDING
+        db.session.commit()
+        job = jobs.enqueue(current_user_id, file_id, upload.filename, upload.path, kind='reprocess',
+                           content_hash=upload.sha256)
 
-        return generate_response('success', 'Receipt reprocessed successfully', response_data)
+        return generate_response('success', 'Receipt reprocessing started', _job_response(job), status_code=202)
 
     except Exception as e:
         current_app.logger.error(f"Reprocess receipt error: {e}")
@@ -266,16 +262,19 @@ def bulk_upload_receipts():
         if not files or len(files) == 0:
             return generate_response('error', 'No files provided', status_code=400)
 
-        if len(files) > 10:  # Limit bulk uploads
-            return generate_response('error', 'Maximum 10 files allowed per bulk upload', status_code=400)
+        max_files = current_app.config.get('BULK_UPLOAD_MAX_FILES', 10)
+        if len(files) > max_files:  # Limit bulk uploads
+            return generate_response('error', f'Maximum {max_files} files allowed per bulk upload', status_code=400)
 
+        started = time.perf_counter()
         results = []
-        upload_dir = os.path.join(current_app.instance_path, 'uploads', str(current_user_id))
-        os.makedirs(upload_dir, exist_ok=True)
+        saved = []
+        storage = ReceiptUploadService(current_app.instance_path)
 
-        ocr_service = OCRService()
-        ml_service = MLService() if current_app.config.get('ENABLE_AI_CATEGORIZATION', True) else None
+        ml_service = get_ml_service() if current_app.config.get('ENABLE_AI_CATEGORIZATION', True) else None
+        registry = get_category_registry()
 
+        # Save every file first; OCR then runs for all of them in parallel
         for file in files:
             try:
                 # Validate file
@@ -288,64 +287,74 @@ def bulk_upload_receipts():
                     })
                     continue
 
-                # Generate unique filename
-                original_filename = secure_filename(file.filename)
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-
-                if '.' in original_filename:
-                    name, ext = original_filename.rsplit('.', 1)
-                    filename = f"{name}_{timestamp}_{unique_id}.{ext}"
-                else:
-                    filename = f"{original_filename}_{timestamp}_{unique_id}"
-
-                file_path = os.path.join(upload_dir, filename)
-                file.save(file_path)
-
-                # Process with OCR
-                extracted_data = ocr_service.extract_receipt_data(file_path)
-
-                # Get AI category suggestion
-                suggested_category = None
-                confidence_score = 0.0
-
-                if ml_service:
-                    category_name, confidence_score = ml_service.predict_category(
-                        extracted_data.get('raw_text', ''),
-                        extracted_data.get('merchant_name', ''),
-                        extracted_data.get('total_amount', 0)
-                    )
-
-                    suggested_category = Category.query.filter_by(
-                        name=category_name, is_active=True
-                    ).first()
-
-                relative_path = os.path.relpath(file_path, current_app.instance_path)
+                upload = storage.save(file, current_user_id)
 
                 results.append({
-                    'filename': original_filename,
+                    'filename': upload.original_filename,
                     'success': True,
-                    'file_id': unique_id,
-                    'file_path': relative_path,
-                    'extracted_data': {
-                        'merchant_name': extracted_data.get('merchant_name'),
-                        'total_amount': extracted_data.get('total_amount'),
-                        'date': extracted_data['date'].isoformat() if extracted_data.get('date') else None,
-                        'tax_amount': extracted_data.get('tax_amount', 0),
-                        'confidence_score': extracted_data.get('confidence_score', 0)
-                    },
-                    'suggested_category': suggested_category.to_dict() if suggested_category else None,
-                    'ai_confidence': round(confidence_score, 2)
+                    'file_id': upload.file_id,
+                    'file_path': upload.path
                 })
+                saved.append((results[-1], upload))
 
             except Exception as e:
-                current_app.logger.error(f"Error processing file {file.filename}: {e}")
+                current_app.logger.error(f"Error saving file {file.filename}: {e}")
                 results.append({
                     'filename': file.filename,
                     'success': False,
                     'error': 'Failed to process file'
                 })
 
+        db.session.commit()
+
+        outcomes = get_ocr_jobs().extract_many(
+            [storage.absolute_path(upload) for _, upload in saved],
+            [upload.sha256 for _, upload in saved]
+        )
+
+        categorize = []
+        for (result, upload), (extracted_data, seconds, error, cache_hit) in zip(saved, outcomes):
+            result['timing'] = {'ocr_ms': round(seconds * 1000, 1), 'cache_hit': cache_hit}
+
+            if error is not None:
+                current_app.logger.error(f"Error processing file {result['filename']}: {error}")
+                result.update({'success': False, 'error': 'Failed to process file'})
+                upload.ocr_status = ReceiptUpload.OCR_FAILED
+                continue
+
+            upload.ocr_status = ReceiptUpload.OCR_COMPLETED
+            upload.ocr_pass = extracted_data.get('ocr_pass')
+
+            result.update({
+                'extracted_data': {
+                    'merchant_name': extracted_data.get('merchant_name'),
+                    'total_amount': extracted_data.get('total_amount'),
+                    'date': extracted_data.get('date'),
+                    'tax_amount': extracted_data.get('tax_amount', 0),
+                    'confidence_score': extracted_data.get('confidence_score', 0)
+                },
+                'suggested_category': None,
+                'ai_confidence': 0.0
+            })
+            categorize.append((result, extracted_data))
+
+        # Categorize every processed receipt in one batch
+        if ml_service and categorize:
+            predictions = ml_service.predict_categories([
+                {
+                    'description': extracted_data.get('raw_text', ''),
+                    'merchant_name': extracted_data.get('merchant_name', ''),
+                    'amount': extracted_data.get('total_amount', 0)
+                }
+                for _, extracted_data in categorize
+            ])
+
+            for (result, _), (category_name, confidence_score) in zip(categorize, predictions):
+                suggested_category = registry.get_by_name(category_name)
+                result['suggested_category'] = suggested_category.to_dict() if suggested_category else None
+                result['ai_confidence'] = round(confidence_score, 2)
+
+        db.session.commit()
         successful_uploads = sum(1 for result in results if result['success'])
 
         return generate_response('success', f'Processed {successful_uploads} of {len(files)} files', {
@@ -353,7 +362,8 @@ def bulk_upload_receipts():
             'summary': {
                 'total_files': len(files),
                 'successful': successful_uploads,
-                'failed': len(files) - successful_uploads
+                'failed': len(files) - successful_uploads,
+                'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)
             }
         })
 
@@ -368,36 +378,24 @@ def delete_uploaded_file(file_id):
     try:
         current_user_id = get_jwt_identity()
 
-        # Find file by searching in user's upload directory
-        upload_dir = os.path.join(current_app.instance_path, 'uploads', str(current_user_id))
-
-        file_path = None
-        filename = None
-        for fname in os.listdir(upload_dir):
-            if file_id in fname:
-                filename = fname
-                file_path = os.path.join(upload_dir, fname)
-                break
-
-        if not file_path or not os.path.exists(file_path):
+        upload = ReceiptUpload.query.filter_by(file_id=file_id, user_id=current_user_id).first()
+        if not upload:
             return generate_response('error', 'File not found', status_code=404)
 
         # Check if file is associated with any expense
-        expense = Expense.query.filter(
-            Expense.user_id == current_user_id,
-            Expense.receipt_image_path.like(f'%{filename}%')
-        ).first()
+        expense = Expense.query.filter_by(user_id=current_user_id, receipt_upload_id=upload.id).first()
 
         if expense:
             # Don't delete file if it's associated with an expense
             # Just remove the association
+            expense.receipt_upload_id = None
             expense.receipt_image_path = None
             expense.save()
 
             return generate_response('success', 'File association removed from expense')
         else:
-            # Delete the physical file
-            os.remove(file_path)
+            # Delete the metadata; the file goes once no other upload shares it
+            ReceiptUploadService(current_app.instance_path).delete(upload)
             return generate_response('success', 'File deleted successfully')
 
     except Exception as e:
@@ -420,10 +418,7 @@ def get_upload_stats():
         total_expenses = Expense.query.filter_by(user_id=current_user_id).count()
 
         # Count uploaded files
-        upload_dir = os.path.join(current_app.instance_path, 'uploads', str(current_user_id))
-        uploaded_files = 0
-        if os.path.exists(upload_dir):
-            uploaded_files = len([f for f in os.listdir(upload_dir) if os.path.isfile(os.path.join(upload_dir, f))])
+        uploaded_files = ReceiptUpload.query.filter_by(user_id=current_user_id).count()
 
         stats = {
             'ai_created_expenses': ai_created_expenses,
@@ -6,5 +6,7 @@ Contains all business logic services
 from .ocr_service import OCRService
 from .ml_service import MLService
 from .expense_analyzer import ExpenseAnalyzer
+from .rollup_service import RollupService
+from .model_registry import ModelRegistry
 
-__all__ = ['OCRService', 'MLService', 'ExpenseAnalyzer']
+__all__ = ['OCRService', 'MLService', 'ExpenseAnalyzer', 'RollupService', 'ModelRegistry']
@@ -0,0 +1,170 @@
+"""
+Smart Expense Tracker - Aggregation Service
+Single-query, time-bucketed expense aggregation shared by dashboard endpoints
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, literal
+from app.models.expense import Expense
+from app.database import db
+from app.services.rollup_service import RollupService
+from app.utils.helpers import add_months
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+GROUP_BY_COLUMNS = {
+    'category': 'category_id',
+    'merchant': 'merchant_name',
+    'currency': 'currency'
+}
+
+def truncate_date(value, granularity):
+    """Return the first day of the bucket containing ``value``"""
+    if granularity == 'day':
+        return value
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'quarter':
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if granularity == 'year':
+        return value.replace(month=1, day=1)
+    raise ValueError(f'Unsupported granularity: {granularity}')
+
+def next_bucket(value, granularity):
+    """Return the first day of the bucket following the one starting at ``value``"""
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if granularity == 'month':
+        return add_months(value, 1)
+    if granularity == 'quarter':
+        return add_months(value, 3)
+    if granularity == 'year':
+        return add_months(value, 12)
+    raise ValueError(f'Unsupported granularity: {granularity}')
+
+def bucket_starts(start_date, end_date, granularity):
+    """List every bucket start overlapping the half-open range [start_date, end_date)"""
+    starts = []
+    current = truncate_date(start_date, granularity)
+    while current < end_date:
+        starts.append(current)
+        current = next_bucket(current, granularity)
+    return starts
+
+class ExpenseAggregator:
+    """Group a user's expenses into calendar buckets with one GROUP BY query"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def aggregate(self, user_id, start_date, end_date, granularity='month', group_by=None):
+        """Aggregate expenses in the half-open range [start_date, end_date).
+
+        Returns one entry per bucket, oldest first, with empty buckets filled
+        with zeros. When ``group_by`` is set each bucket also carries a
+        ``groups`` dict keyed by category id, merchant name or currency.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f'Unsupported granularity: {granularity}')
+        if group_by is not None and group_by not in GROUP_BY_COLUMNS:
+            raise ValueError(f'Unsupported group_by: {group_by}')
+
+        if self._can_use_rollups(start_date, end_date, granularity, group_by):
+            rows = self._query_rollups(user_id, start_date, end_date, granularity, group_by)
+        else:
+            rows = self._query_expenses(user_id, start_date, end_date, granularity, group_by)
+
+        buckets = {}
+        for start in bucket_starts(start_date, end_date, granularity):
+            bucket = {'period_start': start, 'total_amount': 0.0, 'expense_count': 0}
+            if group_by:
+                bucket['groups'] = {}
+            buckets[start] = bucket
+
+        for period_start, group_key, total, count in rows:
+            bucket = buckets.get(period_start)
+            if bucket is None:
+                continue
+
+            bucket['total_amount'] += total or 0.0
+            bucket['expense_count'] += count or 0
+
+            if group_by:
+                group = bucket['groups'].setdefault(group_key, {'total_amount': 0.0, 'expense_count': 0})
+                group['total_amount'] += total or 0.0
+                group['expense_count'] += count or 0
+
+        return list(buckets.values())
+
+    def _can_use_rollups(self, start_date, end_date, granularity, group_by):
+        """Month-aligned ranges at month granularity or coarser are served from rollups"""
+        return (
+            granularity in ('month', 'quarter', 'year')
+            and group_by in (None, 'category')
+            and start_date.day == 1
+            and end_date.day == 1
+        )
+
+    def _query_rollups(self, user_id, start_date, end_date, granularity, group_by):
+        rows = RollupService().get_monthly_rows(
+            user_id, start_date, end_date, by_category=(group_by == 'category')
+        )
+        return [
+            (truncate_date(date(year, month, 1), granularity), category_id, total, count)
+            for year, month, category_id, total, count in rows
+        ]
+
+    def _query_expenses(self, user_id, start_date, end_date, granularity, group_by):
+        period = self._truncate_expression(granularity)
+        group_column = getattr(Expense, GROUP_BY_COLUMNS[group_by]) if group_by else literal(None)
+
+        query = db.session.query(
+            period.label('period_start'),
+            group_column.label('group_key'),
+            func.sum(Expense.amount),
+            func.count(Expense.id)
+        ).filter(
+            Expense.user_id == user_id,
+            Expense.date >= start_date,
+            Expense.date < end_date
+        ).group_by(period)
+
+        if group_by:
+            query = query.group_by(group_column)
+
+        return [
+            (self._to_date(period_start), group_key, total, count)
+            for period_start, group_key, total, count in query.all()
+        ]
+
+    def _truncate_expression(self, granularity):
+        """Dialect-correct SQL expression for the start of an expense's bucket"""
+        dialect = db.session.get_bind().dialect.name
+
+        if dialect == 'sqlite':
+            if granularity == 'day':
+                return func.date(Expense.date)
+            if granularity == 'week':
+                # Advance to Sunday, then step back to that week's Monday
+                return func.date(Expense.date, 'weekday 0', '-6 days')
+            if granularity == 'month':
+                return func.strftime('%Y-%m-01', Expense.date)
+            if granularity == 'quarter':
+                quarter_month = (db.cast(func.strftime('%m', Expense.date), db.Integer) - 1) // 3 * 3 + 1
+                return func.printf('%s-%02d-01', func.strftime('%Y', Expense.date), quarter_month)
+            return func.strftime('%Y-01-01', Expense.date)
+
+        # PostgreSQL and other dialects with date_trunc (weeks start on Monday)
+        return db.cast(func.date_trunc(granularity, Expense.date), db.Date)
+
+    def _to_date(self, value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        return datetime.strptime(value, '%Y-%m-%d').date()
@@ -0,0 +1,117 @@
+"""
+Smart Expense Tracker - Category Registry
+In-process category cache kept coherent across workers by a version stamp
+"""
+
+import logging
+import threading
+from flask import current_app, g, has_app_context
+from app.database import db
+from app.models.category import Category
+from app.models.cache_version import (
+    CATEGORIES_VERSION_KEY, PENDING_CATEGORY_WRITES, PRIVATE_CATEGORY_SNAPSHOT, get_version
+)
+
+class CachedCategory:
+    """Read-only snapshot of a Category row, safe to share across requests"""
+
+    __slots__ = ('_data',)
+
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        try:
+            return self._data[name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def to_dict(self):
+        return dict(self._data)
+
+class CategoryRegistry:
+    """Categories indexed by id and by name, loaded once per worker.
+
+    Each request compares the stored ``categories`` version stamp with the one
+    the snapshot was built from (a single-row lookup) and reloads only when a
+    Category write has bumped it. A session with uncommitted Category writes
+    reads a private snapshot instead, so the shared one only ever holds
+    committed rows.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    def _ensure_fresh(self):
+        session = db.session()
+        if session.info.get(PENDING_CATEGORY_WRITES):
+            private = session.info.get(PRIVATE_CATEGORY_SNAPSHOT)
+            if private is None:
+                private = session.info[PRIVATE_CATEGORY_SNAPSHOT] = self._load(get_version(CATEGORIES_VERSION_KEY))
+            return private
+
+        snapshot = self._snapshot
+        if snapshot is not None and has_app_context() and g.get('_category_registry_checked'):
+            return snapshot
+
+        version = get_version(CATEGORIES_VERSION_KEY)
+        if snapshot is None or snapshot['version'] != version:
+            with self._lock:
+                snapshot = self._snapshot
+                if snapshot is None or snapshot['version'] != version:
+                    snapshot = self._load(version)
+                    self._snapshot = snapshot
+
+        if has_app_context():
+            g._category_registry_checked = True
+        return snapshot
+
+    def _load(self, version):
+        categories = [CachedCategory(category.to_dict()) for category in Category.query.order_by(Category.name).all()]
+        self.logger.info(f"Loaded {len(categories)} categories (version {version})")
+
+        return {
+            'version': version,
+            'categories': categories,
+            'by_id': {category.id: category for category in categories},
+            'by_name': {category.name: category for category in categories}
+        }
+
+    def get(self, category_id, active_only=True):
+        """Look up a category by id"""
+        category = self._ensure_fresh()['by_id'].get(category_id)
+        if category is None or (active_only and not category.is_active):
+            return None
+        return category
+
+    def get_by_name(self, name, active_only=True):
+        """Look up a category by its unique name"""
+        category = self._ensure_fresh()['by_name'].get(name)
+        if category is None or (active_only and not category.is_active):
+            return None
+        return category
+
+    def all(self, active_only=True):
+        """All categories ordered by name"""
+        categories = self._ensure_fresh()['categories']
+        return [category for category in categories if category.is_active or not active_only]
+
+    @property
+    def etag(self):
+        """Strong (unquoted) ETag value for the current category list"""
+        return f'categories-{self._ensure_fresh()["version"]}'
+
+    def invalidate(self):
+        """Drop the snapshot so the next access reloads it"""
+        with self._lock:
+            self._snapshot = None
+
+def init_category_registry(app):
+    """Attach a registry to the app; one instance per worker process"""
+    app.extensions['category_registry'] = CategoryRegistry()
+
+def get_category_registry():
+    """Return the registry of the current app"""
+    return current_app.extensions['category_registry']
@@ -0,0 +1,181 @@
+"""
+Smart Expense Tracker - Dashboard Cache
+Two-level cache of dashboard responses, invalidated by per-user data versions
+"""
+
+import json
+import time
+import hashlib
+import logging
+import threading
+from functools import wraps
+from collections import OrderedDict
+from datetime import datetime, date
+from flask import current_app, request, jsonify, make_response
+from flask_jwt_extended import get_jwt_identity
+from app.models.cache_version import user_data_stamp
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry time to live"""
+
+    def __init__(self, maxsize=1024, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+class InMemoryRedis:
+    """Local stand-in for the Redis client methods the cache uses.
+
+    Selected with ``memory://`` (one store per app), so tests and local runs
+    exercise the L2 path without a Redis server.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ex if ex else None, value)
+        return True
+
+    def flushdb(self):
+        with self._lock:
+            self._entries.clear()
+
+class DashboardCache:
+    """Response payloads keyed by (user, endpoint, query parameters, data version).
+
+    The user's data version is bumped in the same transaction as every
+    expense write (the categories version on category writes), so a write
+    simply moves later reads to fresh keys; old
+    entries are never served again and age out of the LRU (L1) and by TTL
+    in Redis (L2). L1 values are shared between requests and must not be
+    mutated.
+    """
+
+    def __init__(self, l1, l2=None, ttl=300, prefix='dashboard'):
+        self.l1 = l1
+        self.l2 = l2
+        self.ttl = ttl
+        self.prefix = prefix
+        self.logger = logging.getLogger(__name__)
+        self.stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0}
+
+    def key(self, user_id, endpoint, params, stamp):
+        """``stamp`` is the user's (data version, categories version)"""
+        params_hash = hashlib.sha1(json.dumps(sorted(params), separators=(',', ':')).encode()).hexdigest()[:16]
+        # The date keeps relative windows ("this month") from outliving a rollover
+        return f'{self.prefix}:{user_id}:{endpoint}:{params_hash}:{date.today().isoformat()}:v{stamp[0]}.{stamp[1]}'
+
+    def get(self, key):
+        value = self.l1.get(key)
+        if value is not None:
+            self.stats['l1_hits'] += 1
+            return value
+
+        if self.l2 is not None:
+            try:
+                raw = self.l2.get(key)
+            except Exception as e:
+                self.logger.warning(f"Dashboard cache L2 read failed: {e}")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self.l1.set(key, value)
+                self.stats['l2_hits'] += 1
+                return value
+
+        self.stats['misses'] += 1
+        return None
+
+    def set(self, key, value):
+        self.l1.set(key, value)
+        if self.l2 is not None:
+            try:
+                self.l2.set(key, json.dumps(value, separators=(',', ':')), ex=self.ttl)
+            except Exception as e:
+                self.logger.warning(f"Dashboard cache L2 write failed: {e}")
+
+def create_dashboard_cache(app):
+    """Build the cache from DASHBOARD_CACHE_* settings; no Redis URL means L1 only"""
+    ttl = app.config.get('DASHBOARD_CACHE_TTL', 300)
+    url = app.config.get('DASHBOARD_CACHE_REDIS_URL')
+
+    l2 = None
+    if url == 'memory://':
+        l2 = InMemoryRedis()
+    elif url:
+        import redis
+
+        l2 = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+
+    return DashboardCache(LRUCache(app.config.get('DASHBOARD_CACHE_SIZE', 1024), ttl), l2, ttl)
+
+def init_dashboard_cache(app):
+    """Attach the dashboard cache to the app"""
+    app.extensions['dashboard_cache'] = create_dashboard_cache(app)
+
+def get_dashboard_cache():
+    """Return the dashboard cache of the current app"""
+    return current_app.extensions['dashboard_cache']
+
+def cached_dashboard(view):
+    """Serve a JWT-protected dashboard view from the cache.
+
+    Only successful JSON responses are stored; a hit is returned with a
+    fresh timestamp. Apply below ``jwt_required``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not current_app.config.get('DASHBOARD_CACHE_ENABLED', True):
+            return view(*args, **kwargs)
+
+        cache = get_dashboard_cache()
+        user_id = get_jwt_identity()
+        key = cache.key(user_id, request.endpoint, request.args.items(multi=True), user_data_stamp(user_id))
+
+        body = cache.get(key)
+        if body is not None:
+            return jsonify(dict(body, timestamp=datetime.utcnow().isoformat() + 'Z'))
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200 and response.is_json and not response.is_streamed:
+            cache.set(key, response.get_json())
+        return response
+
+    return wrapper
@@ -0,0 +1,111 @@
+"""
+Smart Expense Tracker - Dashboard Data
+Per-request source of a user's expenses, shared by every dashboard widget
+"""
+
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from app.models.expense import Expense
+from app.models.loading import expense_list_query
+from app.database import db
+from app.services.aggregation import ExpenseAggregator
+from app.utils.helpers import add_months
+
+def period_start(period, now):
+    """Start of a dashboard period ending ``now``, or None for all time (also for unknown periods)"""
+    if period == 'week':
+        return now - timedelta(days=7)
+    if period == 'year':
+        return now - timedelta(days=365)
+    if period == 'month':
+        return now.replace(day=1)
+    return None
+
+def overview_start(period, now):
+    """Start of the overview's window: the last week or year, else the current month.
+
+    The overview has no all-time view; 'all' and unknown periods mean month.
+    """
+    if period in ('week', 'year'):
+        return period_start(period, now)
+    return now.replace(day=1)
+
+class DashboardData:
+    """One user's expenses and monthly buckets, fetched at most once per request.
+
+    ``prefetch`` loads rows for the widest window any widget needs; later
+    reads of narrower windows are filtered in memory. Widgets that can also
+    aggregate in SQL check ``covers`` and only use the rows when they are
+    already loaded.
+    """
+
+    def __init__(self, user_id, now=None):
+        self.user_id = user_id
+        self.now = now or datetime.now()
+        self.logger = logging.getLogger(__name__)
+        self._rows = None
+        self._rows_start = None
+        self._dicts = {}
+        self._monthly = {}
+
+    def covers(self, start):
+        """True when the loaded rows include every expense on or after ``start`` (a date or None)"""
+        if self._rows is None:
+            return False
+        return self._rows_start is None or (start is not None and start >= self._rows_start)
+
+    def prefetch(self, start):
+        """Load the user's expenses from ``start`` (a date, None for all) with their categories"""
+        if self.covers(start):
+            return
+        query = expense_list_query(self.user_id)
+        if start is not None:
+            query = query.filter(Expense.date >= start)
+        self._rows = query.all()
+        self._rows_start = start
+        self._dicts = {}
+
+    def expenses(self, start, end=None):
+        """Expenses dated in [start, end), loading them if not already covered"""
+        self.prefetch(start)
+        return [expense for expense in self._rows
+                if (start is None or expense.date >= start) and (end is None or expense.date < end)]
+
+    def expense_dicts(self, start):
+        """``to_dict()`` of ``expenses(start)``, built once per window"""
+        self.prefetch(start)
+        if start not in self._dicts:
+            self._dicts[start] = [expense.to_dict() for expense in self.expenses(start)]
+        return self._dicts[start]
+
+    def total(self, start, end):
+        """Sum of amounts dated in [start, end); in memory when covered, else one SUM query"""
+        if self.covers(start):
+            return sum(expense.amount for expense in self.expenses(start, end))
+        return db.session.query(func.coalesce(func.sum(Expense.amount), 0.0)).filter(
+            Expense.user_id == self.user_id,
+            Expense.date >= start,
+            Expense.date < end
+        ).scalar()
+
+    def monthly_buckets(self, months):
+        """Calendar-month buckets for the last ``months`` months, oldest first.
+
+        Buckets are zero-filled, so a shorter window is the tail of a longer
+        one already computed.
+        """
+        for computed in sorted(self._monthly, reverse=True):
+            if months >= 1 and computed >= months:
+                return self._monthly[computed][-months:]
+
+        today = self.now.date()
+        buckets = ExpenseAggregator().aggregate(
+            self.user_id,
+            start_date=add_months(today, -(months - 1)),
+            end_date=add_months(today, 1),
+            granularity='month'
+        )
+        if months >= 1:
+            self._monthly[months] = buckets
+        return buckets
@@ -0,0 +1,443 @@
+"""
+Smart Expense Tracker - Dashboard Widgets
+Computation behind every dashboard endpoint and the combined bundle
+"""
+
+import time
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from sqlalchemy import func, literal, select, union_all
+from werkzeug.datastructures import MultiDict
+from app.models.expense import Expense
+from app.models.category import Category
+from app.database import db
+from app.services.expense_analyzer import ExpenseAnalyzer
+from app.services.dashboard_data import DashboardData, period_start, overview_start
+from app.services.model_registry import get_ml_service
+
+MAX_TREND_MONTHS = 24
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+logger = logging.getLogger(__name__)
+
+class Widget:
+    """A dashboard computation: ``compute(data, args)`` returns ``(message, payload)``.
+
+    ``window(data, args)`` is the earliest date the widget reads raw rows
+    from, False when it needs none, so a bundle can fetch once for all.
+    """
+
+    def __init__(self, name, compute, window=None):
+        self.name = name
+        self.compute = compute
+        self.window = window or (lambda data, args: False)
+
+WIDGETS = {}
+
+def widget(name, window=None):
+    def register(compute):
+        WIDGETS[name] = Widget(name, compute, window)
+        return compute
+    return register
+
+def _start_date(data, args):
+    start = period_start(args.get('period', 'month'), data.now)
+    return start.date() if start is not None else None
+
+def _overview_start_date(data, args):
+    return overview_start(args.get('period', 'month'), data.now).date()
+
+def _six_months(data, args):
+    return (data.now - timedelta(days=180)).date()
+
+@widget('overview', window=_overview_start_date)
+def overview(data, args):
+    period = args.get('period', 'month')  # month, week, year
+    dashboard_data = ExpenseAnalyzer().get_dashboard_data(data.user_id, period, source=data)
+    return 'Dashboard overview retrieved successfully', {'overview': dashboard_data}
+
+def _trend_months(args):
+    # Limit months to reasonable range
+    return max(1, min(args.get('months', 12, type=int), MAX_TREND_MONTHS))
+
+@widget('spending-trends')
+def spending_trends(data, args):
+    months = _trend_months(args)
+
+    trends = []
+    for bucket in data.monthly_buckets(months):
+        period_start_date = bucket['period_start']
+        monthly_total = bucket['total_amount']
+        monthly_count = bucket['expense_count']
+
+        trends.append({
+            'year': period_start_date.year,
+            'month': period_start_date.month,
+            'month_name': period_start_date.strftime('%B %Y'),
+            'total_amount': round(monthly_total, 2),
+            'expense_count': monthly_count,
+            'average_expense': round(monthly_total / monthly_count, 2) if monthly_count > 0 else 0
+        })
+
+    return 'Spending trends retrieved successfully', {'trends': trends}
+
+def _category_totals(data, start_date):
+    """(id, name, color, icon, total, count, average, first, last) per category, largest first"""
+    if data.covers(start_date):
+        groups = {}
+        for expense in data.expenses(start_date):
+            category = expense.category
+            if category is None:
+                continue  # the SQL path joins categories
+            group = groups.get(expense.category_id)
+            if group is None:
+                group = groups[expense.category_id] = [category.id, category.name, category.color, category.icon,
+                                                       0.0, 0, None, expense.date, expense.date]
+            group[4] += expense.amount
+            group[5] += 1
+            group[7] = min(group[7], expense.date)
+            group[8] = max(group[8], expense.date)
+        for group in groups.values():
+            group[6] = group[4] / group[5]
+        return sorted((tuple(group) for group in groups.values()), key=lambda row: row[4], reverse=True)
+
+    query = db.session.query(
+        Category.id,
+        Category.name,
+        Category.color,
+        Category.icon,
+        func.sum(Expense.amount).label('total_amount'),
+        func.count(Expense.id).label('expense_count'),
+        func.avg(Expense.amount).label('average_amount'),
+        func.min(Expense.date).label('first_expense'),
+        func.max(Expense.date).label('last_expense')
+    ).join(Expense).filter(Expense.user_id == data.user_id)
+
+    if start_date:
+        query = query.filter(Expense.date >= start_date)
+
+    return [tuple(row) for row in query.group_by(Category.id).order_by(func.sum(Expense.amount).desc())]
+
+@widget('category-analysis')
+def category_analysis(data, args):
+    period = args.get('period', 'month')  # month, week, year, all
+    results = _category_totals(data, _start_date(data, args))
+
+    # Calculate total for percentages
+    total_spending = sum(row[4] for row in results)
+
+    analysis = []
+    for category_id, name, color, icon, total, count, average, first, last in results:
+        percentage = (total / total_spending * 100) if total_spending > 0 else 0
+
+        analysis.append({
+            'category_id': category_id,
+            'category_name': name,
+            'color': color,
+            'icon': icon,
+            'total_amount': round(total, 2),
+            'expense_count': count,
+            'average_amount': round(average, 2),
+            'percentage': round(percentage, 2),
+            'first_expense': first.isoformat() if first else None,
+            'last_expense': last.isoformat() if last else None
+        })
+
+    return 'Category analysis retrieved successfully', {
+        'analysis': analysis,
+        'total_spending': round(total_spending, 2),
+        'period': period
+    }
+
+@widget('monthly-comparison')
+def monthly_comparison(data, args):
+    months = args.get('months', 6, type=int)
+    comparison_data = ExpenseAnalyzer().get_monthly_comparison(data.user_id, months, source=data)
+
+    # Calculate changes and trends
+    for i, month_data in enumerate(comparison_data):
+        if i > 0:
+            prev_total = comparison_data[i-1]['total']
+            current_total = month_data['total']
+
+            if prev_total > 0:
+                change_percent = ((current_total - prev_total) / prev_total) * 100
+                month_data['change_percent'] = round(change_percent, 2)
+                month_data['change_direction'] = 'up' if change_percent > 0 else 'down' if change_percent < 0 else 'same'
+            else:
+                month_data['change_percent'] = 0
+                month_data['change_direction'] = 'same'
+        else:
+            month_data['change_percent'] = 0
+            month_data['change_direction'] = 'same'
+
+    return 'Monthly comparison retrieved successfully', {'comparison': comparison_data}
+
+@widget('budget-analysis')
+def budget_analysis(data, args):
+    budget_data = ExpenseAnalyzer().get_budget_analysis(data.user_id)
+    return 'Budget analysis retrieved successfully', {'budget_analysis': budget_data}
+
+@widget('insights', window=_six_months)
+def insights(data, args):
+    expense_data = data.expense_dicts(_six_months(data, args))
+    if not expense_data:
+        return 'No expenses found for insights', {'insights': []}
+
+    return 'Spending insights retrieved successfully', {
+        'insights': get_ml_service().get_spending_insights(expense_data)
+    }
+
+@widget('predictions', window=_six_months)
+def predictions(data, args):
+    result = ExpenseAnalyzer().get_expense_predictions(data.user_id, source=data)
+    if not result:
+        return 'Insufficient data for predictions', {
+            'predictions': None,
+            'message': 'Need at least 30 days of expense data for predictions'
+        }
+
+    return 'Spending predictions retrieved successfully', {'predictions': result}
+
+def _merchant_totals(data, start_date, limit):
+    """(merchant, total, count, average, first, last) for the top merchants by spending"""
+    if data.covers(start_date):
+        groups = {}
+        for expense in data.expenses(start_date):
+            if not expense.merchant_name:
+                continue
+            group = groups.get(expense.merchant_name)
+            if group is None:
+                group = groups[expense.merchant_name] = [expense.merchant_name, 0.0, 0, None, expense.date, expense.date]
+            group[1] += expense.amount
+            group[2] += 1
+            group[4] = min(group[4], expense.date)
+            group[5] = max(group[5], expense.date)
+        for group in groups.values():
+            group[3] = group[1] / group[2]
+        return sorted((tuple(group) for group in groups.values()), key=lambda row: row[1], reverse=True)[:limit]
+
+    query = db.session.query(
+        Expense.merchant_name,
+        func.sum(Expense.amount).label('total_amount'),
+        func.count(Expense.id).label('transaction_count'),
+        func.avg(Expense.amount).label('average_amount'),
+        func.min(Expense.date).label('first_transaction'),
+        func.max(Expense.date).label('last_transaction')
+    ).filter(
+        Expense.user_id == data.user_id,
+        Expense.merchant_name.isnot(None),
+        Expense.merchant_name != ''
+    )
+
+    if start_date:
+        query = query.filter(Expense.date >= start_date)
+
+    return [tuple(row) for row in query.group_by(Expense.merchant_name).order_by(
+        func.sum(Expense.amount).desc()
+    ).limit(limit)]
+
+@widget('top-merchants')
+def top_merchants(data, args):
+    period = args.get('period', 'month')
+    # Limit the limit parameter
+    limit = max(1, min(args.get('limit', 10, type=int), 50))
+
+    merchants = []
+    for name, total, count, average, first, last in _merchant_totals(data, _start_date(data, args), limit):
+        merchants.append({
+            'merchant_name': name,
+            'total_amount': round(total, 2),
+            'transaction_count': count,
+            'average_amount': round(average, 2),
+            'first_transaction': first.isoformat() if first else None,
+            'last_transaction': last.isoformat() if last else None
+        })
+
+    return 'Top merchants retrieved successfully', {'merchants': merchants, 'period': period}
+
+def _pattern_key_expressions():
+    """Dialect-correct SQL for an expense's weekday (0=Sunday) and day of month"""
+    if db.session.get_bind().dialect.name == 'sqlite':
+        return func.strftime('%w', Expense.date), func.strftime('%d', Expense.date)
+
+    # PostgreSQL and other dialects with EXTRACT
+    return func.extract('dow', Expense.date), func.extract('day', Expense.date)
+
+def _pattern_totals(data, start_date):
+    """({weekday: [total, count]}, {day_of_month: [total, count]}) with Monday as weekday 0.
+
+    One grouped query returning at most 7 + 31 rows, or the rows already
+    loaded by a bundle.
+    """
+    by_weekday = defaultdict(lambda: [0.0, 0])
+    by_day = defaultdict(lambda: [0.0, 0])
+
+    if data.covers(start_date):
+        for expense in data.expenses(start_date):
+            for totals, key in ((by_weekday, expense.date.weekday()), (by_day, expense.date.day)):
+                totals[key][0] += expense.amount
+                totals[key][1] += 1
+        return by_weekday, by_day
+
+    def grouped(kind, key):
+        query = select(literal(kind), key, func.sum(Expense.amount), func.count(Expense.id)).where(
+            Expense.user_id == data.user_id
+        )
+        if start_date:
+            query = query.where(Expense.date >= start_date)
+        return query.group_by(key)
+
+    weekday, day_of_month = _pattern_key_expressions()
+    for kind, key, total, count in db.session.execute(union_all(grouped('weekday', weekday), grouped('day', day_of_month))):
+        if kind == 'weekday':
+            by_weekday[(int(key) + 6) % 7] = [total, count]
+        else:
+            by_day[int(key)] = [total, count]
+    return by_weekday, by_day
+
+@widget('expense-patterns')
+def expense_patterns(data, args):
+    period = args.get('period', 'month')
+    by_weekday, by_day = _pattern_totals(data, _start_date(data, args))
+
+    if not by_weekday:
+        return 'No expenses found for pattern analysis', {'patterns': {}}
+
+    # Format day of week data
+    dow_data = []
+    for index, day in enumerate(DAY_NAMES):
+        total, count = by_weekday[index]
+        avg = total / count if count > 0 else 0
+
+        dow_data.append({
+            'day': day,
+            'total_amount': round(total, 2),
+            'transaction_count': count,
+            'average_amount': round(avg, 2)
+        })
+
+    # Format daily data (top 10 days by spending, earlier days first on ties)
+    daily_data = []
+    for day in sorted(by_day, key=lambda x: (-by_day[x][0], x))[:10]:
+        total, count = by_day[day]
+        avg = total / count if count > 0 else 0
+
+        daily_data.append({
+            'day_of_month': day,
+            'total_amount': round(total, 2),
+            'transaction_count': count,
+            'average_amount': round(avg, 2)
+        })
+
+    patterns = {
+        'day_of_week': dow_data,
+        'top_spending_days': daily_data,
+        'analysis': {
+            'most_expensive_day': max(dow_data, key=lambda x: x['total_amount'])['day'],
+            'most_active_day': max(dow_data, key=lambda x: x['transaction_count'])['day'],
+            'weekend_vs_weekday': {
+                'weekend_total': round(by_weekday[5][0] + by_weekday[6][0], 2),
+                'weekday_total': round(sum(by_weekday[index][0] for index in range(5)), 2)
+            }
+        }
+    }
+
+    return 'Expense patterns retrieved successfully', {'patterns': patterns, 'period': period}
+
+def compute_widget(name, user_id, args, data=None):
+    """Run one widget; returns ``(message, payload)``"""
+    data = data or DashboardData(user_id)
+    return WIDGETS[name].compute(data, args)
+
+def _prefetch(data, requested):
+    """Load what the requested widgets share; returns ``{name: error}`` for widgets whose fetch failed"""
+    failed = {}
+
+    windows = {}
+    for name, args in requested:
+        window = WIDGETS[name].window(data, args)
+        if window is not False:
+            windows[name] = window
+    if windows:
+        try:
+            data.prefetch(None if None in windows.values() else min(windows.values()))
+        except Exception as e:
+            db.session.rollback()
+            failed.update(dict.fromkeys(windows, e))
+
+    # Longest monthly span first, so shorter ones are served from its tail.
+    # Spans are clamped as spending-trends clamps them; a longer
+    # monthly-comparison computes its own buckets.
+    spans = {}
+    for name, args in requested:
+        if name == 'spending-trends':
+            spans[name] = _trend_months(args)
+        elif name == 'monthly-comparison':
+            months = args.get('months', 6, type=int)
+            if months >= 1:
+                spans[name] = min(months, MAX_TREND_MONTHS)
+    if spans:
+        try:
+            data.monthly_buckets(max(spans.values()))
+        except Exception as e:
+            db.session.rollback()
+            failed.update(dict.fromkeys(spans, e))
+
+    return failed
+
+def compute_bundle(user_id, requested):
+    """Run several widgets over one shared DashboardData.
+
+    ``requested`` is a list of ``(name, args)``. Rows are fetched once for
+    the widest window any of them reads, monthly buckets once for the
+    longest span; each widget reports its own status and timing.
+    """
+    data = DashboardData(user_id)
+    started = time.perf_counter()
+    failed = _prefetch(data, requested)
+    fetch_ms = (time.perf_counter() - started) * 1000
+
+    results = {}
+    for name, args in requested:
+        widget_started = time.perf_counter()
+        try:
+            if name in failed:
+                raise failed[name]
+            message, payload = WIDGETS[name].compute(data, args)
+            result = {'status': 'success', 'message': message, 'data': payload}
+        except Exception as e:
+            logger.error(f"Dashboard widget {name} failed: {e}")
+            result = {'status': 'error', 'message': f'Failed to compute {name}'}
+        result['elapsed_ms'] = round((time.perf_counter() - widget_started) * 1000, 2)
+        results[name] = result
+
+    return {
+        'widgets': results,
+        'fetch_ms': round(fetch_ms, 2),
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+def parse_bundle_args(args):
+    """``(name, args)`` pairs from ``widgets=a,b&period=year&b.limit=5``.
+
+    Plain parameters apply to every widget; ``<widget>.<param>`` overrides
+    one widget's value. Raises ValueError for unknown widget names.
+    """
+    names = [name.strip() for name in args.get('widgets', '').split(',') if name.strip()]
+    if not names:
+        names = list(WIDGETS)
+    unknown = [name for name in names if name not in WIDGETS]
+    if unknown:
+        raise ValueError(f"Unknown widgets: {', '.join(unknown)}")
+
+    shared = {key: value for key, value in args.items() if '.' not in key and key != 'widgets'}
+    requested = []
+    for name in dict.fromkeys(names):
+        params = dict(shared)
+        prefix = f'{name}.'
+        params.update({key[len(prefix):]: value for key, value in args.items() if key.startswith(prefix)})
+        requested.append((name, MultiDict(params)))
+    return requested
@@ -11,6 +11,8 @@ from sqlalchemy import func, extract, and_
 from app.models.expense import Expense
 from app.models.category import Category
 from app.database import db
+from app.services.rollup_service import RollupService
+from app.services.dashboard_data import DashboardData, overview_start
 import logging
 
 class ExpenseAnalyzer:
@@ -19,24 +21,16 @@ class ExpenseAnalyzer:
     def __init__(self):
         self.logger = logging.getLogger(__name__)
 
-    def get_dashboard_data(self, user_id, period='month'):
+    def get_dashboard_data(self, user_id, period='month', source=None):
         """Get comprehensive dashboard data for user"""
         try:
-            current_date = datetime.now()
+            source = source or DashboardData(user_id)
 
             # Define date ranges
-            if period == 'week':
-                start_date = current_date - timedelta(days=7)
-            elif period == 'year':
-                start_date = current_date - timedelta(days=365)
-            else:  # month
-                start_date = current_date.replace(day=1)
+            start_date = overview_start(period, source.now)
 
             # Get expenses for the period
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.date >= start_date.date()
-            ).all()
+            expenses = source.expenses(start_date.date())
 
             if not expenses:
                 return self._empty_dashboard_data()
@@ -48,13 +42,7 @@ class ExpenseAnalyzer:
 
             # Get previous period for comparison
             prev_start = self._get_previous_period_start(start_date, period)
-            prev_expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.date >= prev_start.date(),
-                Expense.date < start_date.date()
-            ).all()
-
-            prev_total = sum(exp.amount for exp in prev_expenses)
+            prev_total = source.total(prev_start.date(), start_date.date())
             spending_change = ((total_amount - prev_total) / prev_total * 100) if prev_total > 0 else 0
 
             # Category breakdown
@@ -257,33 +245,20 @@ class ExpenseAnalyzer:
 
         return insights
 
-    def get_monthly_comparison(self, user_id, months=6):
+    def get_monthly_comparison(self, user_id, months=6, source=None):
         """Get month-over-month spending comparison"""
         try:
-            current_date = datetime.now()
-            results = []
+            buckets = (source or DashboardData(user_id)).monthly_buckets(months)
 
-            for i in range(months):
-                # Calculate month start/end
-                if current_date.month - i <= 0:
-                    year = current_date.year - 1
-                    month = 12 + (current_date.month - i)
-                else:
-                    year = current_date.year
-                    month = current_date.month - i
-
-                # Get monthly total
-                monthly_total = db.session.query(func.sum(Expense.amount)).filter(
-                    Expense.user_id == user_id,
-                    extract('year', Expense.date) == year,
-                    extract('month', Expense.date) == month
-                ).scalar() or 0
+            results = []
+            for bucket in buckets:
+                period_start = bucket['period_start']
 
                 results.append({
-                    'year': year,
-                    'month': month,
-                    'month_name': datetime(year, month, 1).strftime('%B %Y'),
-                    'total': round(monthly_total, 2)
+                    'year': period_start.year,
+                    'month': period_start.month,
+                    'month_name': period_start.strftime('%B %Y'),
+                    'total': round(bucket['total_amount'], 2)
                 })
 
             return sorted(results, key=lambda x: (x['year'], x['month']))
@@ -303,15 +278,15 @@ class ExpenseAnalyzer:
                 Category.monthly_budget_limit.isnot(None)
             ).all()
 
+            # Current month spending for every category in one rollup read
+            category_totals = RollupService().get_category_totals(
+                user_id, start_of_month.year, start_of_month.month
+            )
+
             budget_analysis = []
 
             for category in categories_with_budgets:
-                # Get current month spending for this category
-                current_spending = db.session.query(func.sum(Expense.amount)).filter(
-                    Expense.user_id == user_id,
-                    Expense.category_id == category.id,
-                    Expense.date >= start_of_month
-                ).scalar() or 0
+                current_spending = category_totals.get(category.id, 0)
 
                 budget_used_percent = (current_spending / category.monthly_budget_limit) * 100
                 remaining_budget = category.monthly_budget_limit - current_spending
@@ -337,26 +312,21 @@ class ExpenseAnalyzer:
             self.logger.error(f"Error getting budget analysis: {e}")
             return []
 
-    def get_expense_predictions(self, user_id):
+    def get_expense_predictions(self, user_id, source=None):
         """Get expense predictions based on historical data"""
         try:
-            # Get last 6 months of data
-            six_months_ago = datetime.now() - timedelta(days=180)
+            source = source or DashboardData(user_id)
 
-            expenses = Expense.query.filter(
-                Expense.user_id == user_id,
-                Expense.date >= six_months_ago.date()
-            ).all()
+            # Last 6 months of data, prepared for prediction
+            six_months_ago = source.now - timedelta(days=180)
+            expense_data = source.expense_dicts(six_months_ago.date())
 
-            if len(expenses) < 30:
+            if len(expense_data) < 30:
                 return None
 
-            # Prepare data for prediction
-            expense_data = [exp.to_dict() for exp in expenses]
-
             # Use ML service for predictions
-            from app.services.ml_service import MLService
-            ml_service = MLService()
+            from app.services.model_registry import get_ml_service
+            ml_service = get_ml_service()
 
             predictions = ml_service.predict_future_spending(expense_data)
 
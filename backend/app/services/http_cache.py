@@ -0,0 +1,81 @@
+"""
+Smart Expense Tracker - HTTP Cache
+Conditional GET for per-user reads: ETags from data versions, 304 before any work
+"""
+
+import json
+import hashlib
+import threading
+from datetime import date
+from functools import wraps
+from flask import current_app, request, make_response, g
+from flask_jwt_extended import get_jwt_identity
+from app.models.cache_version import user_data_stamp
+from app.utils.helpers import not_modified_response
+
+class RouteHitCounter:
+    """Per-endpoint counts of conditional reads and of those answered with 304"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def record(self, endpoint, not_modified):
+        with self._lock:
+            counts = self._counts.setdefault(endpoint, [0, 0])
+            counts[0] += 1
+            counts[1] += int(not_modified)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'requests': requests,
+                    'not_modified': not_modified,
+                    'hit_rate': round(not_modified / requests, 4)
+                }
+                for endpoint, (requests, not_modified) in sorted(self._counts.items())
+            }
+
+def user_data_etag(user_id):
+    """Strong ETag for the current request's view of a user's data.
+
+    Covers the endpoint, its query parameters, the user's data and category
+    versions, and today's date for responses with relative date windows.
+    """
+    key = json.dumps([
+        user_id, request.endpoint, sorted(request.args.items(multi=True)),
+        user_data_stamp(user_id), date.today().isoformat()
+    ], separators=(',', ':'))
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def init_http_cache(app):
+    """Attach the hit counters; stamps are re-read at the start of every request"""
+    app.extensions['route_hit_counter'] = RouteHitCounter()
+
+    @app.before_request
+    def _reset_user_data_stamps():
+        g.pop('_user_data_stamps', None)
+
+def get_route_hit_counter():
+    return current_app.extensions['route_hit_counter']
+
+def conditional_read(view):
+    """Answer If-None-Match with 304 before the view runs any query.
+
+    Successful responses carry the ETag. Apply below ``jwt_required``.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = user_data_etag(get_jwt_identity())
+        not_modified = request.if_none_match.contains(etag)
+        get_route_hit_counter().record(request.endpoint, not_modified)
+        if not_modified:
+            return not_modified_response(etag)
+
+        response = make_response(view(*args, **kwargs))
+        if response.status_code == 200:
+            response.set_etag(etag)
+        return response
+
+    return wrapper
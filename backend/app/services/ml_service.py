@@ -17,18 +17,10 @@ import os
 import logging
 from datetime import datetime, timedelta
 import re
-import nltk
-from nltk.corpus import stopwords
-from nltk.tokenize import word_tokenize
-from nltk.stem import WordNetLemmatizer
-
-# Download required NLTK data
-try:
-    nltk.download('punkt', quiet=True)
-    nltk.download('stopwords', quiet=True)
-    nltk.download('wordnet', quiet=True)
-except:
-    pass
+from app.services.text_resources import get_text_resources
+
+MODEL_FILENAME = 'expense_categorizer.joblib'
+CATEGORIES_FILENAME = 'categories.joblib'
 
 class MLService:
     """Machine Learning service for expense categorization and analysis"""
@@ -40,13 +32,8 @@ class MLService:
         self.classifier = None
         self.categories = []
 
-        # Initialize NLTK components
-        try:
-            self.stop_words = set(stopwords.words('english'))
-            self.lemmatizer = WordNetLemmatizer()
-        except:
-            self.stop_words = set()
-            self.lemmatizer = None
+        # NLTK resources are resolved lazily from local data only
+        self.text_resources = get_text_resources()
 
         # Ensure model directory exists
         os.makedirs(model_path, exist_ok=True)
@@ -66,15 +53,15 @@ class MLService:
         text = re.sub(r'[^a-zA-Z\s]', '', text)
 
         # Tokenize
-        tokens = word_tokenize(text) if text else []
+        tokens = self.text_resources.tokenize(text) if text else []
 
         # Remove stopwords and lemmatize
-        if self.lemmatizer and self.stop_words:
-            tokens = [
-                self.lemmatizer.lemmatize(token) 
-                for token in tokens 
-                if token not in self.stop_words and len(token) > 2
-            ]
+        stop_words = self.text_resources.stop_words
+        tokens = [token for token in tokens if token not in stop_words and len(token) > 2]
+
+        lemmatizer = self.text_resources.lemmatizer
+        if lemmatizer:
+            tokens = [lemmatizer.lemmatize(token) for token in tokens]
 
         return ' '.join(tokens)
 
@@ -159,22 +146,48 @@ class MLService:
 
     def predict_category(self, description, merchant_name=None, amount=None):
         """Predict category for an expense"""
+        return self.predict_categories([{
+            'description': description,
+            'merchant_name': merchant_name,
+            'amount': amount
+        }])[0]
+
+    def predict_categories(self, items):
+        """Predict categories for a batch of expenses.
+
+        ``items`` are dicts with ``description``, ``merchant_name`` and
+        ``amount``. The batch is vectorized and scored with a single
+        ``predict_proba`` call; labels are the argmax of those scores.
+        Returns a list of ``(category_name, confidence)`` in input order.
+        """
+        if not items:
+            return []
+
         if not self.classifier:
-            return self._get_rule_based_category(description, merchant_name), 0.5
+            return [
+                (self._get_rule_based_category(item.get('description') or '', item.get('merchant_name')), 0.5)
+                for item in items
+            ]
 
         try:
-            feature_text = self.create_features(description, merchant_name, amount)
+            feature_texts = [
+                self.create_features(item.get('description'), item.get('merchant_name'), item.get('amount'))
+                for item in items
+            ]
 
-            # Get prediction and probability
-            predicted_category = self.classifier.predict([feature_text])[0]
-            probabilities = self.classifier.predict_proba([feature_text])[0]
-            confidence = max(probabilities)
+            probabilities = self.classifier.predict_proba(feature_texts)
+            best = probabilities.argmax(axis=1)
+            labels = self.classifier.classes_[best]
+            confidences = probabilities[np.arange(len(items)), best]
 
-            return predicted_category, confidence
+            return [(str(label), float(confidence)) for label, confidence in zip(labels, confidences)]
 
         except Exception as e:
-            self.logger.error(f"Error predicting category: {e}")
-            return self._get_rule_based_category(description, merchant_name), 0.3
+            self.logger.error(f"Error predicting categories: {e}")
+            return [
+                (self._get_rule_based_category(item.get('description') or '', item.get('merchant_name')), 0.3)
+                for item in items
+            ]
 
     def _get_rule_based_category(self, description, merchant_name=None):
         """Fallback rule-based categorization"""
@@ -312,22 +325,27 @@ class MLService:
         """Save trained model to disk"""
         try:
             if self.classifier:
-                model_file = os.path.join(self.model_path, 'expense_categorizer.joblib')
-                categories_file = os.path.join(self.model_path, 'categories.joblib')
-
-                joblib.dump(self.classifier, model_file)
-                joblib.dump(self.categories, categories_file)
+                # Write the categories first and replace the model last so a
+                # worker polling the model file never loads a half-written pipeline
+                self._dump_atomic(self.categories, CATEGORIES_FILENAME)
+                self._dump_atomic(self.classifier, MODEL_FILENAME)
 
                 self.logger.info("Model saved successfully")
 
         except Exception as e:
             self.logger.error(f"Error saving model: {e}")
 
+    def _dump_atomic(self, value, filename):
+        target = os.path.join(self.model_path, filename)
+        temp_file = f"{target}.{os.getpid()}.tmp"
+        joblib.dump(value, temp_file)
+        os.replace(temp_file, target)
+
     def load_model(self):
         """Load trained model from disk"""
         try:
-            model_file = os.path.join(self.model_path, 'expense_categorizer.joblib')
-            categories_file = os.path.join(self.model_path, 'categories.joblib')
+            model_file = os.path.join(self.model_path, MODEL_FILENAME)
+            categories_file = os.path.join(self.model_path, CATEGORIES_FILENAME)
 
             if os.path.exists(model_file) and os.path.exists(categories_file):
                 self.classifier = joblib.load(model_file)
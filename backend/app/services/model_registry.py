@@ -0,0 +1,78 @@
+"""
+Smart Expense Tracker - Model Registry
+Keeps one loaded ML service per worker and hot-swaps it after retraining
+"""
+
+import os
+import time
+import logging
+import threading
+from flask import current_app
+from app.services.ml_service import MLService, MODEL_FILENAME, CATEGORIES_FILENAME
+
+DEFAULT_MODEL_PATH = 'ml_models/trained_models/'
+
+class ModelRegistry:
+    """Serves a shared MLService whose pipeline is unpickled once per worker.
+
+    The model files are stat()ed at most every ``check_interval`` seconds; when
+    their mtime or size changed a fresh service is loaded off to the side and
+    swapped in with a single reference assignment, so in-flight requests keep
+    using the service they already hold.
+    """
+
+    def __init__(self, model_path=DEFAULT_MODEL_PATH, check_interval=2.0):
+        self.model_path = model_path
+        self.check_interval = check_interval
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._service = None
+        self._signature = None
+        self._checked_at = 0.0
+
+    def _file_signature(self):
+        signature = []
+        for filename in (MODEL_FILENAME, CATEGORIES_FILENAME):
+            try:
+                stat = os.stat(os.path.join(self.model_path, filename))
+            except OSError:
+                return None
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def get_service(self):
+        """Return the current service, reloading it if the model file changed"""
+        service = self._service
+        now = time.monotonic()
+        if service is not None and now - self._checked_at < self.check_interval:
+            return service
+
+        signature = self._file_signature()
+        if service is not None and signature == self._signature:
+            self._checked_at = now
+            return service
+
+        with self._lock:
+            if self._service is None or self._signature != signature:
+                self._service = MLService(self.model_path)
+                self._signature = signature
+                self.logger.info(f"Loaded ML model from {self.model_path} (signature {signature})")
+            self._checked_at = now
+            return self._service
+
+    def reload(self):
+        """Force a reload on the next access"""
+        with self._lock:
+            self._service = None
+            self._signature = None
+
+def init_model_registry(app):
+    """Attach a model registry to the app; one instance per worker process"""
+    app.extensions['model_registry'] = ModelRegistry(
+        app.config.get('MODEL_PATH', DEFAULT_MODEL_PATH),
+        app.config.get('MODEL_CHECK_INTERVAL', 2.0)
+    )
+
+def get_ml_service():
+    """Return the shared MLService of the current app"""
+    return current_app.extensions['model_registry'].get_service()
@@ -0,0 +1,188 @@
+"""
+Smart Expense Tracker - OCR Result Cache
+Persistent cache of extracted receipt data keyed by image content hash
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from sqlalchemy import select, update, delete, insert, func
+from app.database import db
+from app.models.ocr_cache import OcrCacheEntry
+
+def file_sha256(file_path, chunk_size=1024 * 1024):
+    """Hex SHA-256 of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class OcrResultCache:
+    """OCR results stored in the database, evicted least-recently-used first.
+
+    Entries are keyed by (content hash, OCR fingerprint), so a new tesseract
+    build or pipeline version never serves stale text. Writes go through the
+    caller's session and are committed with the surrounding job update.
+    Hit/miss counters are per worker process.
+
+    A hit only writes ``last_accessed_at`` (and the hits counted since)
+    once the stored timestamp is ``touch_interval`` seconds old. Puts keep
+    a running size estimate and only sum the table when it passes
+    ``max_bytes`` or every ``RESYNC_PUTS`` puts, which picks up other
+    workers' writes.
+    """
+
+    RESYNC_PUTS = 100
+    EVICT_BATCH = 100
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, fingerprint=None, touch_interval=60):
+        self.max_bytes = max_bytes
+        self.touch_interval = timedelta(seconds=touch_interval)
+        self.logger = logging.getLogger(__name__)
+        self._fingerprint = fingerprint
+        self._lock = threading.Lock()
+        self._pending_hits = {}
+        self._approx_bytes = None
+        self._puts = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            from app.services.ocr_service import ocr_fingerprint
+            self._fingerprint = ocr_fingerprint()
+        return self._fingerprint
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, content_hash):
+        """Cached extracted data for ``content_hash``, or None"""
+        table = OcrCacheEntry.__table__
+        key = (table.c.content_hash == content_hash) & (table.c.fingerprint == self.fingerprint)
+
+        row = db.session.execute(
+            select(table.c.id, table.c.result, table.c.last_accessed_at).where(key)
+        ).first()
+        if row is None:
+            self._count(False)
+            return None
+
+        now = datetime.utcnow()
+        with self._lock:
+            pending = self._pending_hits.pop(row.id, 0) + 1
+            touch = now - row.last_accessed_at >= self.touch_interval
+            if not touch:
+                self._pending_hits[row.id] = pending
+        if touch:
+            db.session.execute(
+                update(table).where(table.c.id == row.id)
+                .values(hit_count=table.c.hit_count + pending, last_accessed_at=now)
+            )
+        self._count(True)
+        return json.loads(row.result)
+
+    def put(self, content_hash, extracted_data):
+        """Store extracted data, then evict the oldest entries past ``max_bytes``"""
+        table = OcrCacheEntry.__table__
+        payload = json.dumps(extracted_data)
+        now = datetime.utcnow()
+        values = {
+            'content_hash': content_hash,
+            'fingerprint': self.fingerprint,
+            'result': payload,
+            'size': len(payload.encode('utf-8')),
+            'hit_count': 0,
+            'created_at': now,
+            'last_accessed_at': now
+        }
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            result = db.session.execute(dialect_insert(table).values(**values).on_conflict_do_nothing(
+                index_elements=['content_hash', 'fingerprint']
+            ))
+            inserted = result.rowcount == 1
+        else:
+            exists = db.session.execute(select(table.c.id).where(
+                (table.c.content_hash == content_hash) & (table.c.fingerprint == self.fingerprint)
+            )).first()
+            inserted = exists is None
+            if inserted:
+                db.session.execute(insert(table).values(**values))
+
+        if self._over_budget(values['size'] if inserted else 0):
+            self.evict()
+
+    def _over_budget(self, added):
+        # True when the table should be summed: the estimate passed
+        # max_bytes, there is no estimate yet, or it is due for a resync
+        with self._lock:
+            self._puts += 1
+            if self._approx_bytes is None or self._puts % self.RESYNC_PUTS == 0:
+                return True
+            self._approx_bytes += added
+            return self._approx_bytes > self.max_bytes
+
+    def evict(self):
+        """Delete least recently used entries until the cache fits ``max_bytes``"""
+        table = OcrCacheEntry.__table__
+        total = db.session.execute(select(func.coalesce(func.sum(table.c.size), 0))).scalar()
+
+        evicted = []
+        while total > self.max_bytes:
+            rows = db.session.execute(
+                select(table.c.id, table.c.size)
+                .order_by(table.c.last_accessed_at, table.c.id).limit(self.EVICT_BATCH)
+            ).all()
+            if not rows:
+                break
+            victims = []
+            for row in rows:
+                if total <= self.max_bytes:
+                    break
+                victims.append(row.id)
+                total -= row.size
+            db.session.execute(delete(table).where(table.c.id.in_(victims)))
+            evicted.extend(victims)
+
+        with self._lock:
+            self._approx_bytes = total
+            for entry_id in evicted:
+                self._pending_hits.pop(entry_id, None)
+        if evicted:
+            self.logger.info(f"Evicted {len(evicted)} OCR cache entries")
+        return len(evicted)
+
+    def stats(self):
+        """Counters for this worker plus the size of the shared store"""
+        table = OcrCacheEntry.__table__
+        entries, size, lifetime_hits = db.session.execute(select(
+            func.count(table.c.id),
+            func.coalesce(func.sum(table.c.size), 0),
+            func.coalesce(func.sum(table.c.hit_count), 0)
+        )).one()
+        lookups = self.hits + self.misses
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+            'lifetime_hits': lifetime_hits,
+            'fingerprint': self.fingerprint
+        }
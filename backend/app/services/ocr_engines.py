@@ -0,0 +1,231 @@
+"""
+Smart Expense Tracker - OCR Engines
+Tesseract backends used by OCRService: libtesseract through ctypes or pytesseract
+"""
+
+import os
+import shlex
+import atexit
+import ctypes
+import ctypes.util
+import logging
+import threading
+import numpy as np
+
+TSV_COLUMNS = ('level', 'page_num', 'block_num', 'par_num', 'line_num', 'word_num',
+               'left', 'top', 'width', 'height', 'conf', 'text')
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def parse_tesseract_config(config):
+    """Split a tesseract command line config into ``(oem, psm, variables)``"""
+    oem, psm, variables = 3, 3, {}
+    args = shlex.split(config or '')
+    index = 0
+    while index < len(args):
+        arg = args[index]
+        if arg == '--oem':
+            index += 1
+            oem = int(args[index])
+        elif arg == '--psm':
+            index += 1
+            psm = int(args[index])
+        elif arg == '-c':
+            index += 1
+            name, _, value = args[index].partition('=')
+            variables[name] = value
+        index += 1
+    return oem, psm, variables
+
+def parse_tsv(tsv):
+    """Tesseract TSV output as the column dict pytesseract's image_to_data returns"""
+    data = {column: [] for column in TSV_COLUMNS}
+    for row in tsv.splitlines():
+        fields = row.split('\t')
+        if len(fields) < len(TSV_COLUMNS) - 1 or fields[0] == 'level':
+            continue
+        fields += [''] * (len(TSV_COLUMNS) - len(fields))
+        for column, value in zip(TSV_COLUMNS, fields):
+            if column == 'text':
+                data[column].append(value)
+            elif column == 'conf':
+                data[column].append(float(value))
+            else:
+                data[column].append(int(value))
+    return data
+
+class PytesseractEngine:
+    """Runs the tesseract CLI once per image through pytesseract"""
+
+    name = 'pytesseract'
+
+    def __init__(self):
+        import pytesseract
+        self._pytesseract = pytesseract
+
+        # Configure Tesseract path if needed
+        tesseract_cmd = os.environ.get('TESSERACT_CMD')
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    def version(self):
+        return str(self._pytesseract.get_tesseract_version())
+
+    def image_to_string(self, image, config=''):
+        return self._pytesseract.image_to_string(image, config=config)
+
+    def image_to_data(self, image, config=''):
+        return self._pytesseract.image_to_data(image, config=config, output_type=self._pytesseract.Output.DICT)
+
+class TessAPIEngine:
+    """Calls libtesseract's C API in-process through ctypes.
+
+    Each thread keeps its own initialized TessBaseAPI handle per engine mode
+    and variable set, so the language model is loaded once per worker
+    process instead of once per image.
+    """
+
+    name = 'tesseract-api'
+
+    def __init__(self, library_path=None, language='eng', datapath=None):
+        library_path = library_path or os.environ.get('TESSERACT_LIBRARY') or ctypes.util.find_library('tesseract')
+        if not library_path:
+            raise OSError('libtesseract not found')
+
+        self.language = language
+        self.datapath = datapath or os.environ.get('TESSDATA_PREFIX')
+        self.logger = logging.getLogger(__name__)
+        self._lib = self._bind(ctypes.CDLL(library_path))
+        self._local = threading.local()
+        self._handles = []
+        self._handles_lock = threading.Lock()
+        self._check_language()
+        atexit.register(self.close)
+
+    @staticmethod
+    def _bind(lib):
+        handle = ctypes.c_void_p
+        lib.TessVersion.restype = ctypes.c_char_p
+        lib.TessBaseAPICreate.restype = handle
+        lib.TessBaseAPIInit2.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int]
+        lib.TessBaseAPIInit2.restype = ctypes.c_int
+        lib.TessBaseAPISetVariable.argtypes = [handle, ctypes.c_char_p, ctypes.c_char_p]
+        lib.TessBaseAPISetVariable.restype = ctypes.c_int
+        lib.TessBaseAPISetPageSegMode.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPISetImage.argtypes = [handle, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.TessBaseAPIRecognize.argtypes = [handle, ctypes.c_void_p]
+        lib.TessBaseAPIRecognize.restype = ctypes.c_int
+        # Returned strings are owned by tesseract and released with TessDeleteText
+        lib.TessBaseAPIGetUTF8Text.argtypes = [handle]
+        lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+        lib.TessBaseAPIGetTsvText.argtypes = [handle, ctypes.c_int]
+        lib.TessBaseAPIGetTsvText.restype = ctypes.c_void_p
+        lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+        lib.TessBaseAPIClear.argtypes = [handle]
+        lib.TessBaseAPIEnd.argtypes = [handle]
+        lib.TessBaseAPIDelete.argtypes = [handle]
+        return lib
+
+    def version(self):
+        return self._lib.TessVersion().decode('utf-8')
+
+    def _check_language(self):
+        """Fail at construction, not on the first image, when traineddata is missing"""
+        api = self._lib.TessBaseAPICreate()
+        try:
+            datapath = self.datapath.encode('utf-8') if self.datapath else None
+            if self._lib.TessBaseAPIInit2(api, datapath, self.language.encode('utf-8'), 3) != 0:
+                raise RuntimeError(f"Could not initialize tesseract for language '{self.language}'")
+        finally:
+            self._lib.TessBaseAPIEnd(api)
+            self._lib.TessBaseAPIDelete(api)
+
+    def _handle(self, oem, variables):
+        key = (oem, tuple(sorted(variables.items())))
+        handles = getattr(self._local, 'handles', None)
+        if handles is None:
+            handles = self._local.handles = {}
+        if key in handles:
+            return handles[key]
+
+        api = self._lib.TessBaseAPICreate()
+        datapath = self.datapath.encode('utf-8') if self.datapath else None
+        if self._lib.TessBaseAPIInit2(api, datapath, self.language.encode('utf-8'), oem) != 0:
+            self._lib.TessBaseAPIDelete(api)
+            raise RuntimeError(f"Could not initialize tesseract for language '{self.language}'")
+        for name, value in variables.items():
+            self._lib.TessBaseAPISetVariable(api, name.encode('utf-8'), value.encode('utf-8'))
+
+        handles[key] = api
+        with self._handles_lock:
+            self._handles.append(api)
+        return api
+
+    def _recognize(self, image, config):
+        oem, psm, variables = parse_tesseract_config(config)
+        api = self._handle(oem, variables)
+
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        channels = 1 if image.ndim == 2 else image.shape[2]
+        self._lib.TessBaseAPISetPageSegMode(api, psm)
+        self._lib.TessBaseAPISetImage(api, image.ctypes.data, width, height, channels, image.strides[0])
+        if self._lib.TessBaseAPIRecognize(api, None) != 0:
+            self._lib.TessBaseAPIClear(api)
+            raise RuntimeError('tesseract recognition failed')
+        return api
+
+    def _take_text(self, api, pointer):
+        try:
+            return ctypes.string_at(pointer).decode('utf-8') if pointer else ''
+        finally:
+            if pointer:
+                self._lib.TessDeleteText(pointer)
+            self._lib.TessBaseAPIClear(api)
+
+    def image_to_string(self, image, config=''):
+        api = self._recognize(image, config)
+        return self._take_text(api, self._lib.TessBaseAPIGetUTF8Text(api))
+
+    def image_to_data(self, image, config=''):
+        api = self._recognize(image, config)
+        return parse_tsv(self._take_text(api, self._lib.TessBaseAPIGetTsvText(api, 0)))
+
+    def close(self):
+        with self._handles_lock:
+            handles, self._handles = self._handles, []
+        for api in handles:
+            self._lib.TessBaseAPIEnd(api)
+            self._lib.TessBaseAPIDelete(api)
+
+ENGINES = {
+    TessAPIEngine.name: TessAPIEngine,
+    PytesseractEngine.name: PytesseractEngine,
+}
+
+def create_ocr_engine(name=None):
+    """Build the engine named by ``name`` or OCR_ENGINE.
+
+    Defaults to ``pytesseract``. ``auto`` opts in to the in-process C API and
+    falls back to pytesseract when libtesseract cannot be loaded; check
+    ``benchmarks/bench_ocr_engines.py`` on the target host before enabling it.
+    """
+    name = name or os.environ.get('OCR_ENGINE', PytesseractEngine.name)
+    if name != 'auto':
+        return ENGINES[name]()
+
+    try:
+        return TessAPIEngine()
+    except (OSError, AttributeError, RuntimeError) as e:
+        logging.getLogger(__name__).info(f"libtesseract unavailable ({e}), using pytesseract")
+        return PytesseractEngine()
+
+def get_ocr_engine():
+    """The engine shared by this process, created on first use"""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_ocr_engine()
+    return _engine
@@ -0,0 +1,491 @@
+"""
+Smart Expense Tracker - OCR Job Queue
+Database-backed OCR queue executed by a bounded process pool
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+import multiprocessing
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from flask import current_app
+from sqlalchemy import update, func
+from app.database import db
+from app.models.ocr_job import OcrJob
+from app.models.receipt_upload import ReceiptUpload
+from app.services.ocr_cache import OcrResultCache, file_sha256
+from app.services.receipt_storage import get_receipt_storage
+from app.services.receipt_uploads import mark_ocr_status
+
+RAW_TEXT_PREVIEW = 500
+
+def run_ocr(file_path):
+    """Extract receipt data in a pool process; returns JSON-safe values"""
+    from app.services.ocr_service import OCRService
+
+    extracted_data = OCRService().extract_receipt_data(file_path)
+    for fields in [extracted_data] + extracted_data.get('pages', []):
+        if fields.get('date'):
+            fields['date'] = fields['date'].isoformat()
+    return extracted_data
+
+def timed_ocr(file_path):
+    """run_ocr plus the wall time spent in the pool process"""
+    started = time.perf_counter()
+    extracted_data = run_ocr(file_path)
+    return extracted_data, time.perf_counter() - started
+
+def available_cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def default_bulk_workers(web_workers=1):
+    """Bulk pool size that keeps every web worker's pool together within the host's cores"""
+    return max(1, available_cpus() // max(1, web_workers))
+
+def build_receipt_result(job, extracted_data):
+    """Response payload for a processed receipt, with an AI category suggestion"""
+    from app.services.model_registry import get_ml_service
+    from app.services.category_registry import get_category_registry
+
+    suggested_category = None
+    confidence_score = 0.0
+
+    if current_app.config.get('ENABLE_AI_CATEGORIZATION', True):
+        category_name, confidence_score = get_ml_service().predict_category(
+            extracted_data.get('raw_text', ''),
+            extracted_data.get('merchant_name', ''),
+            extracted_data.get('total_amount', 0)
+        )
+        suggested_category = get_category_registry().get_by_name(category_name)
+
+    raw_text = extracted_data.get('raw_text', '')
+    if job.kind == 'upload' and len(raw_text) > RAW_TEXT_PREVIEW:
+        raw_text = raw_text[:RAW_TEXT_PREVIEW] + '...'
+
+    receipt_fields = {
+        'merchant_name': extracted_data.get('merchant_name'),
+        'total_amount': extracted_data.get('total_amount'),
+        'date': extracted_data.get('date'),
+        'tax_amount': extracted_data.get('tax_amount', 0),
+        'items': extracted_data.get('items', []),
+        'confidence_score': extracted_data.get('confidence_score', 0),
+        'raw_text': raw_text
+    }
+    if 'pages' in extracted_data:  # multi-page PDFs
+        receipt_fields['pages'] = extracted_data['pages']
+
+    return {
+        'file_id': job.file_id,
+        'filename': job.filename,
+        'file_path': job.file_path,
+        'extracted_data': receipt_fields,
+        'suggested_category': suggested_category.to_dict() if suggested_category else None,
+        'ai_confidence': round(confidence_score, 2)
+    }
+
+class OcrJobQueue:
+    """Runs OCR jobs outside the request/response cycle.
+
+    ``OCR_JOB_MODE`` selects the executor:
+
+    * ``pool`` - the web worker hands jobs to its own bounded process pool
+      and records results from the completion callback. A background thread
+      requeues jobs lost with a dead worker and dispatches queued ones.
+    * ``external`` - jobs stay queued for ``flask ocr-jobs work``, a separate
+      worker process with its own pool.
+    * ``inline`` - jobs run synchronously during enqueue (tests, debugging).
+
+    State transitions are compare-and-set UPDATEs on ``ocr_jobs.status`` so a
+    job is only ever claimed by one executor, and a run only records its
+    outcome while its claim (``attempts``) is still the current one. A job
+    claimed ``OCR_MAX_ATTEMPTS`` times without finishing is failed. Files whose content hash is in
+    the OCR result cache complete at enqueue time without running tesseract.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger(__name__)
+        self.mode = app.config.get('OCR_JOB_MODE', 'pool')
+        self.max_workers = app.config.get('OCR_POOL_WORKERS', 2)
+        self.max_pending = app.config.get('OCR_MAX_PENDING_JOBS', 100)
+        self.job_timeout = app.config.get('OCR_JOB_TIMEOUT', 300)
+        self.max_attempts = app.config.get('OCR_MAX_ATTEMPTS', 3)
+        self.recovery_interval = app.config.get('OCR_RECOVERY_INTERVAL', 30)
+        self.bulk_workers = app.config.get('BULK_OCR_WORKERS') or \
+            default_bulk_workers(app.config.get('WEB_CONCURRENCY', 1))
+        self.cache = OcrResultCache(
+            app.config.get('OCR_CACHE_MAX_BYTES', 64 * 1024 * 1024),
+            touch_interval=app.config.get('OCR_CACHE_TOUCH_INTERVAL', 60)
+        ) if app.config.get('OCR_CACHE_ENABLED', True) else None
+        self._executors = {}
+        self._in_flight = set()  # job ids this process is running
+        self._recovery_pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self, name='jobs'):
+        # Created lazily so each forked web worker owns its pools, and
+        # replaced once a dead child process has broken the pool
+        max_workers = self.bulk_workers if name == 'bulk' else self.max_workers
+        with self._lock:
+            executor, pid = self._executors.get(name, (None, None))
+            if executor is None or pid != os.getpid() or getattr(executor, '_broken', False):
+                if executor is not None and pid == os.getpid():
+                    self.logger.warning(f"Replacing broken OCR process pool '{name}'")
+                    executor.shutdown(wait=False, cancel_futures=True)
+                executor = ProcessPoolExecutor(
+                    max_workers=max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+                self._executors[name] = (executor, os.getpid())
+            return executor
+
+    def _submit_to_pool(self, name, fn, *args):
+        """Submit to the named pool, replacing it once if it turns out broken"""
+        try:
+            return self._get_executor(name).submit(fn, *args)
+        except BrokenProcessPool:
+            return self._get_executor(name).submit(fn, *args)
+
+    def _start_recovery(self):
+        # One daemon thread per web worker process, started on first use
+        if self.mode != 'pool' or self._recovery_pid == os.getpid():
+            return
+        with self._lock:
+            if self._recovery_pid == os.getpid():
+                return
+            self._recovery_pid = os.getpid()
+        threading.Thread(target=self._recovery_loop, name='ocr-job-recovery', daemon=True).start()
+
+    def _recovery_loop(self):
+        while True:
+            time.sleep(self.recovery_interval)
+            with self.app.app_context():
+                try:
+                    self.recover()
+                except Exception as e:
+                    db.session.rollback()
+                    self.logger.error(f"OCR job recovery failed: {e}")
+                finally:
+                    db.session.remove()
+
+    def recover(self):
+        """Requeue stale jobs, then dispatch queued ones while this worker's pool has room"""
+        self.requeue_stale()
+        while True:
+            with self._lock:
+                if len(self._in_flight) >= self.max_workers:
+                    return
+            job_id, attempt = self._claim_next()
+            if job_id is None:
+                return
+            self._dispatch(job_id, attempt)
+
+    def is_full(self):
+        """Whether the number of unfinished jobs reached OCR_MAX_PENDING_JOBS"""
+        self._start_recovery()
+        pending = db.session.query(func.count(OcrJob.id)).filter(
+            OcrJob.status.in_(OcrJob.PENDING_STATUSES)
+        ).scalar()
+        return pending >= self.max_pending
+
+    def enqueue(self, user_id, file_id, filename, file_path, kind='upload', content_hash=None):
+        """Persist a job and dispatch it according to the configured mode"""
+        job = OcrJob(user_id, file_id, filename, file_path, kind)
+        job.content_hash = content_hash or file_sha256(get_receipt_storage().local_path(file_path))
+        db.session.add(job)
+        db.session.commit()
+
+        if self._complete_from_cache(job.id):
+            return job
+
+        if self.mode == 'inline':
+            self.process(job.id)
+        elif self.mode == 'pool':
+            self._start_recovery()
+            self._submit(job.id)
+
+        return job
+
+    def claim(self, job_id):
+        """Move a queued job to processing.
+
+        Returns the attempt number of this claim, which the run passes back
+        when recording its outcome; False if another executor won.
+        """
+        result = db.session.execute(
+            update(OcrJob)
+            .where(OcrJob.id == job_id, OcrJob.status == OcrJob.STATUS_QUEUED)
+            .values(status=OcrJob.STATUS_PROCESSING, attempts=OcrJob.attempts + 1,
+                    started_at=datetime.utcnow())
+        )
+        attempt = None
+        if result.rowcount == 1:
+            # Read inside the claiming transaction, before anyone can requeue it
+            attempt = db.session.query(OcrJob.attempts).filter(OcrJob.id == job_id).scalar()
+        db.session.commit()
+        return attempt or False
+
+    def claim_next(self):
+        """Claim the oldest queued job, returning its id or None"""
+        return self._claim_next()[0]
+
+    def _claim_next(self):
+        while True:
+            job_id = db.session.query(OcrJob.id).filter(
+                OcrJob.status == OcrJob.STATUS_QUEUED
+            ).order_by(OcrJob.id).limit(1).scalar()
+            if job_id is None:
+                return None, None
+            attempt = self.claim(job_id)
+            if attempt:
+                return job_id, attempt
+
+    def _complete_from_cache(self, job_id):
+        job = db.session.get(OcrJob, job_id)
+        if self.cache is None or not job.content_hash:
+            return False
+
+        extracted_data = self.cache.get(job.content_hash)
+        attempt = self.claim(job_id) if extracted_data is not None else False
+        if not attempt:
+            db.session.commit()
+            return False
+
+        self.complete(job_id, extracted_data, attempt, store=False)
+        return True
+
+    def _settle(self, job, attempt, **values):
+        """Move ``job`` out of processing if ``attempt`` is still its current claim.
+
+        A run that outlived OCR_JOB_TIMEOUT may have been requeued and claimed
+        again; its late outcome must not overwrite the newer claim's.
+        """
+        result = db.session.execute(
+            update(OcrJob)
+            .where(OcrJob.id == job.id, OcrJob.status == OcrJob.STATUS_PROCESSING,
+                   OcrJob.attempts == attempt)
+            .values(**values)
+        )
+        if result.rowcount == 1:
+            return True
+        db.session.commit()
+        self.logger.warning(f"OCR job {job.job_id} attempt {attempt} was superseded; outcome discarded")
+        return False
+
+    def complete(self, job_id, extracted_data, attempt, store=True):
+        job = db.session.get(OcrJob, job_id)
+        if store and self.cache is not None and job.content_hash:
+            self.cache.put(job.content_hash, extracted_data)
+        result = json.dumps(build_receipt_result(job, extracted_data))
+        if not self._settle(job, attempt, status=OcrJob.STATUS_COMPLETED, result=result,
+                            error=None, finished_at=datetime.utcnow()):
+            return
+        mark_ocr_status(job.file_id, ReceiptUpload.OCR_COMPLETED, extracted_data.get('ocr_pass'))
+        db.session.commit()
+
+    def fail(self, job_id, error, attempt):
+        job = db.session.get(OcrJob, job_id)
+        if not self._settle(job, attempt, status=OcrJob.STATUS_FAILED, error=str(error),
+                            finished_at=datetime.utcnow()):
+            return
+        mark_ocr_status(job.file_id, ReceiptUpload.OCR_FAILED)
+        db.session.commit()
+        self.logger.error(f"OCR job {job.job_id} failed: {error}")
+
+    def release(self, job_id, error, attempt):
+        """Requeue a job whose pool process died, or fail it after OCR_MAX_ATTEMPTS"""
+        if attempt >= self.max_attempts:
+            self.fail(job_id, f'Gave up after {self.max_attempts} attempts: {error}', attempt)
+            return
+        job = db.session.get(OcrJob, job_id)
+        if not self._settle(job, attempt, status=OcrJob.STATUS_QUEUED):
+            return
+        db.session.commit()
+        self.logger.warning(f"OCR job {job.job_id} requeued after its pool process died: {error}")
+
+    def _absolute_path(self, job_id):
+        job = db.session.get(OcrJob, job_id)
+        return get_receipt_storage().local_path(job.file_path)
+
+    def process(self, job_id):
+        """Claim and run a job in the current process"""
+        attempt = self.claim(job_id)
+        if not attempt:
+            return
+        try:
+            self.complete(job_id, run_ocr(self._absolute_path(job_id)), attempt)
+        except Exception as e:
+            db.session.rollback()
+            self.fail(job_id, e, attempt)
+
+    def _submit(self, job_id):
+        attempt = self.claim(job_id)
+        if attempt:
+            self._dispatch(job_id, attempt)
+
+    def _dispatch(self, job_id, attempt):
+        # The job is already claimed by this worker
+        with self._lock:
+            self._in_flight.add(job_id)
+        try:
+            future = self._submit_to_pool('jobs', run_ocr, self._absolute_path(job_id))
+        except Exception as e:
+            with self._lock:
+                self._in_flight.discard(job_id)
+            self.fail(job_id, e, attempt)
+            return
+        future.add_done_callback(lambda done: self._record(job_id, attempt, done))
+
+    def _record(self, job_id, attempt, future):
+        # Runs on the pool's management thread, outside any request
+        with self.app.app_context():
+            try:
+                self.complete(job_id, future.result(), attempt)
+            except BrokenProcessPool as e:
+                db.session.rollback()
+                self.release(job_id, e, attempt)
+            except Exception as e:
+                db.session.rollback()
+                self.fail(job_id, e, attempt)
+            finally:
+                db.session.remove()
+                with self._lock:
+                    self._in_flight.discard(job_id)
+
+    def extract_many(self, file_paths, hashes=None):
+        """OCR several files at once across the bulk pool.
+
+        Returns ``(extracted_data, seconds, error, cache_hit)`` per path, in
+        input order. Cached files are not sent to the pool.
+        """
+        outcomes = [None] * len(file_paths)
+        if self.cache is None:
+            hashes = [None] * len(file_paths)
+        elif hashes is None:
+            hashes = [file_sha256(file_path) for file_path in file_paths]
+
+        pending = []
+        for index, content_hash in enumerate(hashes):
+            extracted_data = self.cache.get(content_hash) if content_hash else None
+            if extracted_data is not None:
+                outcomes[index] = (extracted_data, 0.0, None, True)
+            else:
+                pending.append(index)
+
+        if self.mode == 'inline':
+            for index in pending:
+                try:
+                    outcomes[index] = timed_ocr(file_paths[index]) + (None, False)
+                except Exception as e:
+                    outcomes[index] = (None, 0.0, e, False)
+        else:
+            # A crashed child breaks the whole pool and fails its siblings'
+            # futures too; those files get one more try on a fresh pool
+            retry = self._run_bulk(file_paths, pending, outcomes)
+            if retry:
+                self._run_bulk(file_paths, retry, outcomes)
+
+        for index in pending:
+            extracted_data, _, error, _ = outcomes[index]
+            if error is None and hashes[index]:
+                self.cache.put(hashes[index], extracted_data)
+        db.session.commit()
+
+        return outcomes
+
+    def _run_bulk(self, file_paths, indexes, outcomes):
+        """OCR ``indexes`` on the bulk pool; returns those lost to a broken pool"""
+        broken = []
+        futures = []
+        for index in indexes:
+            try:
+                futures.append((index, self._submit_to_pool('bulk', timed_ocr, file_paths[index])))
+            except Exception as e:
+                outcomes[index] = (None, 0.0, e, False)
+        for index, future in futures:
+            try:
+                outcomes[index] = future.result() + (None, False)
+            except BrokenProcessPool as e:
+                outcomes[index] = (None, 0.0, e, False)
+                broken.append(index)
+            except Exception as e:
+                outcomes[index] = (None, 0.0, e, False)
+        return broken
+
+    def requeue_stale(self):
+        """Return jobs stuck in processing past OCR_JOB_TIMEOUT to the queue.
+
+        Jobs already claimed OCR_MAX_ATTEMPTS times are failed instead. Jobs
+        this process is still running are left alone: they are slow, not lost.
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=self.job_timeout)
+        with self._lock:
+            running = list(self._in_flight)
+        stale = (OcrJob.status == OcrJob.STATUS_PROCESSING, OcrJob.started_at < cutoff,
+                 OcrJob.id.notin_(running))
+
+        exhausted = db.session.query(OcrJob.id, OcrJob.attempts).filter(
+            *stale, OcrJob.attempts >= self.max_attempts
+        ).all()
+        for job_id, attempt in exhausted:
+            self.fail(job_id, f'Gave up after {self.max_attempts} attempts', attempt)
+
+        result = db.session.execute(
+            update(OcrJob)
+            .where(*stale, OcrJob.attempts < self.max_attempts)
+            .values(status=OcrJob.STATUS_QUEUED)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def work(self, poll_interval=1.0, once=False):
+        """Drain the queue with the process pool; loops forever unless ``once``"""
+        in_flight = {}
+
+        while True:
+            self.requeue_stale()
+
+            while len(in_flight) < self.max_workers:
+                job_id, attempt = self._claim_next()
+                if job_id is None:
+                    break
+                with self._lock:
+                    self._in_flight.add(job_id)
+                future = self._submit_to_pool('jobs', run_ocr, self._absolute_path(job_id))
+                in_flight[future] = job_id, attempt
+
+            if not in_flight:
+                if once:
+                    return
+                time.sleep(poll_interval)
+                continue
+
+            done, _ = wait(in_flight, timeout=poll_interval, return_when=FIRST_COMPLETED)
+            for future in done:
+                job_id, attempt = in_flight.pop(future)
+                try:
+                    self.complete(job_id, future.result(), attempt)
+                except BrokenProcessPool as e:
+                    db.session.rollback()
+                    self.release(job_id, e, attempt)
+                except Exception as e:
+                    db.session.rollback()
+                    self.fail(job_id, e, attempt)
+                finally:
+                    with self._lock:
+                        self._in_flight.discard(job_id)
+
+def init_ocr_jobs(app):
+    """Attach the OCR job queue to the app"""
+    app.extensions['ocr_jobs'] = OcrJobQueue(app)
+
+def get_ocr_jobs():
+    """Return the OCR job queue of the current app"""
+    return current_app.extensions['ocr_jobs']
@@ -4,65 +4,197 @@ Optical Character Recognition for receipt processing
 """
 
 import cv2
-import pytesseract
 import numpy as np
-from PIL import Image, ImageEnhance, ImageFilter
+from PIL import Image
 import re
 import os
+import hashlib
 from datetime import datetime
+from functools import lru_cache
 import logging
+from app.services.ocr_engines import get_ocr_engine
+
+# Bump when preprocessing or parsing changes so cached OCR results are not reused
+OCR_PIPELINE_VERSION = 4
+TESSERACT_CONFIG = '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,/$:-() '
+
+# Images are shrunk so their short side is about this many pixels: roughly
+# 300-400 DPI across an 80mm till roll, where tesseract reads best
+OCR_TARGET_SHORT_SIDE = int(os.environ.get('OCR_TARGET_SHORT_SIDE', 1200))
+REDUCED_DECODE_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+CONTRAST_FACTOR = 1.5
+# 2 * identity - PIL's 3x3 SMOOTH filter, i.e. ImageEnhance.Sharpness(2.0)
+SHARPEN_KERNEL = -np.array([[1, 1, 1], [1, 5, 1], [1, 1, 1]], np.float32) / 13.0
+SHARPEN_KERNEL[1, 1] += 2.0
+
+# Adaptive OCR: read the plain grayscale image first and only run the full
+# enhance/threshold pipeline (and any fallback page segmentation modes) when
+# the fast pass leaves the receipt incomplete
+OCR_ADAPTIVE = os.environ.get('OCR_ADAPTIVE', 'true').lower() == 'true'
+OCR_FAST_MIN_SCORE = float(os.environ.get('OCR_FAST_MIN_SCORE', 0.8))
+OCR_FAST_MIN_WORD_CONFIDENCE = float(os.environ.get('OCR_FAST_MIN_WORD_CONFIDENCE', 60))
+OCR_FALLBACK_PSMS = tuple(int(psm) for psm in os.environ.get('OCR_FALLBACK_PSMS', '').split(',') if psm.strip())
+PASS_FAST = 'fast'
+PASS_FULL = 'full'
+PASS_TEXT = 'text'  # PDF page with an embedded text layer, no OCR
+
+# PDF pages are read one at a time; image-only pages are rendered at most at
+# this resolution, and pages with this much embedded text skip OCR entirely
+OCR_PDF_DPI = int(os.environ.get('OCR_PDF_DPI', 200))
+OCR_PDF_MAX_PAGES = int(os.environ.get('OCR_PDF_MAX_PAGES', 50))
+PDF_MIN_TEXT_CHARS = 20
+PDF_PAGE_SUMMARY_FIELDS = ('page', 'ocr_pass', 'merchant_name', 'total_amount', 'date', 'confidence_score')
+
+_fingerprint = None
+
+# Receipt text patterns, compiled once per process
+MERCHANT_PATTERNS = (
+    re.compile(r'^[A-Z][A-Z\s&]+[A-Z]$'),  # All caps company names
+    re.compile(r'^[A-Za-z]+(?:\s+[A-Za-z]+){1,3}$'),  # 1-4 word company names
+)
+ADDRESS_PATTERNS = (
+    re.compile(r'\d+\s+[A-Za-z\s]+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive)'),
+    re.compile(r'[A-Za-z\s]+,\s*[A-Z]{2}\s+\d{5}'),  # City, ST ZIP
+)
+LINE_ITEM_PATTERN = re.compile(r'^(.+?)\s+\$?([\d,]+\.\d{2})$')
+LINE_ITEM_SKIP_WORDS = ('total', 'tax', 'tip', 'subtotal', 'change', 'cash')
+
+# (casefolded keywords that must be present, pattern); tried in order
+TOTAL_PATTERNS = (
+    (('total',), re.compile(r'(?i)total[:\s]*\$?([\d,]+\.\d{2})')),
+    (('amount',), re.compile(r'(?i)amount[:\s]*\$?([\d,]+\.\d{2})')),
+    (('sum',), re.compile(r'(?i)sum[:\s]*\$?([\d,]+\.\d{2})')),
+    (('$',), re.compile(r'\$([\d,]+\.\d{2})\s*$')),  # Amount at end of text
+    (('total', 'sum', 'amount'), re.compile(r'([\d,]+\.\d{2})\s*(?:total|sum|amount)')),
+)
+TAX_PATTERNS = tuple(
+    (keyword, re.compile(rf'(?i){keyword}[:\s]*\$?([\d,]+\.\d{{2}})'))
+    for keyword in ('tax', 'hst', 'gst', 'pst')
+)
+TOTAL_KEYWORD_PATTERN = re.compile(r'(?i)total')
+DOLLAR_AMOUNT_PATTERN = re.compile(r'\$[\d,]+\.\d{2}')
+
+# 12/31/2024 style dates; also covers the two-digit-year form
+NUMERIC_DATE_PATTERN = re.compile(r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})')
+FALLBACK_DATE_PATTERNS = (
+    re.compile(r'(\d{2,4}[/-]\d{1,2}[/-]\d{1,2})'),
+    re.compile(r'(\w{3}\s+\d{1,2},?\s+\d{4})'),  # Jan 15, 2024
+    re.compile(r'(\d{1,2}\s+\w{3}\s+\d{4})'),    # 15 Jan 2024
+)
+PHONE_PATTERN = re.compile(r'\(?([\d]{3})\)?[-\s\.]?([\d]{3})[-\s\.]?([\d]{4})')
+
+def tesseract_config(psm=6):
+    return TESSERACT_CONFIG.replace('--psm 6', f'--psm {psm}', 1)
+
+def is_pdf(file_path):
+    with open(file_path, 'rb') as handle:
+        return handle.read(5) == b'%PDF-'
+
+def _receipt_rank(data):
+    return data['total_amount'] is not None, data['confidence_score']
+
+def ocr_fingerprint():
+    """Identify the OCR pipeline (code version, tesseract version, config and tuning)"""
+    global _fingerprint
+    if _fingerprint is None:
+        try:
+            tesseract_version = get_ocr_engine().version()
+        except Exception:
+            tesseract_version = 'unavailable'
+        tuning = (OCR_ADAPTIVE, OCR_FAST_MIN_SCORE, OCR_FAST_MIN_WORD_CONFIDENCE, OCR_FALLBACK_PSMS, OCR_PDF_DPI)
+        source = f"{OCR_PIPELINE_VERSION}|{tesseract_version}|{TESSERACT_CONFIG}|{OCR_TARGET_SHORT_SIDE}|{tuning}"
+        _fingerprint = hashlib.sha256(source.encode('utf-8')).hexdigest()[:16]
+    return _fingerprint
+
+DATE_FORMATS = (
+    '%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y',
+    '%Y/%m/%d', '%Y-%m-%d',
+    '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y',
+    '%b %d, %Y', '%B %d, %Y', '%d %b %Y', '%d %B %Y'
+)
+
+@lru_cache(maxsize=4096)
+def _parse_date_string(date_str):
+    """First format in DATE_FORMATS that parses ``date_str``; receipts repeat
+    dates heavily in batch runs, so failed strptime attempts are cached too"""
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+
+    return None
 
 class OCRService:
     """Service for extracting text and data from receipt images"""
 
-    def __init__(self):
+    def __init__(self, target_short_side=OCR_TARGET_SHORT_SIDE, adaptive=OCR_ADAPTIVE,
+                 fast_min_score=OCR_FAST_MIN_SCORE, fast_min_word_confidence=OCR_FAST_MIN_WORD_CONFIDENCE,
+                 fallback_psms=OCR_FALLBACK_PSMS, engine=None):
         self.logger = logging.getLogger(__name__)
-
-        # Configure Tesseract path if needed
-        tesseract_cmd = os.environ.get('TESSERACT_CMD')
-        if tesseract_cmd:
-            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.target_short_side = target_short_side
+        self.adaptive = adaptive
+        self.fast_min_score = fast_min_score
+        self.fast_min_word_confidence = fast_min_word_confidence
+        self.fallback_psms = fallback_psms
+        self._engine = engine
+
+    @property
+    def engine(self):
+        """Tesseract backend; the per-process shared engine unless one was given"""
+        if self._engine is None:
+            self._engine = get_ocr_engine()
+        return self._engine
+
+    def _decode_grayscale(self, image_path):
+        """Decode straight to grayscale, shrunk so the short side is near
+        ``target_short_side``. JPEGs are decoded at 1/2, 1/4 or 1/8 scale
+        by libjpeg when the photo is large enough, skipping the full-size
+        buffer entirely."""
+        with Image.open(image_path) as header:
+            short_side = min(header.size)
+
+        flag = cv2.IMREAD_GRAYSCALE
+        for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+            if short_side // factor >= self.target_short_side:
+                flag = reduced_flag
+                break
+
+        gray = cv2.imread(image_path, flag)
+        if gray is None:
+            raise ValueError(f"Could not decode image {image_path}")
+
+        height, width = gray.shape
+        scale = self.target_short_side / min(height, width)
+        if scale < 1.0:
+            gray = cv2.resize(gray, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def _enhance(self, gray):
+        """Contrast, sharpen, blur and threshold a grayscale image (modified in place)"""
+        # Contrast x1.5 around the mean grey level (as PIL's Contrast enhancer)
+        mean = float(cv2.mean(gray)[0])
+        cv2.addWeighted(gray, CONTRAST_FACTOR, gray, 0.0, mean * (1.0 - CONTRAST_FACTOR), dst=gray)
+
+        # Sharpen x2 against a 3x3 smoothed copy (as PIL's Sharpness enhancer)
+        cv2.filter2D(gray, -1, SHARPEN_KERNEL, dst=gray)
+
+        # Apply Gaussian blur to reduce noise
+        cv2.GaussianBlur(gray, (5, 5), 0, dst=gray)
+
+        # Apply adaptive thresholding
+        return cv2.adaptiveThreshold(
+            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
+        )
 
     def preprocess_image(self, image_path):
         """Preprocess image for better OCR results"""
         try:
-            # Read image using OpenCV
-            image = cv2.imread(image_path)
-
-            # Convert to RGB (PIL uses RGB, OpenCV uses BGR)
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-
-            # Convert to PIL Image for preprocessing
-            pil_image = Image.fromarray(image)
-
-            # Enhance contrast
-            enhancer = ImageEnhance.Contrast(pil_image)
-            pil_image = enhancer.enhance(1.5)
-
-            # Enhance sharpness
-            enhancer = ImageEnhance.Sharpness(pil_image)
-            pil_image = enhancer.enhance(2.0)
-
-            # Convert back to OpenCV format
-            image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-
-            # Convert to grayscale
-            gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-
-            # Apply Gaussian blur to reduce noise
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
-
-            # Apply adaptive thresholding
-            threshold = cv2.adaptiveThreshold(
-                blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
-            )
-
-            # Morphological operations to clean up the image
-            kernel = np.ones((1, 1), np.uint8)
-            processed = cv2.morphologyEx(threshold, cv2.MORPH_CLOSE, kernel)
-            processed = cv2.morphologyEx(processed, cv2.MORPH_OPEN, kernel)
-
-            return processed
+            return self._enhance(self._decode_grayscale(image_path))
 
         except Exception as e:
             self.logger.error(f"Error preprocessing image: {e}")
@@ -75,11 +207,8 @@ class OCRService:
             # Preprocess the image
             processed_image = self.preprocess_image(image_path)
 
-            # Configure Tesseract
-            config = '--oem 3 --psm 6 -c tessedit_char_whitelist=0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz.,/$:-() '
-
             # Extract text
-            text = pytesseract.image_to_string(processed_image, config=config)
+            text = self.engine.image_to_string(processed_image, config=TESSERACT_CONFIG)
 
             return text.strip()
 
@@ -87,187 +216,264 @@ class OCRService:
             self.logger.error(f"Error extracting text from image: {e}")
             return ""
 
-    def extract_receipt_data(self, image_path):
-        """Extract structured data from receipt"""
-        raw_text = self.extract_text(image_path)
-
-        if not raw_text:
-            return {
-                'raw_text': '',
-                'merchant_name': None,
-                'total_amount': None,
-                'date': None,
-                'items': [],
-                'confidence_score': 0.0
-            }
+    def read_words(self, image):
+        """OCR text and mean word confidence (0-100) from one tesseract call"""
+        data = self.engine.image_to_data(image, config=TESSERACT_CONFIG)
 
-        # Extract structured information
-        extracted_data = {
-            'raw_text': raw_text,
-            'merchant_name': self._extract_merchant_name(raw_text),
-            'total_amount': self._extract_total_amount(raw_text),
-            'date': self._extract_date(raw_text),
-            'items': self._extract_line_items(raw_text),
-            'tax_amount': self._extract_tax_amount(raw_text),
-            'address': self._extract_address(raw_text),
-            'phone': self._extract_phone(raw_text),
-            'confidence_score': self._calculate_confidence_score(raw_text)
-        }
+        lines = {}
+        confidences = []
+        for word, confidence, block, paragraph, line in zip(
+            data['text'], data['conf'], data['block_num'], data['par_num'], data['line_num']
+        ):
+            if not word.strip():
+                continue
+            lines.setdefault((block, paragraph, line), []).append(word)
+            if float(confidence) >= 0:
+                confidences.append(float(confidence))
 
-        return extracted_data
+        text = '\n'.join(' '.join(words) for words in lines.values())
+        return text.strip(), sum(confidences) / len(confidences) if confidences else 0.0
 
-    def _extract_merchant_name(self, text):
-        """Extract merchant/store name from receipt text"""
-        lines = text.split('\n')
+    def extract_receipt_data(self, image_path):
+        """Extract structured data from receipt.
 
-        # Common merchant name patterns
-        merchant_patterns = [
-            r'^[A-Z][A-Z\s&]+[A-Z]$',  # All caps company names
-            r'^[A-Za-z]+(?:\s+[A-Za-z]+){1,3}$',  # 1-4 word company names
-        ]
+        In adaptive mode the downscaled grayscale image is read first; the
+        full preprocessing pipeline only runs when that leaves the total
+        missing, the receipt score below ``fast_min_score`` or tesseract's
+        mean word confidence below ``fast_min_word_confidence``. The pass
+        taken is reported as ``ocr_pass``. PDFs go to ``extract_pdf_data``.
+        """
+        if is_pdf(image_path):
+            return self.extract_pdf_data(image_path)
 
-        # Look in first few lines for merchant name
-        for line in lines[:5]:
-            line = line.strip()
-            if len(line) < 3 or len(line) > 50:
-                continue
+        if not self.adaptive:
+            return self._receipt_fields(self.extract_text(image_path), PASS_FULL)
 
-            for pattern in merchant_patterns:
-                if re.match(pattern, line):
-                    return line
+        try:
+            gray = self._decode_grayscale(image_path)
+        except Exception as e:
+            self.logger.error(f"Error decoding image: {e}")
+            return self._receipt_fields('', PASS_FULL)
 
-        # Fallback: return first non-empty line
-        for line in lines:
-            line = line.strip()
-            if line and len(line) > 2:
-                return line
+        return self.read_receipt(gray)
 
-        return None
+    def read_receipt(self, gray):
+        """Receipt fields from a decoded grayscale image, which is modified in place"""
+        fast = None
+        if self.adaptive:
+            try:
+                raw_text, word_confidence = self.read_words(gray)
+                fast = self._receipt_fields(raw_text, PASS_FAST)
+                if self._is_complete(fast) and word_confidence >= self.fast_min_word_confidence:
+                    return fast
+            except Exception as e:
+                self.logger.error(f"Fast OCR pass failed, using full pipeline: {e}")
+
+        candidates = []
+        try:
+            processed = self._enhance(gray)
+            for psm in (6,) + tuple(self.fallback_psms):
+                text = self.engine.image_to_string(processed, config=tesseract_config(psm)).strip()
+                candidates.append(self._receipt_fields(text, PASS_FULL))
+                if self._is_complete(candidates[-1]):
+                    break
+        except Exception as e:
+            self.logger.error(f"Full OCR pass failed: {e}")
+
+        if fast is not None:
+            candidates.append(fast)
+        if not candidates:
+            return self._receipt_fields('', PASS_FULL)
+
+        # The fast result still wins if escalating read less; ties go to the full pass
+        return dict(max(candidates, key=_receipt_rank), ocr_pass=PASS_FULL)
+
+    def extract_pdf_data(self, pdf_path):
+        """Extract receipt data from a PDF one page at a time.
+
+        Pages with an embedded text layer are parsed directly (``ocr_pass``
+        ``text``); only image-only pages are rasterized, at no more than
+        ``OCR_PDF_DPI`` and no larger than the OCR target size, and each
+        bitmap is released before the next page is read. The top-level
+        fields come from the first complete page, or the best one, and
+        ``pages`` summarises every page read.
+        """
+        try:
+            import pypdfium2 as pdfium
+        except ImportError:
+            raise RuntimeError('PDF receipts need the pypdfium2 package')
 
-    def _extract_total_amount(self, text):
-        """Extract total amount from receipt text"""
-        # Common total amount patterns
-        patterns = [
-            r'(?i)total[:\s]*\$?([\d,]+\.\d{2})',
-            r'(?i)amount[:\s]*\$?([\d,]+\.\d{2})',
-            r'(?i)sum[:\s]*\$?([\d,]+\.\d{2})',
-            r'\$([\d,]+\.\d{2})\s*$',  # Amount at end of line
-            r'([\d,]+\.\d{2})\s*(?:total|sum|amount)',
+        pages = []
+        texts = []
+        document = pdfium.PdfDocument(pdf_path)
+        try:
+            for index in range(min(len(document), OCR_PDF_MAX_PAGES)):
+                page = document[index]
+                try:
+                    data = self._read_pdf_page(page)
+                finally:
+                    page.close()
+
+                texts.append(data['raw_text'])
+                pages.append(dict(data, page=index + 1))
+        finally:
+            document.close()
+
+        if not pages:
+            return dict(self._receipt_fields('', PASS_TEXT), pages=[])
+
+        best = next((page for page in pages if self._is_complete(page)), None) or max(pages, key=_receipt_rank)
+        result = {key: value for key, value in best.items() if key != 'page'}
+        result['raw_text'] = '\n\n'.join(text for text in texts if text)
+        result['pages'] = [
+            {key: page.get(key) for key in PDF_PAGE_SUMMARY_FIELDS}
+            for page in pages
         ]
+        return result
 
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                # Return the largest amount found (likely the total)
-                amounts = [float(match.replace(',', '')) for match in matches]
-                return max(amounts)
+    def _read_pdf_page(self, page):
+        textpage = page.get_textpage()
+        try:
+            text = textpage.get_text_bounded().strip()
+        finally:
+            textpage.close()
 
-        return None
+        if len(text) >= PDF_MIN_TEXT_CHARS:
+            return self._receipt_fields(text, PASS_TEXT)
 
-    def _extract_date(self, text):
-        """Extract date from receipt text"""
-        # Common date patterns
-        patterns = [
-            r'(\d{1,2}[/-]\d{1,2}[/-]\d{2,4})',
-            r'(\d{1,2}[/-]\d{1,2}[/-]\d{2})',
-            r'(\d{2,4}[/-]\d{1,2}[/-]\d{1,2})',
-            r'(\w{3}\s+\d{1,2},?\s+\d{4})',  # Jan 15, 2024
-            r'(\d{1,2}\s+\w{3}\s+\d{4})',    # 15 Jan 2024
-        ]
+        width, height = page.get_size()
+        scale = min(OCR_PDF_DPI / 72.0, self.target_short_side / min(width, height))
+        bitmap = page.render(scale=scale, grayscale=True)
+        try:
+            return self.read_receipt(bitmap.to_numpy())
+        finally:
+            bitmap.close()
 
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                date_str = matches[0]
-                return self._parse_date(date_str)
+    def _is_complete(self, data):
+        return data['total_amount'] is not None and data['confidence_score'] >= self.fast_min_score
 
-        return None
+    def _receipt_fields(self, raw_text, ocr_pass):
+        if not raw_text:
+            return {
+                'raw_text': '',
+                'merchant_name': None,
+                'total_amount': None,
+                'date': None,
+                'items': [],
+                'confidence_score': 0.0,
+                'ocr_pass': ocr_pass
+            }
 
-    def _parse_date(self, date_str):
-        """Parse date string into datetime object"""
-        date_formats = [
-            '%m/%d/%Y', '%m-%d-%Y', '%m/%d/%y', '%m-%d-%y',
-            '%Y/%m/%d', '%Y-%m-%d',
-            '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%d-%m-%y',
-            '%b %d, %Y', '%B %d, %Y', '%d %b %Y', '%d %B %Y'
-        ]
+        return dict(self.parse_receipt_text(raw_text), ocr_pass=ocr_pass)
 
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
+    def parse_receipt_text(self, text):
+        """Extract all receipt fields from OCR text in a single line scan.
 
-        return None
-
-    def _extract_line_items(self, text):
-        """Extract individual line items from receipt"""
+        Line-local fields (merchant, items, address) are collected in one pass
+        over the lines. Patterns whose whitespace may span lines (totals, tax,
+        written dates, phone) run once on the whole text, and only when a
+        cheap keyword check says they can match.
+        """
         lines = text.split('\n')
-        items = []
+        folded = text.casefold()
 
-        # Pattern to match line items (item name and price)
-        item_pattern = r'^(.+?)\s+\$?([\d,]+\.\d{2})$'
+        merchant_name = None
+        fallback_merchant = None
+        address = None
+        items = []
 
-        for line in lines:
-            line = line.strip()
-            match = re.match(item_pattern, line)
+        for index, line in enumerate(lines):
+            stripped = line.strip()
+
+            if merchant_name is None:
+                if index < 5 and 3 <= len(stripped) <= 50:
+                    for pattern in MERCHANT_PATTERNS:
+                        if pattern.match(stripped):
+                            merchant_name = stripped
+                            break
+                if fallback_merchant is None and len(stripped) > 2:
+                    fallback_merchant = stripped
+
+            if address is None:
+                for pattern in ADDRESS_PATTERNS:
+                    if pattern.search(line):
+                        address = stripped
+                        break
+
+            match = LINE_ITEM_PATTERN.match(stripped)
             if match:
                 item_name = match.group(1).strip()
-                item_price = float(match.group(2).replace(',', ''))
+                lowered = item_name.lower()
 
                 # Filter out likely non-items
-                if not any(skip in item_name.lower() for skip in ['total', 'tax', 'tip', 'subtotal', 'change', 'cash']):
+                if not any(skip in lowered for skip in LINE_ITEM_SKIP_WORDS):
                     items.append({
                         'name': item_name,
-                        'price': item_price
+                        'price': float(match.group(2).replace(',', ''))
                     })
 
-        return items
+        numeric_date = NUMERIC_DATE_PATTERN.search(text)
+        has_total_keyword = 'total' in folded and TOTAL_KEYWORD_PATTERN.search(text) is not None
+
+        return {
+            'raw_text': text,
+            'merchant_name': merchant_name or fallback_merchant,
+            'total_amount': self._find_total_amount(text, folded),
+            'date': self._find_date(text, numeric_date),
+            'items': items,
+            'tax_amount': self._find_tax_amount(text, folded),
+            'address': address,
+            'phone': self._find_phone(text),
+            'confidence_score': self._score_confidence(text, lines, numeric_date, has_total_keyword)
+        }
 
-    def _extract_tax_amount(self, text):
-        """Extract tax amount from receipt"""
-        patterns = [
-            r'(?i)tax[:\s]*\$?([\d,]+\.\d{2})',
-            r'(?i)hst[:\s]*\$?([\d,]+\.\d{2})',
-            r'(?i)gst[:\s]*\$?([\d,]+\.\d{2})',
-            r'(?i)pst[:\s]*\$?([\d,]+\.\d{2})',
-        ]
+    def _find_total_amount(self, text, folded):
+        """Largest amount matched by the first total pattern that matches"""
+        for keywords, pattern in TOTAL_PATTERNS:
+            if keywords is not None and not any(keyword in folded for keyword in keywords):
+                continue
 
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
+            matches = pattern.findall(text)
             if matches:
-                return float(matches[0].replace(',', ''))
-
-        return 0.0
+                # Return the largest amount found (likely the total)
+                return max(float(match.replace(',', '')) for match in matches)
 
-    def _extract_address(self, text):
-        """Extract address from receipt"""
-        lines = text.split('\n')
+        return None
 
-        # Look for address patterns
-        address_patterns = [
-            r'\d+\s+[A-Za-z\s]+(?:St|Street|Ave|Avenue|Rd|Road|Blvd|Boulevard|Dr|Drive)',
-            r'[A-Za-z\s]+,\s*[A-Z]{2}\s+\d{5}',  # City, ST ZIP
-        ]
+    def _find_date(self, text, numeric_date):
+        """Parse the first match of the first date pattern that matches"""
+        if numeric_date:
+            return self._parse_date(numeric_date.group(1))
 
-        for line in lines:
-            for pattern in address_patterns:
-                if re.search(pattern, line):
-                    return line.strip()
+        for pattern in FALLBACK_DATE_PATTERNS:
+            match = pattern.search(text)
+            if match:
+                return self._parse_date(match.group(1))
 
         return None
 
-    def _extract_phone(self, text):
-        """Extract phone number from receipt"""
-        phone_pattern = r'\(?([\d]{3})\)?[-\s\.]?([\d]{3})[-\s\.]?([\d]{4})'
+    def _parse_date(self, date_str):
+        """Parse date string into datetime object"""
+        return _parse_date_string(date_str)
+
+    def _find_tax_amount(self, text, folded):
+        """First amount after a tax keyword"""
+        for keyword, pattern in TAX_PATTERNS:
+            if keyword in folded:
+                match = pattern.search(text)
+                if match:
+                    return float(match.group(1).replace(',', ''))
+
+        return 0.0
 
-        match = re.search(phone_pattern, text)
+    def _find_phone(self, text):
+        match = PHONE_PATTERN.search(text)
         if match:
             return f"({match.group(1)}) {match.group(2)}-{match.group(3)}"
 
         return None
 
-    def _calculate_confidence_score(self, text):
+    def _score_confidence(self, text, lines, numeric_date, has_total_keyword):
         """Calculate confidence score based on extracted data quality"""
         score = 0.0
 
@@ -275,16 +481,16 @@ class OCRService:
             score += 0.2
 
         # Check for common receipt elements
-        if re.search(r'\$[\d,]+\.\d{2}', text):  # Dollar amounts
+        if '$' in text and DOLLAR_AMOUNT_PATTERN.search(text):  # Dollar amounts
             score += 0.2
 
-        if re.search(r'\d{1,2}[/-]\d{1,2}[/-]\d{2,4}', text):  # Dates
+        if numeric_date:  # Dates
             score += 0.2
 
-        if re.search(r'(?i)total', text):  # Total keyword
+        if has_total_keyword:  # Total keyword
             score += 0.2
 
-        if len(text.split('\n')) > 5:  # Multiple lines
+        if len(lines) > 5:  # Multiple lines
             score += 0.2
 
         return min(score, 1.0)
@@ -0,0 +1,265 @@
+"""
+Smart Expense Tracker - Receipt Storage
+Content-addressed, reference-counted storage for uploaded receipt files
+"""
+
+import os
+import hashlib
+import logging
+import tempfile
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, update, delete, insert
+from app.database import db
+from app.models.stored_blob import StoredBlob
+
+CHUNK_SIZE = 1024 * 1024
+
+def blob_key(sha256):
+    """Storage key of a blob: sharded by the first two bytes of its hash"""
+    return f'blobs/{sha256[:2]}/{sha256[2:4]}/{sha256}'
+
+def _spool(stream, directory):
+    """Copy ``stream`` into a temp file in ``directory``, hashing as it is written.
+
+    Returns ``(temp_path, sha256, size)``.
+    """
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.upload-')
+    try:
+        with os.fdopen(fd, 'wb') as handle:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                size += len(chunk)
+                handle.write(chunk)
+            handle.flush()
+            os.fsync(handle.fileno())
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+    return temp_path, digest.hexdigest(), size
+
+def _is_not_found(error):
+    code = getattr(error, 'response', {}).get('Error', {}).get('Code')
+    return code in ('404', 'NoSuchKey', 'NotFound')
+
+class LocalBlobStore:
+    """Blobs on the local filesystem; keys are paths relative to ``root``"""
+
+    def __init__(self, root):
+        self.root = root
+
+    def spool(self, stream):
+        """Copy a stream to a temp file; returns ``(temp_path, sha256, size)``"""
+        # The temp file lives under blobs/ so the final rename stays on one filesystem
+        return _spool(stream, os.path.join(self.root, 'blobs', 'tmp'))
+
+    def place(self, temp_path, key):
+        """Make ``key`` hold the spooled bytes, writing only if it is missing"""
+        path = self.local_path(key)
+        if os.path.exists(path):
+            os.unlink(temp_path)  # same bytes already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+
+    def put(self, stream):
+        """Store a stream; returns ``(key, sha256, size)``"""
+        temp_path, sha256, size = self.spool(stream)
+        key = blob_key(sha256)
+        self.place(temp_path, key)
+        return key, sha256, size
+
+    def local_path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.isfile(self.local_path(key))
+
+    def delete(self, key):
+        try:
+            os.unlink(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+class S3BlobStore:
+    """Blobs in an S3-compatible bucket.
+
+    ``client`` is a boto3 S3 client or anything with the same methods. OCR
+    needs a real file, so ``local_path`` downloads into ``cache_dir`` once.
+    """
+
+    def __init__(self, client, bucket, cache_dir, prefix=''):
+        self.client = client
+        self.bucket = bucket
+        self.cache_dir = cache_dir
+        self.prefix = prefix
+
+    def _object_key(self, key):
+        return f'{self.prefix}{key}'
+
+    def spool(self, stream):
+        """Copy a stream to a temp file; returns ``(temp_path, sha256, size)``"""
+        return _spool(stream, os.path.join(self.cache_dir, 'tmp'))
+
+    def place(self, temp_path, key):
+        """Make ``key`` hold the spooled bytes, uploading only if it is missing"""
+        try:
+            if not self.exists(key):
+                self.client.upload_file(temp_path, self.bucket, self._object_key(key))
+        finally:
+            os.unlink(temp_path)
+
+    def put(self, stream):
+        """Store a stream; returns ``(key, sha256, size)``"""
+        temp_path, sha256, size = self.spool(stream)
+        key = blob_key(sha256)
+        self.place(temp_path, key)
+        return key, sha256, size
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except Exception as e:
+            if _is_not_found(e):
+                return False
+            raise
+
+    def local_path(self, key):
+        path = os.path.join(self.cache_dir, key)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.download-')
+            os.close(fd)
+            try:
+                self.client.download_file(self.bucket, self._object_key(key), temp_path)
+                os.replace(temp_path, path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        return path
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+        try:
+            os.unlink(os.path.join(self.cache_dir, key))
+        except FileNotFoundError:
+            pass
+
+class ReceiptStorage:
+    """Deduplicated receipt files: one blob per distinct content, one
+    StoredBlob reference per ReceiptUpload pointing at it.
+
+    Reference counts change in the caller's session and commit with the
+    upload row; blobs are only removed by ``purge`` after that commit.
+
+    A released blob keeps its row, at zero references, until ``purge``
+    deletes the row and then the file in one transaction. ``store`` takes
+    its reference before placing the file, so a concurrent purge either
+    sees the reference and keeps the blob, or holds the row until the file
+    is gone and ``store`` writes it again.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.logger = logging.getLogger(__name__)
+
+    def store(self, stream):
+        """Write a file and take a reference to its blob; returns ``(key, sha256, size)``"""
+        temp_path, sha256, size = self.backend.spool(stream)
+        try:
+            self._add_reference(sha256, size)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        key = blob_key(sha256)
+        self.backend.place(temp_path, key)
+        return key, sha256, size
+
+    def _add_reference(self, sha256, size):
+        table = StoredBlob.__table__
+        values = {'sha256': sha256, 'size': size, 'ref_count': 1, 'created_at': datetime.utcnow()}
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            statement = dialect_insert(table).values(**values)
+            db.session.execute(statement.on_conflict_do_update(
+                index_elements=['sha256'], set_={'ref_count': table.c.ref_count + 1}
+            ))
+        else:
+            result = db.session.execute(
+                update(table).where(table.c.sha256 == sha256).values(ref_count=table.c.ref_count + 1)
+            )
+            if result.rowcount == 0:
+                db.session.execute(insert(table).values(**values))
+
+    def release(self, sha256):
+        """Drop one reference; returns True when the blob is no longer referenced"""
+        table = StoredBlob.__table__
+        db.session.execute(
+            update(table).where(table.c.sha256 == sha256).values(ref_count=table.c.ref_count - 1)
+        )
+        ref_count = db.session.execute(select(table.c.ref_count).where(table.c.sha256 == sha256)).scalar()
+        return ref_count is not None and ref_count <= 0
+
+    def purge(self, sha256):
+        """Delete a blob nobody references and commit; call after the release is committed"""
+        table = StoredBlob.__table__
+        # Deleting the row locks it against a concurrent store until the file is gone
+        result = db.session.execute(delete(table).where(table.c.sha256 == sha256, table.c.ref_count <= 0))
+        if result.rowcount == 0:
+            db.session.commit()
+            return False  # re-uploaded since it was released
+
+        try:
+            self.backend.delete(blob_key(sha256))
+        except BaseException:
+            db.session.rollback()
+            raise
+        db.session.commit()
+        self.logger.info(f"Deleted unreferenced receipt blob {sha256}")
+        return True
+
+    def local_path(self, key):
+        return self.backend.local_path(key)
+
+    def exists(self, key):
+        return self.backend.exists(key)
+
+def create_receipt_storage(app):
+    """Build the storage backend selected by RECEIPT_STORAGE_BACKEND"""
+    if app.config.get('RECEIPT_STORAGE_BACKEND', 'local') == 's3':
+        import boto3
+
+        client = boto3.client('s3', endpoint_url=app.config.get('RECEIPT_S3_ENDPOINT_URL'))
+        backend = S3BlobStore(
+            client,
+            app.config['RECEIPT_S3_BUCKET'],
+            app.config.get('RECEIPT_S3_CACHE_DIR') or os.path.join(app.instance_path, 'blob-cache'),
+            prefix=app.config.get('RECEIPT_S3_PREFIX', '')
+        )
+    else:
+        backend = LocalBlobStore(app.instance_path)
+
+    return ReceiptStorage(backend)
+
+def init_receipt_storage(app):
+    """Reserve the storage slot; it is built on first use, once instance_path is final"""
+    app.extensions['receipt_storage'] = None
+
+def get_receipt_storage():
+    """Return the receipt storage of the current app"""
+    app = current_app._get_current_object()
+    if app.extensions.get('receipt_storage') is None:
+        app.extensions['receipt_storage'] = create_receipt_storage(app)
+    return app.extensions['receipt_storage']
@@ -0,0 +1,156 @@
+"""
+Smart Expense Tracker - Receipt Upload Service
+Stores uploaded receipt files and their metadata rows
+"""
+
+import os
+import re
+import uuid
+import logging
+import mimetypes
+from werkzeug.utils import secure_filename
+from app.database import db
+from app.models.expense import Expense
+from app.models.ocr_job import OcrJob
+from app.models.receipt_upload import ReceiptUpload
+from app.services.ocr_cache import file_sha256
+from app.services.receipt_storage import blob_key, get_receipt_storage
+
+# Files saved under uploads/<user_id>/ before content-addressed storage
+# were named <name>_<YYYYmmdd_HHMMSS>_<file_id>.<ext>
+STORED_NAME_PATTERN = re.compile(r'_\d{8}_\d{6}_([0-9a-f]{8})(?:\.[^.]+)?$')
+
+class ReceiptUploadService:
+    """Saves receipt files and keeps the receipt_uploads table in sync"""
+
+    def __init__(self, instance_path, storage=None):
+        self.instance_path = instance_path
+        self.storage = storage or get_receipt_storage()
+        self.logger = logging.getLogger(__name__)
+
+    def save(self, file, user_id):
+        """Store an uploaded file and add (not commit) its ReceiptUpload.
+
+        Identical bytes share one stored blob; each upload holds a reference.
+        """
+        original_filename = secure_filename(file.filename)
+        key, sha256, size = self.storage.store(file.stream)
+
+        upload = ReceiptUpload(
+            file_id=uuid.uuid4().hex,
+            user_id=user_id,
+            path=key,
+            size=size,
+            sha256=sha256,
+            mime=file.mimetype or mimetypes.guess_type(original_filename)[0],
+            original_filename=original_filename
+        )
+        db.session.add(upload)
+        return upload
+
+    def absolute_path(self, upload):
+        """Local file for OCR (downloaded first by remote backends)"""
+        return self.storage.local_path(upload.path)
+
+    def exists(self, upload):
+        return self.storage.exists(upload.path)
+
+    def delete(self, upload):
+        """Delete an upload and commit; its blob goes once nothing references it"""
+        sha256 = upload.sha256
+        shared = upload.path == blob_key(sha256)
+        if shared:
+            self.storage.release(sha256)
+        legacy_path = None if shared else os.path.join(self.instance_path, upload.path)
+
+        db.session.delete(upload)
+        db.session.commit()
+
+        if shared:
+            self.storage.purge(sha256)
+        elif os.path.exists(legacy_path):
+            # Files saved before content addressing belong to a single upload
+            os.remove(legacy_path)
+
+    def backfill(self):
+        """Register files already on disk that have no ReceiptUpload row.
+
+        Also links expenses whose receipt_image_path points at a registered
+        file. Returns ``(files_registered, expenses_linked)``.
+        """
+        uploads_root = os.path.join(self.instance_path, 'uploads')
+        if not os.path.isdir(uploads_root):
+            return 0, 0
+
+        known_paths = {path for (path,) in db.session.query(ReceiptUpload.path)}
+        known_ids = {file_id for (file_id,) in db.session.query(ReceiptUpload.file_id)}
+        # Latest job status per file; files uploaded before the OCR queue
+        # existed were processed synchronously and count as completed
+        job_statuses = dict(db.session.query(OcrJob.file_id, OcrJob.status).order_by(OcrJob.id))
+        ocr_statuses = {
+            OcrJob.STATUS_COMPLETED: ReceiptUpload.OCR_COMPLETED,
+            OcrJob.STATUS_FAILED: ReceiptUpload.OCR_FAILED
+        }
+        registered = 0
+
+        for user_dir in sorted(os.listdir(uploads_root)):
+            if not user_dir.isdigit():
+                continue
+
+            for filename in sorted(os.listdir(os.path.join(uploads_root, user_dir))):
+                file_path = os.path.join(uploads_root, user_dir, filename)
+                relative_path = os.path.relpath(file_path, self.instance_path)
+                if not os.path.isfile(file_path) or relative_path in known_paths:
+                    continue
+
+                match = STORED_NAME_PATTERN.search(filename)
+                file_id = match.group(1) if match else None
+                if not file_id or file_id in known_ids:
+                    file_id = uuid.uuid4().hex
+
+                upload = ReceiptUpload(
+                    file_id=file_id,
+                    user_id=int(user_dir),
+                    path=relative_path,
+                    size=os.path.getsize(file_path),
+                    sha256=file_sha256(file_path),
+                    mime=mimetypes.guess_type(filename)[0]
+                )
+                if file_id in job_statuses:
+                    upload.ocr_status = ocr_statuses.get(job_statuses[file_id], ReceiptUpload.OCR_PENDING)
+                else:
+                    upload.ocr_status = ReceiptUpload.OCR_COMPLETED
+                db.session.add(upload)
+                known_paths.add(relative_path)
+                known_ids.add(file_id)
+                registered += 1
+
+        db.session.flush()
+
+        linked = 0
+        unlinked = Expense.query.filter(
+            Expense.receipt_upload_id.is_(None),
+            Expense.receipt_image_path.isnot(None)
+        ).all()
+        uploads_by_path = {
+            (upload.user_id, upload.path): upload.id
+            for upload in ReceiptUpload.query.filter(
+                ReceiptUpload.path.in_({expense.receipt_image_path for expense in unlinked})
+            )
+        } if unlinked else {}
+        for expense in unlinked:
+            upload_id = uploads_by_path.get((expense.user_id, expense.receipt_image_path))
+            if upload_id:
+                expense.receipt_upload_id = upload_id
+                linked += 1
+
+        db.session.commit()
+        self.logger.info(f"Backfilled {registered} receipt uploads, linked {linked} expenses")
+        return registered, linked
+
+def mark_ocr_status(file_id, status, ocr_pass=None):
+    """Record the OCR outcome on a receipt upload (flushed with the caller's commit)"""
+    values = {'ocr_status': status}
+    if ocr_pass:
+        values['ocr_pass'] = ocr_pass
+    ReceiptUpload.query.filter_by(file_id=file_id).update(values)
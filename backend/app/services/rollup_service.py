@@ -0,0 +1,152 @@
+"""
+Smart Expense Tracker - Rollup Service
+Reads, rebuilds and verifies the monthly expense rollup table
+"""
+
+import logging
+from sqlalchemy import func, extract, select, delete
+from app.models.expense import Expense
+from app.models.rollup import ExpenseMonthlyRollup
+from app.database import db
+
+class RollupService:
+    """Access layer for per-user, per-category monthly aggregates"""
+
+    def __init__(self):
+        self.logger = logging.getLogger(__name__)
+
+    def get_monthly_rows(self, user_id, start_date, end_date, by_category=False):
+        """Get (year, month, category_id, total, count) rows for months in [start_date, end_date)
+
+        Both bounds are expected to fall on the first of a month. Without
+        ``by_category`` categories are summed together and category_id is None.
+        """
+        rollup = ExpenseMonthlyRollup
+        month_index = rollup.year * 12 + rollup.month
+        columns = [rollup.year, rollup.month]
+        if by_category:
+            columns.append(rollup.category_id)
+
+        rows = db.session.query(
+            *columns,
+            func.sum(rollup.total_amount),
+            func.sum(rollup.expense_count)
+        ).filter(
+            rollup.user_id == user_id,
+            month_index >= start_date.year * 12 + start_date.month,
+            month_index < end_date.year * 12 + end_date.month
+        ).group_by(*columns).all()
+
+        if by_category:
+            return [tuple(row) for row in rows]
+        return [(year, month, None, total, count) for year, month, total, count in rows]
+
+    def get_category_totals(self, user_id, year, month):
+        """Get {category_id: total} for a single month"""
+        rollup = ExpenseMonthlyRollup
+        rows = db.session.query(rollup.category_id, rollup.total_amount).filter(
+            rollup.user_id == user_id,
+            rollup.year == year,
+            rollup.month == month
+        ).all()
+
+        return {category_id: total for category_id, total in rows}
+
+    def _aggregate_expenses(self, user_id=None):
+        """Build the GROUP BY over raw expenses that the rollup table mirrors"""
+        year = db.cast(extract('year', Expense.date), db.Integer)
+        month = db.cast(extract('month', Expense.date), db.Integer)
+
+        query = select(
+            Expense.user_id,
+            year.label('year'),
+            month.label('month'),
+            Expense.category_id,
+            func.sum(Expense.amount).label('total_amount'),
+            func.count(Expense.id).label('expense_count'),
+            func.min(Expense.amount).label('min_amount'),
+            func.max(Expense.amount).label('max_amount')
+        ).group_by(Expense.user_id, year, month, Expense.category_id)
+
+        if user_id is not None:
+            query = query.where(Expense.user_id == user_id)
+
+        return query
+
+    def rebuild(self, user_id=None):
+        """Recreate rollup rows from raw expenses, for one user or everyone"""
+        table = ExpenseMonthlyRollup.__table__
+
+        try:
+            clear = delete(table)
+            if user_id is not None:
+                clear = clear.where(table.c.user_id == user_id)
+            db.session.execute(clear)
+
+            db.session.execute(table.insert().from_select(
+                ['user_id', 'year', 'month', 'category_id',
+                 'total_amount', 'expense_count', 'min_amount', 'max_amount'],
+                self._aggregate_expenses(user_id)
+            ))
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Error rebuilding rollups: {e}")
+            raise
+
+        count_query = db.session.query(func.count(ExpenseMonthlyRollup.id))
+        if user_id is not None:
+            count_query = count_query.filter(ExpenseMonthlyRollup.user_id == user_id)
+        return count_query.scalar()
+
+    def check_consistency(self, user_id=None, tolerance=0.005):
+        """Compare rollup rows against raw expenses and return the mismatches"""
+        expected = {
+            (row.user_id, row.year, row.month, row.category_id): row
+            for row in db.session.execute(self._aggregate_expenses(user_id))
+        }
+
+        stored_query = db.session.query(ExpenseMonthlyRollup.__table__)
+        if user_id is not None:
+            stored_query = stored_query.filter(ExpenseMonthlyRollup.user_id == user_id)
+        stored = {
+            (row.user_id, row.year, row.month, row.category_id): row
+            for row in stored_query
+        }
+
+        mismatches = []
+        for key in sorted(set(expected) | set(stored)):
+            want = expected.get(key)
+            have = stored.get(key)
+
+            if want and have:
+                same = (
+                    want.expense_count == have.expense_count
+                    and abs(want.total_amount - have.total_amount) <= tolerance
+                    and abs(want.min_amount - have.min_amount) <= tolerance
+                    and abs(want.max_amount - have.max_amount) <= tolerance
+                )
+                if same:
+                    continue
+
+            mismatches.append({
+                'user_id': key[0],
+                'year': key[1],
+                'month': key[2],
+                'category_id': key[3],
+                'expected': self._row_summary(want),
+                'actual': self._row_summary(have)
+            })
+
+        return mismatches
+
+    def _row_summary(self, row):
+        if row is None:
+            return None
+        return {
+            'total_amount': round(row.total_amount, 2),
+            'expense_count': row.expense_count,
+            'min_amount': row.min_amount,
+            'max_amount': row.max_amount
+        }
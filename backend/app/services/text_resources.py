@@ -0,0 +1,114 @@
+"""
+Smart Expense Tracker - Text Resources
+Offline NLTK resource lookup with pure-Python fallbacks
+"""
+
+import os
+import re
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Vendored corpora, populated at image build time with:
+#   python -m nltk.downloader -d ml_models/nltk_data punkt stopwords wordnet
+DEFAULT_NLTK_DATA_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'ml_models', 'nltk_data'
+)
+
+# NLTK's English stopword list, used when the corpus is not installed
+FALLBACK_STOPWORDS = frozenset("""
+i me my myself we our ours ourselves you you're you've you'll you'd your yours
+yourself yourselves he him his himself she she's her hers herself it it's its
+itself they them their theirs themselves what which who whom this that that'll
+these those am is are was were be been being have has had having do does did
+doing a an the and but if or because as until while of at by for with about
+against between into through during before after above below to from up down
+in out on off over under again further then once here there when where why how
+all any both each few more most other some such no nor not only own same so
+than too very s t can will just don don't should should've now d ll m o re ve
+y ain aren aren't couldn couldn't didn didn't doesn doesn't hadn hadn't hasn
+hasn't haven haven't isn isn't ma mightn mightn't mustn mustn't needn needn't
+shan shan't shouldn shouldn't wasn wasn't weren weren't won won't wouldn
+wouldn't
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+class TextResources:
+    """Resolves stopwords, tokenizer and lemmatizer on first use.
+
+    Resources are looked up only in local NLTK data directories; nothing is
+    ever downloaded. Missing corpora fall back to a bundled stopword list, a
+    regex tokenizer and no lemmatization.
+    """
+
+    def __init__(self, data_dir=DEFAULT_NLTK_DATA_DIR):
+        self.data_dir = data_dir
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._stop_words = FALLBACK_STOPWORDS
+        self._tokenize = _TOKEN_RE.findall
+        self._lemmatizer = None
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+
+            try:
+                import nltk
+            except ImportError:
+                logger.warning("NLTK is not installed; using fallback text processing")
+                self._loaded = True
+                return
+
+            if self.data_dir and self.data_dir not in nltk.data.path:
+                nltk.data.path.insert(0, self.data_dir)
+
+            if self._has_resource(nltk, 'corpora/stopwords'):
+                from nltk.corpus import stopwords
+                self._stop_words = frozenset(stopwords.words('english'))
+
+            if self._has_resource(nltk, 'tokenizers/punkt'):
+                from nltk.tokenize import word_tokenize
+                self._tokenize = word_tokenize
+
+            if self._has_resource(nltk, 'corpora/wordnet'):
+                from nltk.stem import WordNetLemmatizer
+                self._lemmatizer = WordNetLemmatizer()
+
+            self._loaded = True
+
+    @staticmethod
+    def _has_resource(nltk, name):
+        try:
+            nltk.data.find(name)
+            return True
+        except LookupError:
+            logger.info(f"NLTK resource {name} not found locally; using fallback")
+            return False
+
+    @property
+    def stop_words(self):
+        self._load()
+        return self._stop_words
+
+    @property
+    def lemmatizer(self):
+        self._load()
+        return self._lemmatizer
+
+    def tokenize(self, text):
+        self._load()
+        return self._tokenize(text)
+
+_resources = None
+
+def get_text_resources():
+    """Return the process-wide text resources"""
+    global _resources
+    if _resources is None:
+        _resources = TextResources(os.environ.get('NLTK_DATA_DIR') or DEFAULT_NLTK_DATA_DIR)
+    return _resources
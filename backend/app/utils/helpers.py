@@ -3,15 +3,18 @@ Smart Expense Tracker - Helper Functions
 Common utility functions for the application
 """
 
-from flask import jsonify
+from flask import jsonify, make_response
 import os
+import json
+import base64
 import secrets
 import string
-from datetime import datetime
+from datetime import datetime, date
 import re
+from sqlalchemy import tuple_
 from werkzeug.utils import secure_filename as werkzeug_secure_filename
 
-def generate_response(status, message, data=None, status_code=200):
+def generate_response(status, message, data=None, status_code=200, etag=None):
     """Generate standardized API response"""
     response = {
         'status': status,
@@ -22,7 +25,18 @@ def generate_response(status, message, data=None, status_code=200):
     if data is not None:
         response['data'] = data
 
-    return jsonify(response), status_code
+    if etag is None:
+        return jsonify(response), status_code
+
+    response = make_response(jsonify(response), status_code)
+    response.set_etag(etag)
+    return response
+
+def not_modified_response(etag):
+    """Empty 304 response for a matching If-None-Match"""
+    response = make_response('', 304)
+    response.set_etag(etag)
+    return response
 
 def allowed_file(filename, allowed_extensions=None):
     """Check if file has allowed extension"""
@@ -156,6 +170,11 @@ def get_date_range_label(start_date, end_date):
     except (ValueError, AttributeError):
         return f"{start_date} - {end_date}"
 
+def add_months(value, months):
+    """Shift a date by whole calendar months, returning the first of that month"""
+    month_index = value.year * 12 + (value.month - 1) + months
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
 def clean_merchant_name(merchant_name):
     """Clean and standardize merchant name from OCR"""
     if not merchant_name:
@@ -270,6 +289,71 @@ def paginate_query(query, page=1, per_page=20, max_per_page=100):
         }
     }
 
+def encode_cursor(sort_key, sort_order, values):
+    """Encode the sort key values of the last row on a page as an opaque token"""
+    encoded = [value.isoformat() if isinstance(value, (datetime, date)) else value for value in values]
+    payload = json.dumps({'s': sort_key, 'o': sort_order, 'v': encoded}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort_key, sort_order, value_types):
+    """Decode a cursor token, validating it against the requested sort.
+
+    Raises ValueError when the token is malformed or was issued for a
+    different sort.
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Invalid cursor')
+
+    if not isinstance(values, list):
+        raise ValueError('Invalid cursor')
+    if payload.get('s') != sort_key or payload.get('o') != sort_order or len(values) != len(value_types):
+        raise ValueError('Cursor does not match the requested sort')
+
+    decoded = []
+    for value, value_type in zip(values, value_types):
+        if value is None:
+            decoded.append(None)
+            continue
+        try:
+            decoded.append(value_type.fromisoformat(value) if value_type in (datetime, date) else value_type(value))
+        except (ValueError, TypeError):
+            raise ValueError('Invalid cursor')
+
+    return decoded
+
+def paginate_keyset(query, sort_columns, descending=False, after=None, limit=20, max_limit=100, with_total=False):
+    """Paginate SQLAlchemy query by seeking past the previous page's last sort key.
+
+    ``sort_columns`` must end in a unique column so the ordering is total.
+    Unlike OFFSET, the cost of a page does not grow with its depth.
+    """
+    limit = max(1, min(limit, max_limit))
+
+    total = query.order_by(None).count() if with_total else None
+
+    if after is not None:
+        key = tuple_(*sort_columns)
+        query = query.filter(key < tuple_(*after) if descending else key > tuple_(*after))
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in sort_columns])
+    rows = query.limit(limit + 1).all()
+
+    pagination = {
+        'limit': limit,
+        'has_next': len(rows) > limit
+    }
+    if total is not None:
+        pagination['total'] = total
+
+    return {
+        'items': rows[:limit],
+        'pagination': pagination
+    }
+
 def log_user_action(user_id, action, details=None):
     """Log user action for audit trail"""
     # In a full implementation, this would write to an audit log table
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Bulk Delete Benchmark
+Per-object delete() with a commit per row versus BaseModel.bulk_delete
+
+Usage (from backend/):
+    python benchmarks/bench_bulk_delete.py --rows 20000 --delete 500
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pagination import seed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--delete', type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_bulk_delete_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app
+    from app.database import db
+    from app.models.expense import Expense
+    from app.services.rollup_service import RollupService
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print(f'Seeding {args.rows:,} expenses...')
+        seed(db, args.rows, users=1)
+        RollupService().rebuild()
+
+        ids = [row.id for row in db.session.query(Expense.id).order_by(Expense.id).limit(2 * args.delete)]
+        per_row, bulk = ids[:args.delete], ids[args.delete:]
+
+        started = time.perf_counter()
+        for expense in Expense.query.filter(Expense.id.in_(per_row)).all():
+            expense.delete()
+        per_row_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        deleted = Expense.bulk_delete(bulk, user_id=1)
+        bulk_seconds = time.perf_counter() - started
+
+        print(f'Deleting {args.delete:,} expenses:')
+        print(f'  delete() per row  {per_row_seconds * 1000:9.1f} ms')
+        print(f'  bulk_delete       {bulk_seconds * 1000:9.1f} ms   ({deleted} rows)')
+        print(f'  rollups consistent: {RollupService().check_consistency() == []}')
+
+if __name__ == '__main__':
+    main()
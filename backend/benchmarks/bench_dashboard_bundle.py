@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Dashboard Bundle Benchmark
+One request per dashboard widget versus a single /api/dashboard/bundle call
+
+Usage (from backend/):
+    python benchmarks/bench_dashboard_bundle.py --rows 50000 --repeat 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pagination import seed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--period', default='year')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_dashboard_bundle_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from flask_jwt_extended import create_access_token
+    from flask_sqlalchemy.record_queries import get_recorded_queries
+    from app import create_app
+    from app.database import db
+    from app.services.dashboard_widgets import WIDGETS
+
+    app = create_app('development')
+    app.config['SQLALCHEMY_ECHO'] = False
+    app.config['SQLALCHEMY_RECORD_QUERIES'] = True
+    app.config['DASHBOARD_CACHE_ENABLED'] = False
+    with app.app_context():
+        db.engine.echo = False
+        db.create_all()
+        print(f'Seeding {args.rows:,} expenses...')
+        seed(db, args.rows, users=1)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+        client = app.test_client()
+
+        def timed(urls):
+            queries = len(get_recorded_queries())
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                for url in urls:
+                    client.get(url, headers=headers)
+            elapsed = (time.perf_counter() - started) / args.repeat * 1000
+            return elapsed, (len(get_recorded_queries()) - queries) // args.repeat
+
+        separate = timed([f'/api/dashboard/{name}?period={args.period}' for name in WIDGETS])
+        bundle = timed([f'/api/dashboard/bundle?period={args.period}'])
+        print(f'{len(WIDGETS)} separate requests {separate[0]:9.2f} ms  {separate[1]:3d} queries')
+        print(f'one bundle request   {bundle[0]:9.2f} ms  {bundle[1]:3d} queries')
+
+        response = client.get(f'/api/dashboard/bundle?period={args.period}', headers=headers).get_json()['data']
+        print(f"\nbundle fetch {response['fetch_ms']:.2f} ms")
+        for name, result in response['widgets'].items():
+            print(f"  {name:<20} {result['elapsed_ms']:8.2f} ms  {result['status']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Dashboard Cache Benchmark
+Latency of dashboard endpoints uncached, from the in-process L1, and from L2
+
+Usage (from backend/):
+    python benchmarks/bench_dashboard_cache.py --rows 50000 --repeat 20
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pagination import seed
+
+ENDPOINTS = ('/api/dashboard/overview', '/api/dashboard/top-merchants', '/api/dashboard/expense-patterns')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_dashboard_cache_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('DASHBOARD_CACHE_REDIS_URL', 'memory://')
+
+    from flask_jwt_extended import create_access_token
+    from app import create_app
+    from app.database import db
+    from app.services.dashboard_cache import LRUCache, get_dashboard_cache
+
+    app = create_app('development')
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.engine.echo = False
+        db.create_all()
+        print(f'Seeding {args.rows:,} expenses...')
+        seed(db, args.rows, users=1)
+        headers = {'Authorization': f'Bearer {create_access_token(identity=1)}'}
+        client = app.test_client()
+        cache = get_dashboard_cache()
+
+        def timed(endpoint, before=None):
+            total = 0.0
+            for _ in range(args.repeat):
+                if before:
+                    before()
+                started = time.perf_counter()
+                client.get(endpoint, headers=headers)
+                total += time.perf_counter() - started
+            return total / args.repeat * 1000
+
+        def disable():
+            app.config['DASHBOARD_CACHE_ENABLED'] = False
+
+        def cold_l1():
+            app.config['DASHBOARD_CACHE_ENABLED'] = True
+            cache.l1 = LRUCache()
+
+        for endpoint in ENDPOINTS:
+            uncached = timed(endpoint, disable)
+            l2 = timed(endpoint, cold_l1)
+            l1 = timed(endpoint)
+            print(f'{endpoint:<34} uncached {uncached:8.2f} ms   L2 {l2:6.2f} ms   L1 {l1:6.2f} ms')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Export Benchmark
+Peak Python memory of the streaming expense export versus loading every row
+
+Usage (from backend/):
+    python benchmarks/bench_export.py --rows 200000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_pagination import seed
+
+def measure(fn):
+    """(seconds, peak traced MB) for one call of ``fn``"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_export_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app
+    from app.database import db
+    from app.models.loading import expense_list_query
+    from app.services.expense_export import ExpenseExport
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        print(f'Seeding {args.rows:,} expenses...')
+        seed(db, args.rows, users=1)
+
+        def load_all():
+            # The previous export: every row as an ORM object, then one document
+            expenses = expense_list_query(1).all()
+            json.dumps({'expenses': [expense.to_dict() for expense in expenses],
+                        'total_amount': sum(expense.amount for expense in expenses)})
+            db.session.expunge_all()
+
+        def stream(format_type):
+            return lambda: sum(len(chunk) for chunk in ExpenseExport(1).stream(format_type))
+
+        print(f'{args.rows:,} rows:')
+        for label, fn in (('load all (json)', load_all), ('stream json', stream('json')),
+                          ('stream ndjson', stream('ndjson')), ('stream csv', stream('csv'))):
+            elapsed, peak_mb = measure(fn)
+            print(f'  {label:<16} {elapsed:7.2f} s   peak {peak_mb:8.1f} MB')
+
+if __name__ == '__main__':
+    main()
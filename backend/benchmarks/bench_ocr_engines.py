@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - OCR Engine Benchmark
+Throughput of each tesseract backend over a batch of preprocessed receipts
+
+pytesseract starts a tesseract process (and reloads eng.traineddata) per
+image; tesseract-api keeps an initialized libtesseract handle in-process.
+
+Usage (from backend/):
+    python benchmarks/bench_ocr_engines.py --receipts 100
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_bulk_ocr import render_receipts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--receipts', type=int, default=100)
+    parser.add_argument('--distinct', type=int, default=10, help='Distinct images rendered and cycled through.')
+    args = parser.parse_args()
+
+    from app.services.ocr_engines import ENGINES
+    from app.services.ocr_service import OCRService, TESSERACT_CONFIG
+
+    paths = render_receipts(tempfile.mkdtemp(prefix='bench_ocr_engines_'), args.distinct)
+    images = [OCRService().preprocess_image(paths[index % len(paths)]) for index in range(args.receipts)]
+    print(f'{args.receipts} receipts ({len(paths)} distinct images)')
+
+    texts = {}
+    for name, engine_class in ENGINES.items():
+        try:
+            engine = engine_class()
+            engine.image_to_string(images[0], config=TESSERACT_CONFIG)  # load the model
+        except Exception as e:
+            print(f'  {name:<14} unavailable: {e}')
+            continue
+
+        started = time.perf_counter()
+        texts[name] = [engine.image_to_string(image, config=TESSERACT_CONFIG) for image in images]
+        elapsed = time.perf_counter() - started
+        print(f'  {name:<14} {elapsed:8.2f} s   {args.receipts / elapsed:8.1f} receipts/s   '
+              f'{elapsed / args.receipts * 1000:8.1f} ms/receipt')
+
+    if len(texts) > 1:
+        results = list(texts.values())
+        same = sum(a.strip() == b.strip() for a, b in zip(results[0], results[1]))
+        print(f'  identical text on {same}/{args.receipts} receipts')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Pagination Benchmark
+Compares OFFSET/LIMIT and keyset pagination on a large expenses table
+
+Usage (from backend/):
+    python benchmarks/bench_pagination.py --rows 1000000 --page 500
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def seed(db, rows, users, batch_size=50000):
+    """Bulk insert synthetic expenses with plain executemany batches"""
+    from app.models.user import User
+    from app.models.category import Category
+    from app.models.expense import Expense
+
+    for index in range(users):
+        db.session.add(User(f'bench{index}@example.com', f'bench{index}', 'Bench', 'User', 'Bench123!'))
+    for name in ('Food & Dining', 'Transportation', 'Shopping', 'Travel', 'Other'):
+        db.session.add(Category(name))
+    db.session.commit()
+
+    rng = random.Random(42)
+    start = date.today() - timedelta(days=5 * 365)
+    now = datetime.utcnow()
+    table = Expense.__table__
+
+    for offset in range(0, rows, batch_size):
+        batch = []
+        for _ in range(min(batch_size, rows - offset)):
+            batch.append({
+                'user_id': rng.randint(1, users),
+                'category_id': rng.randint(1, 5),
+                'description': 'Benchmark expense',
+                'amount': round(rng.uniform(1, 500), 2),
+                'currency': 'USD',
+                'date': start + timedelta(days=rng.randint(0, 5 * 365)),
+                'created_at': now,
+                'updated_at': now
+            })
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--users', type=int, default=1)
+    parser.add_argument('--page', type=int, default=500)
+    parser.add_argument('--per-page', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_pagination_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app
+    from app.database import db
+    from app.models.expense import Expense
+    from app.utils.helpers import paginate_query, paginate_keyset
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        # Keyset seeks need an index matching the sort key
+        db.session.execute(db.text(
+            'CREATE INDEX IF NOT EXISTS bench_expenses_user_date '
+            'ON expenses (user_id, date, created_at, id)'
+        ))
+
+        print(f'Seeding {args.rows:,} expenses for {args.users} user(s)...')
+        started = time.perf_counter()
+        seed(db, args.rows, args.users)
+        db.session.execute(db.text('ANALYZE'))
+        print(f'Seeded in {time.perf_counter() - started:.1f}s')
+
+        sort_columns = (Expense.date, Expense.created_at, Expense.id)
+        query = Expense.query.filter(Expense.user_id == 1)
+        ordered = query.order_by(*[column.desc() for column in sort_columns])
+
+        # Last row of the previous page, as a client would hold it in its cursor
+        boundary = ordered.offset((args.page - 1) * args.per_page - 1).first()
+        after = (boundary.date, boundary.created_at, boundary.id)
+
+        offset_ms = timed(lambda: paginate_query(ordered, page=args.page, per_page=args.per_page), args.repeat)
+        keyset_ms = timed(lambda: paginate_keyset(query, sort_columns, descending=True, after=after,
+                                                  limit=args.per_page), args.repeat)
+        keyset_total_ms = timed(lambda: paginate_keyset(query, sort_columns, descending=True, after=after,
+                                                        limit=args.per_page, with_total=True), args.repeat)
+
+        offset_page = paginate_query(ordered, page=args.page, per_page=args.per_page)['items']
+        keyset_page = paginate_keyset(query, sort_columns, descending=True, after=after,
+                                      limit=args.per_page)['items']
+        assert [e.id for e in offset_page] == [e.id for e in keyset_page], 'pages differ'
+
+        print(f'Page {args.page} ({args.per_page} rows), median of {args.repeat}:')
+        print(f'  offset + count   {offset_ms:9.2f} ms')
+        print(f'  keyset           {keyset_ms:9.2f} ms')
+        print(f'  keyset + total   {keyset_total_ms:9.2f} ms')
+
+if __name__ == '__main__':
+    main()
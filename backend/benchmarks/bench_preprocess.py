@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Image Preprocessing Benchmark
+Per-image latency and peak RSS of OCR preprocessing on phone-sized photos
+
+Each pipeline runs in its own interpreter so peak RSS is not shared.
+"baseline" is the previous PIL round-trip pipeline, kept here for comparison.
+
+Usage (from backend/):
+    python benchmarks/bench_preprocess.py --images 5 --megapixels 12
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+RECEIPT_LINES = [
+    'CORNER MARKET', '123 MAIN ST', 'DATE 03/14/2024',
+    'BREAD          3.49', 'MILK           2.99', 'APPLES         4.25',
+    'SUBTOTAL      10.73', 'TAX            0.86', 'TOTAL         11.59',
+]
+
+def render_photos(directory, count, megapixels):
+    """Write ``count`` 3:4 receipt photos as JPEGs and return their paths"""
+    import cv2
+    import numpy as np
+
+    width = int((megapixels * 1e6 * 3 / 4) ** 0.5)
+    height = width * 4 // 3
+    scale = width / 1000
+
+    paths = []
+    for index in range(count):
+        image = np.full((height, width, 3), 235, dtype=np.uint8)
+        for line_number, line in enumerate(RECEIPT_LINES):
+            cv2.putText(image, line, (int(60 * scale), int((120 + line_number * 140) * scale)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 2.0 * scale, (20, 20, 20), int(4 * scale), cv2.LINE_AA)
+        path = os.path.join(directory, f'photo_{index}.jpg')
+        cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        paths.append(path)
+    return paths
+
+def baseline_preprocess(image_path):
+    """The previous pipeline: BGR -> RGB -> PIL enhancers -> BGR -> gray"""
+    import cv2
+    import numpy as np
+    from PIL import Image, ImageEnhance
+
+    image = cv2.cvtColor(cv2.imread(image_path), cv2.COLOR_BGR2RGB)
+    pil_image = ImageEnhance.Contrast(Image.fromarray(image)).enhance(1.5)
+    pil_image = ImageEnhance.Sharpness(pil_image).enhance(2.0)
+    image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+    threshold = cv2.adaptiveThreshold(blurred, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+    kernel = np.ones((1, 1), np.uint8)
+    processed = cv2.morphologyEx(threshold, cv2.MORPH_CLOSE, kernel)
+    return cv2.morphologyEx(processed, cv2.MORPH_OPEN, kernel)
+
+def run_pipeline(name, paths):
+    """Time one pipeline in this process and print a JSON result line"""
+    from app.services.ocr_service import OCRService
+
+    preprocess = baseline_preprocess if name == 'baseline' else OCRService().preprocess_image
+    import_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    preprocess(paths[0])  # warm imports and OpenCV's thread pool
+
+    latencies = []
+    for path in paths:
+        started = time.perf_counter()
+        output = preprocess(path)
+        latencies.append(time.perf_counter() - started)
+
+    print(json.dumps({
+        'latencies': latencies,
+        'shape': list(output.shape),
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'import_rss_kb': import_rss_kb
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--images', type=int, default=5)
+    parser.add_argument('--megapixels', type=float, default=12.0)
+    parser.add_argument('--run', choices=('baseline', 'current'), help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_pipeline(args.run, args.paths)
+        return
+
+    paths = render_photos(tempfile.mkdtemp(prefix='bench_preprocess_'), args.images, args.megapixels)
+    print(f'{args.images} photos at {args.megapixels:g} MP')
+
+    for name in ('baseline', 'current'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', name, *paths],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        latencies = sorted(result['latencies'])
+        print(f'  {name:<9} median {latencies[len(latencies) // 2] * 1000:8.1f} ms   '
+              f'max {latencies[-1] * 1000:8.1f} ms   peak RSS {result["peak_rss_kb"] / 1024:7.1f} MB '
+              f'(+{(result["peak_rss_kb"] - result["import_rss_kb"]) / 1024:.1f} over imports)   '
+              f'output {result["shape"][1]}x{result["shape"][0]}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Receipt Parser Benchmark
+Times OCRService.parse_receipt_text over the receipt regression corpus
+
+Usage (from backend/):
+    python benchmarks/bench_receipt_parser.py --repeat 2000
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_PATH = os.path.join(os.path.dirname(BACKEND_DIR), 'tests', 'backend', 'data', 'receipt_corpus.json')
+
+sys.path.insert(0, BACKEND_DIR)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000, help='Passes over the corpus.')
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    args = parser.parse_args()
+
+    from app.services.ocr_service import OCRService
+
+    with open(args.corpus) as handle:
+        texts = [case['text'] for case in json.load(handle)]
+    service = OCRService()
+
+    started = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in texts:
+            service.parse_receipt_text(text)
+    elapsed = time.perf_counter() - started
+
+    parsed = len(texts) * args.repeat
+    print(f'{parsed} receipts parsed ({len(texts)} corpus texts x {args.repeat})')
+    print(f'  total        {elapsed * 1000:9.1f} ms')
+    print(f'  per receipt  {elapsed / parsed * 1e6:9.1f} us')
+    print(f'  throughput   {parsed / elapsed:9.0f} receipts/s')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Smart Expense Tracker - Startup Benchmark
+Times create_app() in fresh interpreters with all network access blocked
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter: any socket connect or NLTK download fails the run
+PROBE = r'''
+import json, socket, time
+
+attempts = []
+
+def refuse(*args, **kwargs):
+    attempts.append(repr(args[1:] if args else kwargs))
+    raise OSError('network access blocked during startup')
+
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+socket.create_connection = refuse
+
+started = time.perf_counter()
+import nltk
+nltk.download = refuse
+from app import create_app
+app = create_app()
+with app.app_context():
+    from app.services.model_registry import get_ml_service
+    get_ml_service().preprocess_text('Coffee at the airport')
+elapsed = time.perf_counter() - started
+
+print(json.dumps({'seconds': elapsed, 'network_attempts': attempts}))
+'''
+
+def run_probe():
+    """Run one cold start and return its parsed result"""
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='Fail when the median startup exceeds this budget.')
+    args = parser.parse_args()
+
+    results = [run_probe() for _ in range(args.runs)]
+    attempts = [attempt for result in results for attempt in result['network_attempts']]
+    median = statistics.median(result['seconds'] for result in results)
+
+    print(f'create_app() + first preprocess, median of {args.runs}: {median * 1000:.0f} ms')
+    if attempts:
+        print(f'Network access attempted during startup: {attempts}')
+        raise SystemExit(1)
+    if args.max_seconds is not None and median > args.max_seconds:
+        print(f'Startup exceeded budget of {args.max_seconds:.2f}s')
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
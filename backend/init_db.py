@@ -32,6 +32,11 @@ def init_database():
             db.create_all()
             print('📊 Created database tables')
             
+            # The schema is current; record that so `flask db upgrade` starts from here
+            from flask_migrate import stamp
+            stamp()
+            print('🏷️  Stamped migration head')
+            
             # Import models to ensure they're registered
             from app.models.user import User
             from app.models.category import Category  
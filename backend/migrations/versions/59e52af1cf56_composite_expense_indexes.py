@@ -0,0 +1,40 @@
+"""composite expense indexes
+
+Revision ID: 59e52af1cf56
+Revises: c41d7e2b9a10
+Create Date: 2026-10-17 04:41:06.537417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '59e52af1cf56'
+down_revision = 'c41d7e2b9a10'
+branch_labels = None
+depends_on = None
+
+# (name, columns), matching Expense.__table_args__
+INDEXES = (
+    ('ix_expenses_user_date_created', ['user_id', 'date', 'created_at']),
+    ('ix_expenses_user_category_date', ['user_id', 'category_id', 'date']),
+    ('ix_expenses_user_merchant', ['user_id', 'merchant_name']),
+)
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # Build without holding a write lock on a live expenses table
+        with op.get_context().autocommit_block():
+            for name, columns in INDEXES:
+                op.create_index(name, 'expenses', columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, columns in INDEXES:
+            op.create_index(name, 'expenses', columns, unique=False)
+
+
+def downgrade():
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='expenses')
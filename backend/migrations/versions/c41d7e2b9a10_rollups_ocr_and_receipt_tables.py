@@ -0,0 +1,162 @@
+"""rollups, cache versions, OCR and receipt tables
+
+Revision ID: c41d7e2b9a10
+Revises: aa2f50f4a8a5
+Create Date: 2026-10-17 04:40:52.118604
+
+Existing databases have no rollup rows after this; fill them with
+``flask rollups rebuild`` (and ``flask uploads backfill`` for receipts
+already on disk).
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2b9a10'
+down_revision = 'aa2f50f4a8a5'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('cache_versions',
+    sa.Column('key', sa.String(length=100), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('key')
+    )
+    op.create_table('ocr_cache_entries',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('fingerprint', sa.String(length=32), nullable=False),
+    sa.Column('result', sa.Text(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash', 'fingerprint', name='uq_ocr_cache_hash_fingerprint')
+    )
+    with op.batch_alter_table('ocr_cache_entries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ocr_cache_entries_last_accessed_at'), ['last_accessed_at'], unique=False)
+
+    op.create_table('stored_blobs',
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sha256')
+    )
+    op.create_table('expense_monthly_rollups',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('total_amount', sa.Float(), nullable=False),
+    sa.Column('expense_count', sa.Integer(), nullable=False),
+    sa.Column('min_amount', sa.Float(), nullable=True),
+    sa.Column('max_amount', sa.Float(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'year', 'month', 'category_id', name='uq_expense_monthly_rollups_bucket')
+    )
+    op.create_table('ocr_jobs',
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('file_id', sa.String(length=50), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('file_path', sa.String(length=500), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id')
+    )
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_status'), ['status'], unique=False)
+        batch_op.create_index(batch_op.f('ix_ocr_jobs_user_id'), ['user_id'], unique=False)
+
+    op.create_table('receipt_uploads',
+    sa.Column('file_id', sa.String(length=50), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('path', sa.String(length=500), nullable=False),
+    sa.Column('original_filename', sa.String(length=255), nullable=True),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('mime', sa.String(length=100), nullable=True),
+    sa.Column('ocr_status', sa.String(length=20), nullable=False),
+    sa.Column('ocr_pass', sa.String(length=10), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('file_id')
+    )
+    with op.batch_alter_table('receipt_uploads', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_receipt_uploads_path'), ['path'], unique=False)
+        batch_op.create_index(batch_op.f('ix_receipt_uploads_sha256'), ['sha256'], unique=False)
+        batch_op.create_index('ix_receipt_uploads_user_created', ['user_id', 'created_at'], unique=False)
+
+    # Existing rows get the model defaults
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('failed_login_attempts', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_login_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('merchant_name', sa.String(length=255), nullable=True))
+        batch_op.add_column(sa.Column('receipt_upload_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('receipt_image_path', sa.String(length=500), nullable=True))
+        batch_op.add_column(sa.Column('created_by_ai', sa.Boolean(), server_default=sa.false(), nullable=False))
+        batch_op.add_column(sa.Column('ai_confidence_score', sa.Float(), nullable=True))
+        batch_op.create_foreign_key('fk_expenses_receipt_upload_id', 'receipt_uploads', ['receipt_upload_id'], ['id'])
+        batch_op.create_index(batch_op.f('ix_expenses_receipt_upload_id'), ['receipt_upload_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('expenses', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_expenses_receipt_upload_id'))
+        batch_op.drop_constraint('fk_expenses_receipt_upload_id', type_='foreignkey')
+        batch_op.drop_column('ai_confidence_score')
+        batch_op.drop_column('created_by_ai')
+        batch_op.drop_column('receipt_image_path')
+        batch_op.drop_column('receipt_upload_id')
+        batch_op.drop_column('merchant_name')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('last_login_at')
+        batch_op.drop_column('failed_login_attempts')
+
+    with op.batch_alter_table('receipt_uploads', schema=None) as batch_op:
+        batch_op.drop_index('ix_receipt_uploads_user_created')
+        batch_op.drop_index(batch_op.f('ix_receipt_uploads_sha256'))
+        batch_op.drop_index(batch_op.f('ix_receipt_uploads_path'))
+
+    op.drop_table('receipt_uploads')
+    with op.batch_alter_table('ocr_jobs', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_user_id'))
+        batch_op.drop_index(batch_op.f('ix_ocr_jobs_status'))
+
+    op.drop_table('ocr_jobs')
+    op.drop_table('expense_monthly_rollups')
+    op.drop_table('stored_blobs')
+    with op.batch_alter_table('ocr_cache_entries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ocr_cache_entries_last_accessed_at'))
+
+    op.drop_table('ocr_cache_entries')
+    op.drop_table('cache_versions')
@@ -24,14 +24,12 @@ INSERT INTO categories (name, description, color, icon, is_system, sort_order) V
 ('Other', 'Other miscellaneous expenses', '#D3D3D3', '📋', true, 10);
 */
 
--- Create indexes for better performance (SQLAlchemy will handle this)
-/*
-CREATE INDEX IF NOT EXISTS idx_expenses_user_id ON expenses(user_id);
-CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date);
-CREATE INDEX IF NOT EXISTS idx_expenses_category_id ON expenses(category_id);
-CREATE INDEX IF NOT EXISTS idx_expenses_amount ON expenses(amount);
-CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
-*/
+-- Tables and indexes come from the Alembic migrations in backend/migrations:
+--   cd backend && FLASK_APP=run.py flask db upgrade
+-- A database created before the migrations existed (users, categories and
+-- expenses only) is marked as the baseline and upgraded, then the new
+-- rollup and upload tables are filled from the existing data:
+--   flask db stamp aa2f50f4a8a5 && flask db upgrade
+--   flask rollups rebuild && flask uploads backfill
 
 -- Database initialization complete
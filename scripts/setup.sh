@@ -37,6 +37,9 @@ if [ ! -f .env ]; then
     cp .env.example .env || echo "⚠️  Please create .env file manually"
 fi
 
+# Vendor NLTK corpora (optional; a pure-Python fallback is used without them)
+python -m nltk.downloader -d ml_models/nltk_data punkt stopwords wordnet || echo "⚠️  NLTK data not downloaded, using fallback tokenizer"
+
 # Train ML models
 echo "🤖 Training ML models..."
 cd ml_models
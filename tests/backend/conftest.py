@@ -0,0 +1,61 @@
+"""
+Smart Expense Tracker - Shared Test Fixtures
+"""
+
+import pytest
+from contextlib import contextmanager
+from flask_jwt_extended import create_access_token
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from app import create_app
+from app.database import db
+from app.models.user import User
+from app.models.category import Category
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def user_and_categories(app):
+    user = User(email='roll@example.com', username='roll', first_name='Roll',
+                last_name='Up', password='TestPassword123!')
+    food = Category(name='Food & Dining')
+    travel = Category(name='Travel')
+    db.session.add_all([user, food, travel])
+    db.session.commit()
+    return user, food, travel
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+@pytest.fixture
+def auth_headers(user_and_categories):
+    user = user_and_categories[0]
+    return {'Authorization': f'Bearer {create_access_token(identity=user.id)}'}
+
+# Upper bound on SQL statements a single API request may issue
+MAX_QUERIES_PER_REQUEST = 8
+
+@pytest.fixture
+def query_budget(app):
+    """Fail when a block issues more SQL statements than allowed.
+
+    Relies on SQLALCHEMY_RECORD_QUERIES; requests made by the test client
+    share the fixture's app context, so their statements are recorded too.
+    """
+    @contextmanager
+    def budget(limit=MAX_QUERIES_PER_REQUEST):
+        start = len(get_recorded_queries())
+        recorded = []
+        yield recorded
+        recorded.extend(get_recorded_queries()[start:])
+        statements = '\n'.join(query.statement for query in recorded)
+        assert len(recorded) <= limit, f'{len(recorded)} queries issued (limit {limit}):\n{statements}'
+
+    return budget
@@ -0,0 +1,81 @@
+"""
+Smart Expense Tracker - Aggregation Tests
+Unit tests for the time-bucketed aggregation service
+"""
+
+import pytest
+from datetime import date
+from app.database import db
+from app.models.expense import Expense
+from app.services.aggregation import ExpenseAggregator, truncate_date
+
+@pytest.fixture
+def expenses(user_and_categories):
+    user, food, travel = user_and_categories
+    rows = [
+        (food, 'Lunch', 10.0, date(2024, 1, 31), 'Cafe'),
+        (food, 'Dinner', 20.0, date(2024, 2, 1), 'Cafe'),
+        (travel, 'Train', 5.0, date(2024, 2, 29), 'Rail'),
+        (travel, 'Hotel', 100.0, date(2024, 4, 7), None),
+    ]
+    for category, description, amount, expense_date, merchant in rows:
+        expense = Expense(user.id, category.id, description, amount, date=expense_date)
+        expense.merchant_name = merchant
+        db.session.add(expense)
+    db.session.commit()
+    return user, food, travel
+
+def test_truncate_date():
+    """Test bucket start calculation for every granularity"""
+    value = date(2024, 8, 15)  # Thursday
+    assert truncate_date(value, 'day') == value
+    assert truncate_date(value, 'week') == date(2024, 8, 12)
+    assert truncate_date(value, 'month') == date(2024, 8, 1)
+    assert truncate_date(value, 'quarter') == date(2024, 7, 1)
+    assert truncate_date(value, 'year') == date(2024, 1, 1)
+
+def test_monthly_buckets_are_filled_and_match_raw_query(expenses):
+    """Test rollup-backed and raw GROUP BY paths return the same filled buckets"""
+    user, food, travel = expenses
+    aggregator = ExpenseAggregator()
+
+    from_rollups = aggregator.aggregate(user.id, date(2024, 1, 1), date(2024, 5, 1), 'month', 'category')
+    from_expenses = aggregator._query_expenses(user.id, date(2024, 1, 1), date(2024, 5, 1), 'month', 'category')
+
+    assert [bucket['period_start'] for bucket in from_rollups] == [
+        date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1)
+    ]
+    assert [bucket['total_amount'] for bucket in from_rollups] == [10.0, 25.0, 0.0, 100.0]
+    assert from_rollups[1]['groups'] == {
+        food.id: {'total_amount': 20.0, 'expense_count': 1},
+        travel.id: {'total_amount': 5.0, 'expense_count': 1}
+    }
+    assert sorted(from_expenses) == sorted([
+        (date(2024, 1, 1), food.id, 10.0, 1),
+        (date(2024, 2, 1), food.id, 20.0, 1),
+        (date(2024, 2, 1), travel.id, 5.0, 1),
+        (date(2024, 4, 1), travel.id, 100.0, 1)
+    ])
+
+@pytest.mark.parametrize('granularity, expected', [
+    ('week', {date(2024, 1, 29): 30.0, date(2024, 2, 26): 5.0, date(2024, 4, 1): 100.0}),
+    ('quarter', {date(2024, 1, 1): 35.0, date(2024, 4, 1): 100.0}),
+    ('year', {date(2024, 1, 1): 135.0}),
+])
+def test_sql_truncation_matches_python(expenses, granularity, expected):
+    """Test dialect date truncation agrees with the Python bucket boundaries"""
+    user, _, _ = expenses
+    buckets = ExpenseAggregator().aggregate(user.id, date(2024, 1, 10), date(2024, 6, 30), granularity)
+
+    totals = {bucket['period_start']: bucket['total_amount'] for bucket in buckets if bucket['expense_count']}
+    assert totals == expected
+
+def test_group_by_merchant(expenses):
+    """Test grouping by merchant name in a single query"""
+    user, _, _ = expenses
+    buckets = ExpenseAggregator().aggregate(user.id, date(2024, 2, 1), date(2024, 3, 1), 'month', 'merchant')
+
+    assert buckets[0]['groups'] == {
+        'Cafe': {'total_amount': 20.0, 'expense_count': 1},
+        'Rail': {'total_amount': 5.0, 'expense_count': 1}
+    }
@@ -0,0 +1,80 @@
+"""
+Smart Expense Tracker - Category Registry Tests
+Unit tests for the cached category registry and its invalidation
+"""
+
+from flask import g
+from app.database import db
+from app.models.category import Category
+from app.models.cache_version import CacheVersion, CATEGORIES_VERSION_KEY, get_version
+from app.services.category_registry import get_category_registry
+
+def test_category_writes_bump_version(user_and_categories):
+    """Test inserts, updates and deletes each bump the stamp once per flush"""
+    _, food, _ = user_and_categories
+    version = get_version(CATEGORIES_VERSION_KEY)
+    assert version > 0
+
+    food.color = '#000000'
+    db.session.commit()
+    assert get_version(CATEGORIES_VERSION_KEY) == version + 1
+
+    db.session.delete(food)
+    db.session.commit()
+    assert get_version(CATEGORIES_VERSION_KEY) == version + 2
+
+def test_registry_reloads_on_version_change(user_and_categories):
+    """Test lookups are served from memory until another worker bumps the stamp"""
+    _, food, _ = user_and_categories
+    registry = get_category_registry()
+
+    assert registry.get_by_name('Travel').name == 'Travel'
+    assert registry.get(food.id).id == food.id
+    assert registry.get_by_name('Missing') is None
+
+    # Simulate a write committed by another worker process, bypassing this
+    # process's ORM hooks
+    categories = Category.__table__
+    db.session.execute(categories.update().where(categories.c.name == 'Travel').values(is_active=False))
+    db.session.query(CacheVersion).filter_by(key=CATEGORIES_VERSION_KEY).update(
+        {'version': CacheVersion.version + 1}
+    )
+    db.session.commit()
+    assert registry.get_by_name('Travel') is not None
+
+    g.pop('_category_registry_checked', None)
+    assert registry.get_by_name('Travel') is None
+    assert registry.get_by_name('Travel', active_only=False).is_active is False
+
+def test_categories_endpoint_etag(client, auth_headers):
+    """Test conditional requests return 304 until the category list changes"""
+    response = client.get('/api/expenses/categories', headers=auth_headers)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert [c['name'] for c in response.get_json()['data']['categories']] == ['Food & Dining', 'Travel']
+
+    cached = client.get('/api/expenses/categories', headers={**auth_headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+
+    db.session.add(Category(name='Other'))
+    db.session.commit()
+
+    fresh = client.get('/api/categories', headers={'If-None-Match': etag})
+    assert fresh.status_code == 200
+    assert fresh.headers['ETag'] != etag
+    assert len(fresh.get_json()['data']) == 3
+
+def test_uncommitted_categories_never_reach_the_shared_snapshot(app, user_and_categories):
+    """Test a flushed-then-rolled-back Category is only visible to its own transaction"""
+    registry = get_category_registry()
+    assert [category.name for category in registry.all()] == ['Food & Dining', 'Travel']
+
+    db.session.add(Category(name='Phantom'))
+    db.session.flush()
+    assert registry.get_by_name('Phantom') is not None  # the writer sees its own row
+    db.session.rollback()
+
+    with app.test_request_context():
+        assert [category.name for category in registry.all()] == ['Food & Dining', 'Travel']
+    assert registry.get_by_name('Phantom') is None
+    assert registry._snapshot['version'] == get_version(CATEGORIES_VERSION_KEY)
@@ -0,0 +1,107 @@
+"""
+Smart Expense Tracker - Dashboard Bundle Tests
+Unit tests for the combined dashboard endpoint and its shared data fetch
+"""
+
+import pytest
+from datetime import date, timedelta
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from werkzeug.datastructures import MultiDict
+from app.database import db
+from app.models.expense import Expense
+from app.services.dashboard_data import DashboardData
+from app.services.dashboard_widgets import WIDGETS, compute_widget
+
+@pytest.fixture
+def expenses(app, user_and_categories):
+    app.config['DASHBOARD_CACHE_ENABLED'] = False
+    user, food, travel = user_and_categories
+    today = date.today()
+    for offset in range(0, 200, 5):
+        category = food if offset % 2 else travel
+        expense = Expense(user.id, category.id, f'Expense {offset}', 10.0 + offset, date=today - timedelta(days=offset))
+        expense.merchant_name = ['Cafe', 'Airline', 'Market'][offset % 3]
+        db.session.add(expense)
+    db.session.commit()
+
+def get(client, auth_headers, url):
+    response = client.get(url, headers=auth_headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def test_bundle_matches_single_routes_with_fewer_queries(client, auth_headers, expenses):
+    """Test every widget in the bundle returns what its own route returns, in fewer statements"""
+    start = len(get_recorded_queries())
+    singles = {name: get(client, auth_headers, f'/api/dashboard/{name}?period=year')['data'] for name in WIDGETS}
+    separate_queries = len(get_recorded_queries()) - start
+
+    start = len(get_recorded_queries())
+    bundle = get(client, auth_headers, '/api/dashboard/bundle?period=year')['data']
+    bundle_queries = len(get_recorded_queries()) - start
+
+    assert set(bundle['widgets']) == set(WIDGETS)
+    for name, result in bundle['widgets'].items():
+        assert result['status'] == 'success'
+        assert result['data'] == singles[name], name
+        assert result['elapsed_ms'] >= 0
+    assert bundle['fetch_ms'] >= 0 and bundle['elapsed_ms'] >= bundle['fetch_ms']
+    assert bundle_queries < separate_queries / 2
+
+def test_per_widget_params_override_shared_ones(client, auth_headers, expenses):
+    """Test ``<widget>.<param>`` applies to one widget and plain params to all"""
+    bundle = get(client, auth_headers,
+                 '/api/dashboard/bundle?widgets=top-merchants,spending-trends,category-analysis'
+                 '&period=year&top-merchants.limit=2&top-merchants.period=week&spending-trends.months=3')
+    widgets = bundle['data']['widgets']
+
+    assert set(widgets) == {'top-merchants', 'spending-trends', 'category-analysis'}
+    assert widgets['top-merchants']['data'] == get(
+        client, auth_headers, '/api/dashboard/top-merchants?limit=2&period=week')['data']
+    assert len(widgets['spending-trends']['data']['trends']) == 3
+    assert widgets['category-analysis']['data']['period'] == 'year'
+
+def test_unknown_widget_is_rejected(client, auth_headers, expenses):
+    """Test a bundle naming an unknown widget fails with 400"""
+    response = client.get('/api/dashboard/bundle?widgets=overview,nope', headers=auth_headers)
+    assert response.status_code == 400
+    assert 'nope' in response.get_json()['message']
+
+def test_expense_patterns_aggregate_in_one_query(app, user_and_categories, expenses, query_budget):
+    """Test the SQL weekday/day-of-month groups match aggregating the loaded rows"""
+    user_id = user_and_categories[0].id
+    args = MultiDict({'period': 'all'})
+
+    with query_budget(limit=1) as recorded:
+        _, from_sql = compute_widget('expense-patterns', user_id, args)
+    assert 'GROUP BY' in recorded[0].statement
+
+    data = DashboardData(user_id)
+    data.prefetch(None)
+    _, from_rows = compute_widget('expense-patterns', user_id, args, data=data)
+    assert from_sql == from_rows
+    assert sum(day['transaction_count'] for day in from_sql['patterns']['day_of_week']) == 40
+
+def test_overview_for_all_falls_back_to_month(client, auth_headers, expenses):
+    """Test the overview has no all-time view: period=all and unknown periods mean the current month"""
+    def overview(url):
+        result = get(client, auth_headers, url)['data']['overview']
+        return {**result, 'summary': {**result['summary'], 'period': None}}
+
+    month = overview('/api/dashboard/overview?period=month')
+    assert month['summary']['total_count'] > 0
+    for period in ('all', 'bogus'):
+        assert overview(f'/api/dashboard/overview?period={period}') == month
+
+    bundle = get(client, auth_headers, '/api/dashboard/bundle?widgets=overview,category-analysis&period=all')
+    result = bundle['data']['widgets']['overview']['data']['overview']
+    assert result['summary']['period'] == 'all'
+    assert {**result, 'summary': {**result['summary'], 'period': None}} == month
+
+def test_oversized_months_do_not_fail_the_bundle(client, auth_headers, expenses):
+    """Test a span too long for the shared prefetch gives the same result as the single route"""
+    single = get(client, auth_headers, '/api/dashboard/monthly-comparison?months=30000')['data']
+    bundle = get(client, auth_headers, '/api/dashboard/bundle?widgets=monthly-comparison,overview&months=30000')
+    widgets = bundle['data']['widgets']
+
+    assert widgets['monthly-comparison'] == {**widgets['monthly-comparison'], 'status': 'success', 'data': single}
+    assert widgets['overview']['status'] == 'success'
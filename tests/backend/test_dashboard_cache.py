@@ -0,0 +1,65 @@
+"""
+Smart Expense Tracker - Dashboard Cache Tests
+Unit tests for the two-level dashboard cache and its per-user invalidation
+"""
+
+from datetime import date
+from app.models.expense import Expense
+from app.models.cache_version import get_version, user_data_key
+from app.services.dashboard_cache import LRUCache, get_dashboard_cache
+
+def overview(client, auth_headers):
+    response = client.get('/api/dashboard/overview?period=year', headers=auth_headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_overview_served_from_cache_until_data_changes(client, auth_headers, user_and_categories, query_budget):
+    """Test repeat views skip the analysis and an expense write invalidates them"""
+    user, food, _ = user_and_categories
+    Expense(user.id, food.id, 'Lunch', 12.5, date=date.today()).save()
+    cache = get_dashboard_cache()
+
+    first = overview(client, auth_headers)
+    with query_budget(limit=1):
+        second = overview(client, auth_headers)  # only the data version lookup
+    assert second['data'] == first['data']
+    assert cache.stats['l1_hits'] == 1
+
+    Expense(user.id, food.id, 'Dinner', 30.0, date=date.today()).save()
+    assert overview(client, auth_headers)['data'] != first['data']
+    assert cache.stats['misses'] == 2
+
+    # A fresh worker's empty L1 is filled from Redis
+    cache.l1 = LRUCache()
+    overview(client, auth_headers)
+    assert cache.stats['l2_hits'] == 1
+
+def test_expense_writes_bump_only_their_users_version(app, user_and_categories):
+    """Test flushes and bulk statements bump the data version of the users they touch"""
+    user, food, _ = user_and_categories
+    version = get_version(user_data_key(user.id))
+
+    expense = Expense(user.id, food.id, 'Lunch', 12.5, date=date(2024, 3, 1)).save()
+    assert get_version(user_data_key(user.id)) == version + 1
+
+    expense.notes = 'team lunch'
+    expense.save()
+    assert get_version(user_data_key(user.id)) == version + 2
+
+    Expense.bulk_update([expense.id], {'merchant_name': 'Cafe'})
+    Expense.bulk_delete([expense.id], user_id=user.id)
+    assert get_version(user_data_key(user.id)) == version + 4
+    assert get_version(user_data_key(user.id + 1)) == 0
+
+def test_lru_evicts_oldest_and_expired():
+    """Test the L1 keeps the most recently used entries within size and TTL"""
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1
+    cache.set('c', 3)
+    assert (cache.get('a'), cache.get('b'), cache.get('c')) == (1, None, 3)
+
+    cache.ttl = -1
+    cache.set('d', 4)
+    assert cache.get('d') is None
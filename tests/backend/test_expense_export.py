@@ -0,0 +1,82 @@
+"""
+Smart Expense Tracker - Expense Export Tests
+Unit tests for the streaming dashboard export
+"""
+
+import csv
+import gzip
+import json
+import pytest
+from datetime import date
+from app.database import db
+from app.models.expense import Expense
+from app.services.expense_export import ExpenseExport
+
+@pytest.fixture
+def expenses(user_and_categories):
+    user, food, travel = user_and_categories
+    rows = [
+        Expense(user.id, food.id, 'Lunch, with "team"', 12.5, date=date(2024, 3, 1)),
+        Expense(user.id, travel.id, 'Train', 30.0, date=date(2024, 3, 5)),
+        Expense(user.id, food.id, 'Coffee', 4.25, date=date(2024, 2, 20)),
+    ]
+    db.session.add_all(rows)
+    db.session.commit()
+    return rows
+
+def export(client, auth_headers, query=''):
+    response = client.get(f'/api/dashboard/export-data{query}', headers=auth_headers)
+    assert response.status_code == 200 and response.is_streamed
+    return response
+
+def test_json_export_keeps_response_shape(client, auth_headers, expenses):
+    """Test the default JSON export streams the same document as before"""
+    body = export(client, auth_headers).get_json()
+
+    export_data = body['data']['export_data']
+    assert body['status'] == 'success'
+    assert export_data['total_expenses'] == 3
+    assert export_data['summary']['total_amount'] == 46.75
+    assert export_data['expenses'][0] == expenses[1].to_dict()
+    assert [row['description'] for row in export_data['expenses']] == ['Train', 'Lunch, with "team"', 'Coffee']
+
+def test_csv_and_ndjson_exports(client, auth_headers, expenses):
+    """Test CSV and NDJSON downloads carry every row, NDJSON ending with the summary"""
+    response = export(client, auth_headers, '?format=csv')
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename="expenses-all-')
+    rows = list(csv.DictReader(response.get_data(as_text=True).splitlines()))
+    assert [row['description'] for row in rows] == ['Train', 'Lunch, with "team"', 'Coffee']
+    assert rows[0]['category_name'] == 'Travel' and rows[0]['amount'] == '30.0'
+
+    lines = export(client, auth_headers, '?format=ndjson').get_data(as_text=True).splitlines()
+    records = [json.loads(line) for line in lines]
+    assert records[2] == expenses[2].to_dict()
+    assert records[3]['summary']['total_expenses'] == 3
+    assert records[3]['summary']['total_amount'] == 46.75
+
+    response = client.get('/api/dashboard/export-data?format=xml', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_gzip_export_matches_plain(client, auth_headers, expenses):
+    """Test gzip output decompresses to the uncompressed stream"""
+    plain = export(client, auth_headers, '?format=csv').get_data()
+    response = export(client, auth_headers, '?format=csv&gzip=true')
+
+    assert response.mimetype == 'application/gzip'
+    assert response.headers['Content-Disposition'].endswith('.csv.gz"')
+    assert gzip.decompress(response.get_data()) == plain
+
+def test_export_streams_in_bounded_chunks(app, user_and_categories):
+    """Test many rows are written as several chunks rather than one document"""
+    user, food, _ = user_and_categories
+    db.session.add_all([Expense(user.id, food.id, f'Item {index}', 1.0, date=date(2024, 1, 1))
+                        for index in range(500)])
+    db.session.commit()
+
+    exporter = ExpenseExport(user.id, batch_size=50, chunk_bytes=4096)
+    chunks = list(exporter.stream('ndjson'))
+
+    assert len(chunks) > 5
+    assert max(len(chunk) for chunk in chunks) < 2 * 4096
+    assert exporter.count == 500 and exporter.total_amount == 500.0
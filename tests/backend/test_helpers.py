@@ -0,0 +1,63 @@
+"""
+Smart Expense Tracker - Helper Tests
+Unit tests for pagination helpers
+"""
+
+import json
+import base64
+import pytest
+from datetime import date, datetime
+from app.database import db
+from app.models.expense import Expense
+from app.utils.helpers import paginate_keyset, encode_cursor, decode_cursor
+
+def test_cursor_round_trip():
+    """Test cursor tokens decode back to typed sort values"""
+    values = (date(2024, 3, 1), datetime(2024, 3, 1, 12, 30, 0, 123456), 42)
+    token = encode_cursor('date', 'desc', values)
+
+    assert decode_cursor(token, 'date', 'desc', (date, datetime, int)) == list(values)
+
+    with pytest.raises(ValueError):
+        decode_cursor(token, 'amount', 'desc', (float, int))
+    with pytest.raises(ValueError):
+        decode_cursor('not-a-cursor', 'date', 'desc', (date, datetime, int))
+
+@pytest.mark.parametrize('values', [5, {'a': 1}, [5, 1, 2], ['2024-03-01', {}, 1], ['x', 'y', 'z']])
+def test_tampered_cursor_values_raise_value_error(values):
+    """Test decodable tokens with wrongly typed values are rejected as invalid"""
+    payload = json.dumps({'s': 'date', 'o': 'desc', 'v': values}).encode()
+    token = base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    with pytest.raises(ValueError):
+        decode_cursor(token, 'date', 'desc', (date, datetime, int))
+
+def test_tampered_cursor_returns_400(client, auth_headers):
+    """Test the expense list answers a bad cursor with 400, not 500"""
+    token = base64.urlsafe_b64encode(b'{"s":"date","o":"desc","v":5}').decode()
+    response = client.get(f'/api/expenses?cursor={token}', headers=auth_headers)
+    assert response.status_code == 400
+
+def test_keyset_pages_match_offset_order(user_and_categories):
+    """Test walking keyset pages visits every row once in sort order"""
+    user, food, _ = user_and_categories
+    for index in range(7):
+        db.session.add(Expense(user.id, food.id, f'Item {index}', 10.0 + index % 3, date=date(2024, 1, 1)))
+    db.session.commit()
+
+    sort_columns = (Expense.amount, Expense.id)
+    query = Expense.query.filter_by(user_id=user.id)
+    expected = [e.id for e in query.order_by(Expense.amount.desc(), Expense.id.desc())]
+
+    seen = []
+    after = None
+    while True:
+        page = paginate_keyset(query, sort_columns, descending=True, after=after, limit=3, with_total=True)
+        seen.extend(e.id for e in page['items'])
+        assert page['pagination']['total'] == 7
+        if not page['pagination']['has_next']:
+            break
+        last = page['items'][-1]
+        after = (last.amount, last.id)
+
+    assert seen == expected
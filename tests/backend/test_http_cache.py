@@ -0,0 +1,68 @@
+"""
+Smart Expense Tracker - HTTP Cache Tests
+Unit tests for ETag / If-None-Match handling on per-user reads
+"""
+
+import pytest
+from datetime import date
+from app.database import db
+from app.models.expense import Expense
+
+ENDPOINTS = [
+    '/api/expenses?limit=20',
+    '/api/expenses/stats',
+    '/api/dashboard/overview',
+    '/api/dashboard/top-merchants',
+    '/api/dashboard/export-data?format=csv',
+]
+
+@pytest.fixture
+def expense(user_and_categories):
+    user, food, _ = user_and_categories
+    return Expense(user.id, food.id, 'Lunch', 12.5, date=date.today()).save()
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_matching_etag_returns_304_without_work(client, auth_headers, expense, query_budget, endpoint):
+    """Test a revalidation costs one version lookup and sends no body"""
+    response = client.get(endpoint, headers=auth_headers)
+    response.get_data()
+    etag = response.headers['ETag']
+    assert response.status_code == 200 and not response.headers['ETag'].startswith('W/')
+
+    with query_budget(limit=1):
+        cached = client.get(endpoint, headers={**auth_headers, 'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.get_data() == b''
+    assert cached.headers['ETag'] == etag
+
+def test_etag_changes_with_data_params_and_categories(client, auth_headers, expense, user_and_categories):
+    """Test expense writes, category renames and different parameters all change the tag"""
+    _, food, _ = user_and_categories
+
+    def etag(query=''):
+        return client.get(f'/api/expenses/stats{query}', headers=auth_headers).headers['ETag']
+
+    first = etag()
+    assert etag() == first
+    assert etag('?period=year') != first
+
+    expense.amount = 20.0
+    expense.save()
+    second = etag()
+    assert second != first
+
+    food.name = 'Food'
+    db.session.commit()
+    assert etag() != second
+
+def test_hit_rate_counters(client, auth_headers, expense):
+    """Test the per-route counters report the share of 304 answers"""
+    etag = client.get('/api/dashboard/overview', headers=auth_headers).headers['ETag']
+    for _ in range(3):
+        client.get('/api/dashboard/overview', headers={**auth_headers, 'If-None-Match': etag})
+
+    assert client.get('/api/cache/stats').status_code == 401
+    stats = client.get('/api/cache/stats', headers=auth_headers).get_json()['data']
+    assert stats['conditional_reads']['dashboard.get_dashboard_overview'] == {
+        'requests': 4, 'not_modified': 3, 'hit_rate': 0.75
+    }
@@ -0,0 +1,131 @@
+"""
+Smart Expense Tracker - Index and Migration Tests
+Route queries must be served by an index, and the migrations must match the models
+"""
+
+import os
+import re
+import pytest
+from datetime import date, timedelta
+from flask_migrate import upgrade, downgrade
+from flask_sqlalchemy.record_queries import get_recorded_queries
+from alembic.migration import MigrationContext
+from alembic.autogenerate import compare_metadata
+from sqlalchemy import inspect, text
+from app import create_app
+from app.config import config
+from app.database import db
+from app.models.expense import Expense
+
+# Routes whose queries read the expenses table
+ENDPOINTS = [
+    '/api/expenses',
+    '/api/expenses?limit=50',
+    '/api/expenses?sort_by=category&limit=50',
+    '/api/expenses?category_id=1&start_date=2024-01-01',
+    '/api/expenses/stats',
+    '/api/dashboard/overview',
+    '/api/dashboard/category-analysis',
+    '/api/dashboard/top-merchants',
+    '/api/dashboard/export-data?format=csv',
+]
+
+POSTGRES_URL = os.environ.get('TEST_POSTGRES_URL')
+
+@pytest.fixture(params=['sqlite', 'postgresql'])
+def app(request, monkeypatch):
+    """The app on in-memory SQLite, and on PostgreSQL when TEST_POSTGRES_URL is set"""
+    if request.param == 'postgresql':
+        if not POSTGRES_URL:
+            pytest.skip('TEST_POSTGRES_URL is not set')
+        monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', POSTGRES_URL)
+
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def explain(statement, parameters):
+    """Query plan lines of a recorded statement on the current connection"""
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        # Tiny test tables are cheapest to scan; make the planner show what it would use at scale
+        connection.exec_driver_sql('SET LOCAL enable_seqscan = off')
+        return [row[0] for row in connection.exec_driver_sql('EXPLAIN ' + statement, parameters)]
+    return [row[-1] for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters)]
+
+def full_scans(plan):
+    """Plan lines that read every row of the expenses table"""
+    return [line for line in plan
+            if 'Seq Scan on expenses' in line
+            or (line.startswith('SCAN expenses') and 'INDEX' not in line)]
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_route_queries_use_an_index(client, auth_headers, user_and_categories, endpoint):
+    """Test every statement a route runs against expenses is served by an index"""
+    user, food, travel = user_and_categories
+    for index in range(30):
+        expense = Expense(user.id, (food, travel)[index % 2].id, f'Expense {index}', 5.0 + index,
+                          date=date.today() - timedelta(days=index))
+        expense.merchant_name = f'Merchant {index % 4}'
+        db.session.add(expense)
+    db.session.commit()
+
+    start = len(get_recorded_queries())
+    response = client.get(endpoint, headers=auth_headers)
+    response.get_data()
+    assert response.status_code == 200
+
+    queries = [query for query in get_recorded_queries()[start:]
+               if re.search(r'\b(FROM|JOIN) expenses\b', query.statement)]
+    assert queries, f'{endpoint} issued no expense queries'
+
+    for query in queries:
+        plan = explain(query.statement, query.parameters)
+        assert not full_scans(plan), f'{query.statement}\n' + '\n'.join(plan)
+        assert any('ix_expenses_' in line or 'expenses_pkey' in line
+                   or line.startswith('SEARCH expenses USING INTEGER PRIMARY KEY') for line in plan), '\n'.join(plan)
+
+def test_migrations_match_models(tmp_path, monkeypatch):
+    """Test upgrading an empty database yields the model schema, and downgrading removes it"""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'migrated.db'}")
+    app = create_app('testing')
+
+    with app.app_context():
+        upgrade()
+        with db.engine.connect() as connection:
+            assert compare_metadata(MigrationContext.configure(connection), db.metadata) == []
+            indexes = {index['name'] for index in inspect(connection).get_indexes('expenses')}
+        assert {'ix_expenses_user_date_created', 'ix_expenses_user_category_date',
+                'ix_expenses_user_merchant'} <= indexes
+
+        downgrade(revision='base')
+        assert inspect(db.engine).get_table_names() == ['alembic_version']
+
+def test_upgrade_from_pre_migration_schema(tmp_path, monkeypatch):
+    """Test a database from before the migrations keeps its rows and gains the new tables and columns"""
+    monkeypatch.setattr(config['testing'], 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'legacy.db'}")
+    app = create_app('testing')
+
+    with app.app_context():
+        upgrade(revision='aa2f50f4a8a5')
+        assert set(inspect(db.engine).get_table_names()) == {'alembic_version', 'users', 'categories', 'expenses'}
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO users (id, email, username, first_name, last_name, password_hash, is_active, created_at, updated_at) "
+                "VALUES (1, 'old@example.com', 'old', 'Old', 'User', 'x', 1, '2024-01-01', '2024-01-01')"))
+            connection.execute(text(
+                "INSERT INTO categories (id, name, color, icon, is_active, is_system, created_at, updated_at) "
+                "VALUES (1, 'Food', '#fff', 'x', 1, 0, '2024-01-01', '2024-01-01')"))
+            connection.execute(text(
+                "INSERT INTO expenses (id, user_id, category_id, description, amount, currency, date, created_at, updated_at) "
+                "VALUES (1, 1, 1, 'Lunch', 12.5, 'USD', '2024-01-02', '2024-01-02', '2024-01-02')"))
+
+        upgrade()
+        expense = db.session.get(Expense, 1)
+        assert (expense.amount, expense.created_by_ai, expense.merchant_name) == (12.5, False, None)
+        assert expense.user.failed_login_attempts == 0
+        assert {'expense_monthly_rollups', 'ocr_jobs', 'receipt_uploads', 'stored_blobs'} <= set(
+            inspect(db.engine).get_table_names())
@@ -0,0 +1,81 @@
+"""
+Smart Expense Tracker - ML Service Tests
+Unit tests for batch category prediction
+"""
+
+from sklearn.pipeline import Pipeline
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.feature_extraction.text import TfidfVectorizer
+from app.services.ml_service import MLService
+
+TRAINING = [
+    ('Starbucks coffee', 'Food & Dining'), ('Pizza dinner', 'Food & Dining'),
+    ('Burger lunch', 'Food & Dining'), ('Uber ride airport', 'Transportation'),
+    ('Gas station fuel', 'Transportation'), ('Metro train ticket', 'Transportation'),
+    ('Netflix subscription', 'Entertainment'), ('Cinema movie night', 'Entertainment'),
+]
+
+def trained_service(tmp_path):
+    service = MLService(str(tmp_path))
+    texts = [service.create_features(description) for description, _ in TRAINING]
+    service.classifier = Pipeline([
+        ('tfidf', TfidfVectorizer()),
+        ('classifier', RandomForestClassifier(n_estimators=20, random_state=42))
+    ]).fit(texts, [category for _, category in TRAINING])
+    return service
+
+def test_batch_matches_single_predictions(tmp_path):
+    """Test one predict_proba call yields the same labels as per-item predict"""
+    service = trained_service(tmp_path)
+    items = [
+        {'description': 'Coffee and pizza', 'merchant_name': 'Cafe'},
+        {'description': 'Uber to the airport'},
+        {'description': 'Movie tickets', 'merchant_name': 'Cinema', 'amount': 24.0},
+    ]
+
+    predictions = service.predict_categories(items)
+    texts = [service.create_features(item['description'], item.get('merchant_name')) for item in items]
+
+    assert [label for label, _ in predictions] == list(service.classifier.predict(texts))
+    assert all(0 < confidence <= 1 for _, confidence in predictions)
+    assert service.predict_category('Uber to the airport') == predictions[1]
+    assert service.predict_categories([]) == []
+
+def test_batch_falls_back_to_rules_without_model(tmp_path):
+    """Test untrained services use keyword rules for every item"""
+    service = MLService(str(tmp_path))
+    assert service.predict_categories([
+        {'description': 'Starbucks latte'},
+        {'merchant_name': 'Shell gas'},
+        {'description': 'Misc'}
+    ]) == [('Food & Dining', 0.5), ('Transportation', 0.5), ('Other', 0.5)]
+
+def test_batch_suggest_endpoint(client, auth_headers):
+    """Test the batch endpoint keeps input order and flags empty items"""
+    response = client.post('/api/expenses/suggest-category/batch', headers=auth_headers, json={
+        'items': [{'description': 'Starbucks coffee'}, {'amount': 5}, {'merchant_name': 'Airline flight'}]
+    })
+    assert response.status_code == 200
+
+    suggestions = response.get_json()['data']['suggestions']
+    assert [suggestion['index'] for suggestion in suggestions] == [0, 1, 2]
+    assert suggestions[0]['suggested_category']['name'] == 'Food & Dining'
+    assert 'error' in suggestions[1]
+    assert suggestions[2]['suggested_category'] is None
+
+    response = client.post('/api/expenses/suggest-category/batch', headers=auth_headers, json={'items': []})
+    assert response.status_code == 400
+
+def test_batch_suggest_flags_wrongly_typed_items(client, auth_headers):
+    """Test non-string fields fail their own item instead of the whole batch"""
+    response = client.post('/api/expenses/suggest-category/batch', headers=auth_headers, json={
+        'items': [{'description': 123}, {'merchant_name': ['Cafe']}, 'Starbucks',
+                  {'description': 'Starbucks coffee', 'merchant_name': None}]
+    })
+    assert response.status_code == 200
+
+    suggestions = response.get_json()['data']['suggestions']
+    assert [suggestion.get('error') for suggestion in suggestions] == [
+        'description must be a string', 'merchant_name must be a string', 'Item must be an object', None
+    ]
+    assert suggestions[3]['suggested_category']['name'] == 'Food & Dining'
@@ -0,0 +1,53 @@
+"""
+Smart Expense Tracker - Model Registry Tests
+Unit tests for per-worker model caching and hot reload
+"""
+
+import os
+import joblib
+from app.services.ml_service import MODEL_FILENAME, CATEGORIES_FILENAME
+from app.services.model_registry import ModelRegistry, get_ml_service
+
+def write_model(model_dir, classifier, categories, mtime):
+    for filename, value in ((MODEL_FILENAME, classifier), (CATEGORIES_FILENAME, categories)):
+        path = os.path.join(model_dir, filename)
+        joblib.dump(value, path)
+        os.utime(path, (mtime, mtime))
+
+def test_registry_reuses_and_hot_swaps_model(tmp_path):
+    """Test the pipeline is loaded once and swapped when the file changes"""
+    model_dir = str(tmp_path)
+    registry = ModelRegistry(model_dir, check_interval=0)
+
+    untrained = registry.get_service()
+    assert untrained.classifier is None
+    assert registry.get_service() is untrained
+
+    write_model(model_dir, {'model': 'v1'}, ['Food & Dining'], 1_000_000)
+    first = registry.get_service()
+    assert first is not untrained
+    assert first.classifier == {'model': 'v1'}
+    assert registry.get_service() is first
+
+    write_model(model_dir, {'model': 'v2'}, ['Food & Dining', 'Travel'], 2_000_000)
+    second = registry.get_service()
+    assert second.classifier == {'model': 'v2'}
+    assert second.categories == ['Food & Dining', 'Travel']
+    # Requests holding the old service keep a consistent model
+    assert first.classifier == {'model': 'v1'}
+
+def test_registry_skips_stat_within_interval(tmp_path):
+    """Test file checks are throttled by the check interval"""
+    model_dir = str(tmp_path)
+    registry = ModelRegistry(model_dir, check_interval=3600)
+    service = registry.get_service()
+
+    write_model(model_dir, {'model': 'v1'}, ['Other'], 1_000_000)
+    assert registry.get_service() is service
+
+    registry.reload()
+    assert registry.get_service().classifier == {'model': 'v1'}
+
+def test_app_shares_one_service(app):
+    """Test every request in a worker gets the same service instance"""
+    assert get_ml_service() is get_ml_service()
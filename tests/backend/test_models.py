@@ -8,7 +8,7 @@ from datetime import date, datetime
 from app.models.user import User
 from app.models.category import Category
 from app.models.expense import Expense
-from app.database import db
+from app.database import db, unit_of_work
 
 def test_user_creation():
     """Test user model creation"""
@@ -58,3 +58,36 @@ def test_expense_creation():
     assert expense.amount == 25.50
     assert expense.currency == "USD"
     assert expense.date == date.today()
+
+def test_unit_of_work_commits_once(user_and_categories):
+    """Test saves inside a unit of work are committed together or not at all"""
+    user, food, _ = user_and_categories
+
+    with unit_of_work():
+        Expense(user.id, food.id, 'Lunch', 12.5, date=date(2024, 3, 1)).save()
+        with unit_of_work():
+            Expense(user.id, food.id, 'Dinner', 30.0, date=date(2024, 3, 2)).save()
+        assert not db.session.new and db.session().in_transaction()
+    assert not db.session().in_transaction()
+    assert Expense.query.count() == 2
+
+    with pytest.raises(ValueError):
+        with unit_of_work():
+            Expense(user.id, food.id, 'Coffee', 4.0, date=date(2024, 3, 3)).save()
+            Expense.query.first().delete()
+            raise ValueError('abort')
+    assert Expense.query.count() == 2
+
+def test_bulk_delete_route(client, auth_headers, user_and_categories):
+    """Test bulk delete removes only the user's expenses and is all-or-nothing"""
+    user, food, _ = user_and_categories
+    ids = [Expense(user.id, food.id, f'Item {index}', 2.0, date=date(2024, 3, 1)).save().id for index in range(3)]
+
+    response = client.post('/api/expenses/bulk-delete', headers=auth_headers,
+                           json={'expense_ids': ids + [999]})
+    assert response.status_code == 400
+    assert Expense.query.count() == 3
+
+    response = client.post('/api/expenses/bulk-delete', headers=auth_headers, json={'expense_ids': ids[:2]})
+    assert response.status_code == 200
+    assert [expense.id for expense in Expense.query] == ids[2:]
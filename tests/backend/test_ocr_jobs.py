@@ -0,0 +1,299 @@
+"""
+Smart Expense Tracker - OCR Job Tests
+Unit tests for the database-backed receipt OCR queue
+"""
+
+import io
+import os
+import pytest
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from app.database import db
+from app.models.ocr_job import OcrJob
+from app.models.ocr_cache import OcrCacheEntry
+from app.services import ocr_jobs
+from app.services.ocr_jobs import get_ocr_jobs
+from app.services.ocr_cache import OcrResultCache
+
+EXTRACTED = {
+    'raw_text': 'STARBUCKS\nTOTAL 12.50',
+    'merchant_name': 'Starbucks',
+    'total_amount': 12.5,
+    'date': '2024-03-01',
+    'items': [],
+    'tax_amount': 0,
+    'confidence_score': 0.8
+}
+
+@pytest.fixture
+def instance_dir(app, tmp_path):
+    app.instance_path = str(tmp_path)
+    return tmp_path
+
+def test_upload_returns_202_and_job_can_be_polled(client, auth_headers, instance_dir, monkeypatch):
+    """Test uploads enqueue a job whose result is served by the status endpoint"""
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: dict(EXTRACTED))
+
+    response = client.post('/api/upload/receipt', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'fake image'), 'receipt.png')},
+                           content_type='multipart/form-data')
+    assert response.status_code == 202
+    job = response.get_json()['data']
+    assert job['status_url'] == f"/api/upload/jobs/{job['job_id']}"
+
+    status = client.get(job['status_url'], headers=auth_headers).get_json()['data']
+    assert status['status'] == OcrJob.STATUS_COMPLETED
+    assert status['result']['extracted_data']['total_amount'] == 12.5
+    assert status['result']['suggested_category']['name'] == 'Food & Dining'
+    assert (instance_dir / status['result']['file_path']).exists()
+
+    assert client.get('/api/upload/jobs/unknown', headers=auth_headers).status_code == 404
+
+def test_failed_ocr_marks_job_failed(client, auth_headers, instance_dir, monkeypatch):
+    """Test OCR errors are recorded on the job instead of failing the request"""
+    def broken(file_path):
+        raise RuntimeError('tesseract crashed')
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', broken)
+
+    response = client.post('/api/upload/receipt', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'fake image'), 'receipt.jpg')},
+                           content_type='multipart/form-data')
+    job = OcrJob.query.filter_by(job_id=response.get_json()['data']['job_id']).one()
+    assert job.status == OcrJob.STATUS_FAILED
+    assert 'tesseract crashed' in job.error
+
+def test_claim_is_exclusive_and_stale_jobs_are_requeued(user_and_categories):
+    """Test a job is claimed once and recovered after the timeout"""
+    user = user_and_categories[0]
+    queue = get_ocr_jobs()
+    job = OcrJob(user.id, 'abc123', 'receipt.png', 'uploads/1/receipt.png')
+    db.session.add(job)
+    db.session.commit()
+
+    assert queue.claim_next() == job.id
+    assert queue.claim(job.id) is False
+    assert queue.claim_next() is None
+
+    job.started_at = datetime.utcnow() - timedelta(seconds=queue.job_timeout + 1)
+    db.session.commit()
+    assert queue.requeue_stale() == 1
+    assert queue.claim_next() == job.id
+
+def test_bulk_upload_keeps_input_order_with_timing(app, client, auth_headers, instance_dir, monkeypatch):
+    """Test bulk OCR results come back in upload order with per-file timing"""
+    def fake_ocr(file_path):
+        with open(file_path) as handle:
+            name = handle.read()
+        if 'bad' in name:
+            raise RuntimeError('unreadable')
+        return dict(EXTRACTED, merchant_name=name.split('.')[0])
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', fake_ocr)
+
+    files = [(io.BytesIO(name.encode()), name) for name in ('first.png', 'notes.txt', 'bad.jpg', 'last.png')]
+    response = client.post('/api/upload/receipt/bulk', headers=auth_headers,
+                           data={'files': files}, content_type='multipart/form-data')
+    assert response.status_code == 200
+
+    data = response.get_json()['data']
+    results = data['results']
+    assert [result['filename'] for result in results] == ['first.png', 'notes.txt', 'bad.jpg', 'last.png']
+    assert [result['success'] for result in results] == [True, False, False, True]
+    assert results[0]['extracted_data']['merchant_name'] == 'first'
+    assert results[3]['extracted_data']['merchant_name'] == 'last'
+    assert results[3]['suggested_category']['name'] == 'Food & Dining'
+    assert 'ocr_ms' in results[0]['timing'] and 'timing' not in results[1]
+    assert data['summary']['successful'] == 2
+
+    app.config['BULK_UPLOAD_MAX_FILES'] = 1
+    response = client.post('/api/upload/receipt/bulk', headers=auth_headers,
+                           data={'files': [(io.BytesIO(b'img'), 'a.png'), (io.BytesIO(b'img'), 'b.png')]},
+                           content_type='multipart/form-data')
+    assert response.status_code == 400
+
+def test_duplicate_upload_and_reprocess_skip_ocr(client, auth_headers, instance_dir, monkeypatch):
+    """Test identical image bytes are served from the OCR cache"""
+    calls = []
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: calls.append(file_path) or dict(EXTRACTED))
+
+    def upload():
+        return client.post('/api/upload/receipt', headers=auth_headers,
+                           data={'file': (io.BytesIO(b'same photo'), 'receipt.png')},
+                           content_type='multipart/form-data').get_json()['data']
+
+    first, second = upload(), upload()
+    assert len(calls) == 1
+    assert second['status'] == OcrJob.STATUS_COMPLETED
+    assert second['result']['extracted_data'] == first['result']['extracted_data']
+
+    response = client.post(f"/api/upload/receipt/reprocess/{first['file_id']}", headers=auth_headers)
+    assert response.status_code == 202
+    assert response.get_json()['data']['status'] == OcrJob.STATUS_COMPLETED
+    assert len(calls) == 1
+
+    stats = client.get('/api/upload/ocr-cache/stats', headers=auth_headers).get_json()['data']
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 1, 1)
+
+def test_cache_evicts_least_recently_used(app):
+    """Test size-based eviction drops the least recently read entries first"""
+    cache = OcrResultCache(max_bytes=150, fingerprint='v1', touch_interval=0)
+    cache.put('a', {'raw_text': 'a' * 50})
+    cache.put('b', {'raw_text': 'b' * 50})
+    assert cache.get('a') is not None
+    cache.put('c', {'raw_text': 'c' * 50})
+    db.session.commit()
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert OcrResultCache(fingerprint='v2').get('c') is None
+
+def test_cache_hits_and_puts_avoid_per_call_writes(app, query_budget):
+    """Test repeated hits only read, and puts only sum the table when the estimate is over budget"""
+    cache = OcrResultCache(max_bytes=10 ** 6, fingerprint='v1', touch_interval=60)
+    cache.put('a', {'raw_text': 'a'})
+
+    with query_budget(limit=3):
+        for _ in range(3):
+            assert cache.get('a') is not None
+    with query_budget(limit=5) as recorded:
+        for name in 'bcdef':
+            cache.put(name, {'raw_text': name})
+    assert not any('sum(' in query.statement.lower() for query in recorded)
+
+    entry = OcrCacheEntry.query.filter_by(content_hash='a').one()
+    assert entry.hit_count == 0
+    entry.last_accessed_at -= timedelta(minutes=2)
+    db.session.commit()
+    cache.get('a')
+    db.session.expire_all()
+    assert entry.hit_count == 4
+
+    cache.max_bytes = 1
+    cache.put('g', {'raw_text': 'g'})
+    assert OcrCacheEntry.query.count() == 0
+
+class SynchronousExecutor:
+    """Stands in for the process pool: runs work immediately in the test process"""
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+def stuck_job(user, file_id, attempts):
+    job = OcrJob(user.id, file_id, 'receipt.png', 'uploads/1/receipt.png')
+    job.status = OcrJob.STATUS_PROCESSING
+    job.attempts = attempts
+    job.started_at = datetime.utcnow() - timedelta(hours=1)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def test_pool_mode_recovers_jobs_lost_with_a_worker(user_and_categories, monkeypatch):
+    """Test stale jobs are requeued and dispatched again, and given up on after OCR_MAX_ATTEMPTS"""
+    user = user_and_categories[0]
+    queue = get_ocr_jobs()
+    queue.mode = 'pool'
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: dict(EXTRACTED))
+    monkeypatch.setattr(queue, '_get_executor', lambda name='jobs': SynchronousExecutor())
+
+    lost = stuck_job(user, 'lost01', attempts=1)
+    exhausted = stuck_job(user, 'crash01', attempts=queue.max_attempts)
+    queued = OcrJob(user.id, 'queued01', 'receipt.png', 'uploads/1/receipt.png')
+    db.session.add(queued)
+    db.session.commit()
+
+    queue.recover()
+    db.session.expire_all()
+    assert (lost.status, lost.attempts) == (OcrJob.STATUS_COMPLETED, 2)
+    assert queued.status == OcrJob.STATUS_COMPLETED
+    assert exhausted.status == OcrJob.STATUS_FAILED
+    assert 'Gave up after' in exhausted.error
+    assert not queue._in_flight
+
+def test_dead_pool_process_requeues_job_and_pool_is_replaced(app, user_and_categories):
+    """Test a broken pool returns its job to the queue and is rebuilt on next use"""
+    user = user_and_categories[0]
+    queue = get_ocr_jobs()
+    job = stuck_job(user, 'oom01', attempts=1)
+
+    broken = Future()
+    broken.set_exception(BrokenProcessPool('child died'))
+    queue._record(job.id, 1, broken)
+    db.session.expire_all()
+    assert job.status == OcrJob.STATUS_QUEUED
+
+    job.status, job.attempts = OcrJob.STATUS_PROCESSING, queue.max_attempts
+    db.session.commit()
+    queue._record(job.id, queue.max_attempts, broken)
+    db.session.expire_all()
+    assert job.status == OcrJob.STATUS_FAILED
+
+    class DeadPool:
+        _broken = 'A child process terminated abruptly'
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    dead = DeadPool()
+    queue._executors['jobs'] = (dead, os.getpid())
+    executor = queue._get_executor()
+    try:
+        assert executor is not dead and dead.shut_down
+    finally:
+        executor.shutdown()
+
+def test_slow_run_is_not_requeued_or_overwritten(app, user_and_categories):
+    """Test a job still running here stays claimed, and a superseded run cannot record its outcome"""
+    user = user_and_categories[0]
+    queue = get_ocr_jobs()
+    job = stuck_job(user, 'slow01', attempts=1)
+
+    queue._in_flight.add(job.id)
+    try:
+        assert queue.requeue_stale() == 0
+    finally:
+        queue._in_flight.discard(job.id)
+
+    assert queue.requeue_stale() == 1
+    assert queue.claim(job.id) == 2
+    queue.complete(job.id, dict(EXTRACTED), 1)
+    queue.fail(job.id, 'late failure', 1)
+    db.session.expire_all()
+    assert (job.status, job.result, job.error) == (OcrJob.STATUS_PROCESSING, None, None)
+
+    queue.complete(job.id, dict(EXTRACTED), 2)
+    db.session.expire_all()
+    assert job.status == OcrJob.STATUS_COMPLETED
+
+def test_bulk_ocr_retries_files_lost_to_a_broken_pool(app, monkeypatch):
+    """Test files failed by a pool crash are retried once on a fresh pool"""
+    queue = get_ocr_jobs()
+    queue.mode, queue.cache = 'pool', None
+    submitted = []
+
+    def submit(name, fn, file_path):
+        submitted.append(file_path)
+        future = Future()
+        if len(submitted) <= 2:
+            future.set_exception(BrokenProcessPool('child died'))
+        elif file_path == 'bad.png':
+            future.set_exception(RuntimeError('unreadable'))
+        else:
+            future.set_result((dict(EXTRACTED), 0.1))
+        return future
+    monkeypatch.setattr(queue, '_submit_to_pool', submit)
+
+    outcomes = queue.extract_many(['a.png', 'bad.png'])
+    assert submitted == ['a.png', 'bad.png', 'a.png', 'bad.png']
+    assert outcomes[0] == (EXTRACTED, 0.1, None, False)
+    assert isinstance(outcomes[1][2], RuntimeError)
+
+def test_bulk_pool_shares_cores_between_web_workers(monkeypatch):
+    """Test the default bulk pool size divides the cores among the web workers"""
+    monkeypatch.setattr(ocr_jobs, 'available_cpus', lambda: 8)
+    assert ocr_jobs.default_bulk_workers() == 8
+    assert ocr_jobs.default_bulk_workers(4) == 2
+    assert ocr_jobs.default_bulk_workers(16) == 1
@@ -0,0 +1,54 @@
+"""
+Smart Expense Tracker - Query Budget Tests
+Endpoints must issue a bounded number of SQL statements regardless of data size
+"""
+
+import pytest
+from datetime import date, timedelta
+from app.database import db
+from app.models.expense import Expense
+from app.models.category import Category
+
+ENDPOINTS = [
+    '/api/expenses',
+    '/api/expenses?limit=50',
+    '/api/expenses?sort_by=category&limit=50',
+    '/api/expenses/stats',
+    '/api/dashboard/overview',
+    '/api/dashboard/spending-trends',
+    '/api/dashboard/monthly-comparison',
+    '/api/dashboard/category-analysis',
+    '/api/dashboard/export-data',
+]
+
+def _seed(user_id, count):
+    """Add expenses that each use their own category, so lazy loads cannot hide in the identity map"""
+    today = date.today()
+    offset = Expense.query.count()
+    for index in range(offset, offset + count):
+        category = Category(name=f'Category {index}')
+        db.session.add(category)
+        db.session.flush()
+        db.session.add(Expense(user_id, category.id, f'Expense {index}', 5.0 + index,
+                               date=today - timedelta(days=index % 3)))
+    db.session.commit()
+    db.session.expunge_all()
+
+@pytest.mark.parametrize('endpoint', ENDPOINTS)
+def test_query_count_does_not_grow_with_rows(client, auth_headers, user_and_categories, query_budget, endpoint):
+    """Test statement count is bounded and independent of the number of expenses"""
+    user_id = user_and_categories[0].id
+
+    _seed(user_id, 2)
+    with query_budget() as few:
+        response = client.get(endpoint, headers=auth_headers)
+        response.get_data()  # streamed responses query while the body is read
+    assert response.status_code == 200
+
+    _seed(user_id, 40)
+    with query_budget() as many:
+        response = client.get(endpoint, headers=auth_headers)
+        response.get_data()  # streamed responses query while the body is read
+    assert response.status_code == 200
+
+    assert len(many) == len(few)
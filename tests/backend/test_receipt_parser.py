@@ -0,0 +1,24 @@
+"""
+Smart Expense Tracker - Receipt Parser Tests
+Regression corpus for OCR text field extraction
+"""
+
+import os
+import json
+import pytest
+from app.services.ocr_service import OCRService
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'receipt_corpus.json')
+
+with open(CORPUS_PATH, encoding='utf-8') as corpus_file:
+    CORPUS = json.load(corpus_file)
+
+@pytest.mark.parametrize('entry', CORPUS, ids=[entry['name'] for entry in CORPUS])
+def test_parser_matches_recorded_output(entry):
+    """Test every corpus receipt parses to the recorded field values"""
+    extracted = OCRService().parse_receipt_text(entry['text'])
+    if extracted['date'] is not None:
+        extracted['date'] = extracted['date'].isoformat()
+
+    assert extracted == entry['expected']
+    assert list(extracted) == list(entry['expected'])
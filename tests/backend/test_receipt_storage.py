@@ -0,0 +1,138 @@
+"""
+Smart Expense Tracker - Receipt Storage Tests
+Unit tests for content-addressed receipt storage and its backends
+"""
+
+import io
+import os
+import hashlib
+import pytest
+from app.database import db
+from app.models.stored_blob import StoredBlob
+from app.models.receipt_upload import ReceiptUpload
+from app.services import ocr_jobs
+from app.services.receipt_storage import ReceiptStorage, LocalBlobStore, S3BlobStore, blob_key
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client methods the store uses"""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+
+    def upload_file(self, filename, bucket, key):
+        with open(filename, 'rb') as handle:
+            self.objects[(bucket, key)] = handle.read()
+        self.uploads += 1
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise NotFound()
+        return {'ContentLength': len(self.objects[(Bucket, Key)])}
+
+    def download_file(self, bucket, key, filename):
+        if (bucket, key) not in self.objects:
+            raise NotFound()
+        with open(filename, 'wb') as handle:
+            handle.write(self.objects[(bucket, key)])
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+@pytest.fixture
+def instance_dir(app, tmp_path, monkeypatch):
+    app.instance_path = str(tmp_path)
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: {'raw_text': 'CAFE', 'merchant_name': 'Cafe'})
+    return tmp_path
+
+def upload(client, auth_headers, content):
+    response = client.post('/api/upload/receipt', headers=auth_headers,
+                           data={'file': (io.BytesIO(content), 'receipt.png')},
+                           content_type='multipart/form-data')
+    return response.get_json()['data']['file_id']
+
+def test_identical_uploads_share_one_blob(client, auth_headers, instance_dir):
+    """Test duplicate bytes are stored once and removed with their last reference"""
+    sha256 = hashlib.sha256(b'same receipt').hexdigest()
+    blob_path = instance_dir / 'blobs' / sha256[:2] / sha256[2:4] / sha256
+
+    first = upload(client, auth_headers, b'same receipt')
+    second = upload(client, auth_headers, b'same receipt')
+
+    assert blob_path.read_bytes() == b'same receipt'
+    assert {row.path for row in ReceiptUpload.query} == {blob_key(sha256)}
+    assert StoredBlob.query.filter_by(sha256=sha256).one().ref_count == 2
+    assert os.listdir(instance_dir / 'blobs' / 'tmp') == []
+
+    client.delete(f'/api/upload/receipt/{first}/delete', headers=auth_headers)
+    assert blob_path.exists()
+    assert StoredBlob.query.one().ref_count == 1
+
+    client.delete(f'/api/upload/receipt/{second}/delete', headers=auth_headers)
+    assert not blob_path.exists()
+    assert StoredBlob.query.count() == 0
+
+    response = client.post(f'/api/upload/receipt/reprocess/{second}', headers=auth_headers)
+    assert response.status_code == 404
+
+def test_s3_backend_deduplicates_and_caches_reads(app, tmp_path):
+    """Test the S3 store uploads each blob once and downloads it once for OCR"""
+    s3 = FakeS3Client()
+    storage = ReceiptStorage(S3BlobStore(s3, 'receipts', str(tmp_path / 'cache'), prefix='r/'))
+
+    key, sha256, size = storage.store(io.BytesIO(b'scanned receipt'))
+    assert storage.store(io.BytesIO(b'scanned receipt')) == (key, sha256, size)
+    db.session.commit()
+
+    assert s3.uploads == 1
+    assert s3.objects == {('receipts', f'r/{blob_key(sha256)}'): b'scanned receipt'}
+    assert StoredBlob.query.one().ref_count == 2
+
+    path = storage.local_path(key)
+    with open(path, 'rb') as handle:
+        assert handle.read() == b'scanned receipt'
+    s3.objects.clear()
+    assert storage.local_path(key) == path  # served from the local copy
+
+    storage.release(sha256)
+    assert storage.release(sha256)
+    db.session.commit()
+    assert storage.purge(sha256)
+    assert not os.path.exists(path) and not storage.exists(key)
+
+def test_store_racing_a_purge_keeps_the_blob(app, tmp_path, monkeypatch):
+    """Test a purge landing between spooling and taking the reference does not lose the file"""
+    storage = ReceiptStorage(LocalBlobStore(str(tmp_path)))
+    key, sha256, _ = storage.store(io.BytesIO(b'same receipt'))
+    db.session.commit()
+    assert storage.release(sha256)
+    db.session.commit()
+    assert StoredBlob.query.one().ref_count == 0  # kept until purged
+
+    add_reference = storage._add_reference
+
+    def purge_first(sha256, size):
+        assert storage.purge(sha256)  # the other request's purge wins the row
+        add_reference(sha256, size)
+    monkeypatch.setattr(storage, '_add_reference', purge_first)
+
+    storage.store(io.BytesIO(b'same receipt'))
+    db.session.commit()
+    assert storage.exists(key)
+    assert StoredBlob.query.one().ref_count == 1
+
+def test_purge_keeps_a_blob_referenced_again(app, tmp_path):
+    """Test a blob re-uploaded after its release survives the purge"""
+    storage = ReceiptStorage(LocalBlobStore(str(tmp_path)))
+    key, sha256, _ = storage.store(io.BytesIO(b'same receipt'))
+    db.session.commit()
+    storage.release(sha256)
+    db.session.commit()
+
+    storage.store(io.BytesIO(b'same receipt'))
+    db.session.commit()
+    assert not storage.purge(sha256)
+    assert storage.exists(key) and StoredBlob.query.one().ref_count == 1
@@ -0,0 +1,129 @@
+"""
+Smart Expense Tracker - Receipt Upload Tests
+Unit tests for receipt upload metadata, expense linkage and backfill
+"""
+
+import io
+import hashlib
+import pytest
+from datetime import date
+from app.database import db
+from app.models.expense import Expense
+from app.models.receipt_upload import ReceiptUpload
+from app.models.user import User
+from app.services import ocr_jobs
+from app.services.receipt_uploads import ReceiptUploadService
+
+@pytest.fixture
+def instance_dir(app, tmp_path, monkeypatch):
+    app.instance_path = str(tmp_path)
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: {'raw_text': 'CAFE', 'merchant_name': 'Cafe'})
+    return tmp_path
+
+def upload(client, auth_headers, content=b'receipt bytes'):
+    response = client.post('/api/upload/receipt', headers=auth_headers,
+                           data={'file': (io.BytesIO(content), 'lunch.png')},
+                           content_type='multipart/form-data')
+    return response.get_json()['data']
+
+def test_upload_records_metadata(client, auth_headers, instance_dir):
+    """Test uploads write a ReceiptUpload row that tracks OCR status"""
+    job = upload(client, auth_headers)
+
+    receipt = ReceiptUpload.query.filter_by(file_id=job['file_id']).one()
+    assert len(receipt.file_id) == 32  # a full uuid4, unique without retries
+    assert receipt.sha256 == hashlib.sha256(b'receipt bytes').hexdigest()
+    assert receipt.size == len(b'receipt bytes')
+    assert receipt.mime == 'image/png'
+    assert receipt.ocr_status == ReceiptUpload.OCR_COMPLETED
+    assert (instance_dir / receipt.path).exists()
+
+    stats = client.get('/api/upload/stats', headers=auth_headers).get_json()['data']['stats']
+    assert stats['uploaded_files'] == 1
+
+def test_delete_unlinks_expense_then_removes_file(client, auth_headers, user_and_categories, instance_dir):
+    """Test receipts linked to an expense are detached before being deleted"""
+    _, food, _ = user_and_categories
+    job = upload(client, auth_headers)
+
+    response = client.post('/api/upload/receipt/create-expense', headers=auth_headers, json={
+        'file_id': job['file_id'], 'description': 'Lunch', 'amount': 12.5,
+        'category_id': food.id, 'date': '2024-03-01'
+    })
+    assert response.status_code == 201
+    expense = Expense.query.one()
+    receipt = ReceiptUpload.query.one()
+    assert expense.receipt_upload_id == receipt.id
+    path = instance_dir / receipt.path
+
+    response = client.delete(f"/api/upload/receipt/{job['file_id']}/delete", headers=auth_headers)
+    assert response.get_json()['message'] == 'File association removed from expense'
+    assert expense.receipt_upload_id is None and path.exists()
+
+    response = client.delete(f"/api/upload/receipt/{job['file_id']}/delete", headers=auth_headers)
+    assert response.get_json()['message'] == 'File deleted successfully'
+    assert not path.exists() and ReceiptUpload.query.count() == 0
+
+    response = client.delete(f"/api/upload/receipt/{job['file_id']}/delete", headers=auth_headers)
+    assert response.status_code == 404
+
+def test_create_expense_accepts_string_category_id(client, auth_headers, user_and_categories, instance_dir):
+    """Test JSON string category ids are converted, and non-numeric ones rejected"""
+    _, food, _ = user_and_categories
+    job = upload(client, auth_headers)
+
+    def create(category_id):
+        return client.post('/api/upload/receipt/create-expense', headers=auth_headers, json={
+            'file_id': job['file_id'], 'description': 'Lunch', 'amount': 12.5,
+            'category_id': category_id, 'date': '2024-03-01'
+        })
+
+    response = create('abc')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Category ID must be a number'
+
+    assert create(str(food.id)).status_code == 201
+    assert Expense.query.one().category_id == food.id
+
+def test_backfill_registers_existing_files(user_and_categories, instance_dir):
+    """Test backfill adopts files on disk and links expenses by path"""
+    user, food, _ = user_and_categories
+    user_dir = instance_dir / 'uploads' / str(user.id)
+    user_dir.mkdir(parents=True)
+    (user_dir / 'receipt_20240301_120000_abcd1234.jpg').write_bytes(b'old receipt')
+    (user_dir / 'scan.png').write_bytes(b'legacy')
+
+    expense = Expense(user.id, food.id, 'Old lunch', 9.0, date=date(2024, 3, 1))
+    expense.receipt_image_path = f'uploads/{user.id}/receipt_20240301_120000_abcd1234.jpg'
+    db.session.add(expense)
+    db.session.commit()
+
+    service = ReceiptUploadService(str(instance_dir))
+    assert service.backfill() == (2, 1)
+    assert service.backfill() == (0, 0)
+
+    adopted = ReceiptUpload.query.filter_by(file_id='abcd1234').one()
+    assert adopted.user_id == user.id and adopted.ocr_status == ReceiptUpload.OCR_COMPLETED
+    assert expense.receipt_upload_id == adopted.id
+
+def test_ocr_pass_stats(client, auth_headers, instance_dir, monkeypatch):
+    """Test the share of the user's receipts handled by each OCR pass is reported"""
+    passes = iter(['fast', 'fast', 'full'])
+    monkeypatch.setattr(ocr_jobs, 'run_ocr', lambda file_path: {'raw_text': 'CAFE', 'ocr_pass': next(passes)})
+    for index in range(3):
+        upload(client, auth_headers, content=b'receipt %d' % index)
+
+    other = User(email='other@example.com', username='other', first_name='Other',
+                 last_name='User', password='password123')
+    db.session.add(other)
+    db.session.flush()
+    foreign = ReceiptUpload('other01', other.id, 'uploads/other.png', 10, 'f' * 64)
+    foreign.ocr_pass = 'full'
+    db.session.add(foreign)
+    db.session.commit()
+
+    data = client.get('/api/upload/ocr-passes/stats', headers=auth_headers).get_json()['data']
+
+    assert data['receipts'] == 3
+    assert data['passes']['fast'] == {'count': 2, 'fraction': 0.667}
+    assert data['passes']['full'] == {'count': 1, 'fraction': 0.333}
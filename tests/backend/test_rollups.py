@@ -0,0 +1,79 @@
+"""
+Smart Expense Tracker - Rollup Tests
+Unit tests for the incrementally maintained monthly rollup table
+"""
+
+from datetime import date
+from app.database import db
+from app.models.expense import Expense
+from app.models.rollup import ExpenseMonthlyRollup
+from app.services.rollup_service import RollupService
+
+def _bucket(user_id, year, month, category_id):
+    return ExpenseMonthlyRollup.query.filter_by(
+        user_id=user_id, year=year, month=month, category_id=category_id
+    ).first()
+
+def test_rollup_tracks_insert_update_delete(user_and_categories):
+    """Test rollup rows follow expense writes in the same transaction"""
+    user, food, travel = user_and_categories
+
+    lunch = Expense(user.id, food.id, 'Lunch', 12.5, date=date(2024, 3, 4))
+    dinner = Expense(user.id, food.id, 'Dinner', 40.0, date=date(2024, 3, 20))
+    lunch.save()
+    dinner.save()
+
+    bucket = _bucket(user.id, 2024, 3, food.id)
+    assert bucket.total_amount == 52.5
+    assert bucket.expense_count == 2
+    assert (bucket.min_amount, bucket.max_amount) == (12.5, 40.0)
+
+    # Moving an expense to another month and category updates both buckets
+    dinner.category_id = travel.id
+    dinner.date = date(2024, 4, 1)
+    dinner.save()
+    db.session.expire_all()
+
+    assert _bucket(user.id, 2024, 3, food.id).total_amount == 12.5
+    assert _bucket(user.id, 2024, 4, travel.id).expense_count == 1
+
+    lunch.delete()
+    assert _bucket(user.id, 2024, 3, food.id) is None
+    assert RollupService().check_consistency() == []
+
+def test_rollup_rebuild_and_check(user_and_categories):
+    """Test the consistency checker detects drift and rebuild repairs it"""
+    user, food, _ = user_and_categories
+    Expense(user.id, food.id, 'Coffee', 4.0, date=date(2024, 5, 2)).save()
+
+    db.session.execute(ExpenseMonthlyRollup.__table__.update().values(total_amount=99.0))
+    db.session.commit()
+
+    service = RollupService()
+    mismatches = service.check_consistency(user.id)
+    assert len(mismatches) == 1
+    assert mismatches[0]['expected']['total_amount'] == 4.0
+
+    assert service.rebuild(user.id) == 1
+    assert service.check_consistency(user.id) == []
+    assert service.get_monthly_rows(user.id, date(2024, 5, 1), date(2024, 7, 1)) == [(2024, 5, None, 4.0, 1)]
+
+def test_bulk_helpers_keep_rollups_consistent(user_and_categories):
+    """Test bulk INSERT/UPDATE/DELETE statements maintain the rollup table too"""
+    user, food, travel = user_and_categories
+
+    rows = [{'user_id': user.id, 'category_id': food.id, 'description': f'Item {index}',
+             'amount': 1.0 + index, 'date': date(2024, 1 + index % 3, 10)} for index in range(1200)]
+    assert Expense.bulk_insert(rows) == 1200
+    assert RollupService().check_consistency() == []
+    assert _bucket(user.id, 2024, 1, food.id).expense_count == 400
+
+    january = [expense.id for expense in Expense.query.filter(Expense.date == date(2024, 1, 10))]
+    assert Expense.bulk_update(january, {'category_id': travel.id, 'date': date(2024, 6, 1)}) == 400
+    assert _bucket(user.id, 2024, 1, food.id) is None
+    assert _bucket(user.id, 2024, 6, travel.id).expense_count == 400
+
+    assert Expense.bulk_delete(january[:150] + [999999], user_id=user.id) == 150
+    assert Expense.bulk_delete(january, user_id=user.id + 1) == 0
+    assert Expense.query.count() == 1050
+    assert RollupService().check_consistency() == []
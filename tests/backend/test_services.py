@@ -40,3 +40,182 @@ def test_ml_service_category_prediction():
     assert isinstance(category, str)
     assert isinstance(confidence, float)
     assert 0 <= confidence <= 1
+
+@pytest.mark.parametrize('extension', ['jpg', 'png'])
+def test_ocr_preprocess_normalizes_resolution(tmp_path, extension):
+    """Test large photos are decoded to grayscale and shrunk to the target short side"""
+    import cv2
+    import numpy as np
+
+    photo = np.full((2400, 1800, 3), 230, dtype=np.uint8)
+    cv2.putText(photo, 'TOTAL 11.59', (100, 600), cv2.FONT_HERSHEY_SIMPLEX, 6, (0, 0, 0), 15)
+    path = str(tmp_path / f'photo.{extension}')
+    cv2.imwrite(path, photo)
+
+    processed = OCRService(target_short_side=600).preprocess_image(path)
+
+    assert processed.shape == (800, 600)
+    assert processed.dtype == np.uint8
+    assert set(np.unique(processed)) == {0, 255}
+
+def test_ocr_preprocess_keeps_small_images(tmp_path):
+    """Test images already below the target are not upscaled"""
+    import cv2
+    import numpy as np
+
+    path = str(tmp_path / 'small.png')
+    cv2.imwrite(path, np.full((300, 200), 255, dtype=np.uint8))
+
+    assert OCRService(target_short_side=600).preprocess_image(path).shape == (300, 200)
+
+CLEAN_RECEIPT = 'CORNER MARKET\n123 Main St\n03/14/2024\nBREAD 3.49\nMILK 2.99\nTOTAL $6.48'
+
+@pytest.fixture
+def receipt_photo(tmp_path):
+    import cv2
+    import numpy as np
+
+    path = str(tmp_path / 'receipt.png')
+    cv2.imwrite(path, np.full((400, 300), 255, dtype=np.uint8))
+    return path
+
+class FakeEngine:
+    """Stands in for tesseract: image_to_string answers per page segmentation mode"""
+
+    def __init__(self, texts=None):
+        self.texts = texts or {}
+        self.configs = []
+
+    def image_to_string(self, image, config=''):
+        self.configs.append(config)
+        psm = config.split('--psm ')[1].split()[0]
+        return self.texts[psm]
+
+def test_adaptive_ocr_keeps_confident_fast_pass(monkeypatch, receipt_photo):
+    """Test clean receipts are read once, without the full preprocessing pipeline"""
+    engine = FakeEngine()
+    ocr = OCRService(adaptive=True, engine=engine)
+    monkeypatch.setattr(ocr, 'read_words', lambda image: (CLEAN_RECEIPT, 91.0))
+
+    data = ocr.extract_receipt_data(receipt_photo)
+
+    assert data['ocr_pass'] == 'fast'
+    assert data['total_amount'] == 6.48
+    assert engine.configs == []
+
+@pytest.mark.parametrize('fast_text, word_confidence', [
+    (CLEAN_RECEIPT.replace('TOTAL $6.48', ''), 91.0),  # no total found
+    (CLEAN_RECEIPT, 40.0),  # tesseract unsure of the words
+])
+def test_adaptive_ocr_escalates_incomplete_fast_pass(monkeypatch, receipt_photo, fast_text, word_confidence):
+    """Test the full pipeline and fallback page segmentation modes run when the fast pass is weak"""
+    engine = FakeEngine({'6': 'CORNER MARKET', '4': CLEAN_RECEIPT, '11': CLEAN_RECEIPT})
+    ocr = OCRService(adaptive=True, fallback_psms=(4, 11), engine=engine)
+    monkeypatch.setattr(ocr, 'read_words', lambda image: (fast_text, word_confidence))
+
+    data = ocr.extract_receipt_data(receipt_photo)
+
+    assert data['ocr_pass'] == 'full'
+    assert data['total_amount'] == 6.48
+    assert [config.split()[3] for config in engine.configs] == ['6', '4']
+
+def test_ocr_engine_falls_back_to_pytesseract(monkeypatch):
+    """Test the auto engine uses pytesseract when libtesseract cannot be loaded"""
+    from app.services import ocr_engines
+
+    monkeypatch.delenv('TESSERACT_LIBRARY', raising=False)
+    monkeypatch.setattr(ocr_engines.ctypes.util, 'find_library', lambda name: None)
+
+    assert isinstance(ocr_engines.create_ocr_engine('auto'), ocr_engines.PytesseractEngine)
+
+def test_ocr_engine_defaults_to_pytesseract(monkeypatch):
+    """Test the C API engine is opt-in: without OCR_ENGINE pytesseract is used"""
+    from app.services import ocr_engines
+
+    def unexpected():
+        raise AssertionError('libtesseract engine built without OCR_ENGINE=auto')
+    monkeypatch.delenv('OCR_ENGINE', raising=False)
+    monkeypatch.setattr(ocr_engines, 'TessAPIEngine', unexpected)
+
+    assert isinstance(ocr_engines.create_ocr_engine(), ocr_engines.PytesseractEngine)
+
+def test_tesseract_config_and_tsv_parsing():
+    """Test CLI configs map onto C API settings and TSV maps onto image_to_data's dict"""
+    from app.services.ocr_engines import parse_tesseract_config, parse_tsv
+    from app.services.ocr_service import tesseract_config
+
+    oem, psm, variables = parse_tesseract_config(tesseract_config(11))
+    assert (oem, psm) == (3, 11)
+    assert variables['tessedit_char_whitelist'].startswith('0123456789ABC')
+
+    data = parse_tsv('1\t1\t0\t0\t0\t0\t0\t0\t300\t400\t-1\t\n'
+                     '5\t1\t1\t1\t1\t1\t10\t12\t80\t20\t91.5\tTOTAL\n')
+    assert data['text'] == ['', 'TOTAL']
+    assert data['conf'] == [-1.0, 91.5]
+    assert data['line_num'] == [0, 1]
+
+def write_text_pdf(path, pages):
+    """Minimal PDF with one Helvetica text page per entry in ``pages``"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for lines in pages:
+        stream = 'BT /F1 12 Tf 14 TL 72 720 Td ' + ' '.join(f'({line}) Tj T*' for line in lines) + ' ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+
+    body, offsets = b'%PDF-1.4\n', []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+    xref = len(body)
+    body += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    body += b''.join(f'{offset:010d} 00000 n \n'.encode('latin-1') for offset in offsets)
+    body += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    with open(path, 'wb') as handle:
+        handle.write(body)
+    return path
+
+def test_pdf_text_layer_skips_ocr(tmp_path):
+    """Test PDFs with embedded text are parsed page by page without tesseract"""
+    pytest.importorskip('pypdfium2')
+    path = write_text_pdf(str(tmp_path / 'receipt.pdf'), [
+        ['CORNER MARKET', '123 Main St', '03/14/2024', 'BREAD 3.49', 'MILK 2.99', 'TOTAL $6.48'],
+        ['Thank you for shopping with us today'],
+    ])
+    engine = FakeEngine()
+
+    data = OCRService(engine=engine).extract_receipt_data(path)
+
+    assert engine.configs == []
+    assert data['ocr_pass'] == 'text'
+    assert data['merchant_name'] == 'CORNER MARKET'
+    assert data['total_amount'] == 6.48
+    assert [page['page'] for page in data['pages']] == [1, 2]
+    assert 'Thank you' in data['raw_text']
+
+def test_pdf_image_pages_are_rasterized_within_bounds(monkeypatch, tmp_path):
+    """Test image-only PDF pages are rendered one at a time at a bounded size and OCRed"""
+    pytest.importorskip('pypdfium2')
+    from PIL import Image
+    import numpy as np
+
+    path = str(tmp_path / 'scan.pdf')
+    scans = [Image.fromarray(np.full((1100, 850), 255, dtype=np.uint8)) for _ in range(2)]
+    scans[0].save(path, save_all=True, append_images=scans[1:], resolution=100)
+
+    shapes = []
+    ocr = OCRService(target_short_side=600, engine=FakeEngine())
+    def read_words(image):
+        shapes.append(image.shape)
+        return CLEAN_RECEIPT, 90.0
+    monkeypatch.setattr(ocr, 'read_words', read_words)
+
+    data = ocr.extract_receipt_data(path)
+
+    assert [min(shape) for shape in shapes] == [600, 600]
+    assert data['ocr_pass'] == 'fast'
+    assert data['total_amount'] == 6.48
+    assert len(data['pages']) == 2
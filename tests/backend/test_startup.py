@@ -0,0 +1,54 @@
+"""
+Smart Expense Tracker - Startup Tests
+Checks that booting the app never touches the network
+"""
+
+import os
+import sys
+import json
+import subprocess
+from app.services.text_resources import TextResources, FALLBACK_STOPWORDS
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'backend')
+
+PROBE = r'''
+import json, socket, time
+
+attempts = []
+
+def refuse(*args, **kwargs):
+    attempts.append(repr(args[1:]))
+    raise OSError('network access blocked')
+
+socket.socket.connect = refuse
+socket.socket.connect_ex = refuse
+socket.create_connection = refuse
+
+started = time.perf_counter()
+from app import create_app
+app = create_app()
+with app.app_context():
+    from app.services.model_registry import get_ml_service
+    text = get_ml_service().preprocess_text('Dinner at the Airport Cafe')
+print(json.dumps({'seconds': time.perf_counter() - started, 'attempts': attempts, 'text': text}))
+'''
+
+def test_create_app_does_not_touch_network():
+    """Test a cold create_app() plus first categorization stays offline"""
+    env = dict(os.environ, DATABASE_URL='sqlite://')
+    result = subprocess.run([sys.executable, '-c', PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+    assert probe['attempts'] == []
+    assert 'dinner' in probe['text'] and 'the' not in probe['text'].split()
+
+def test_fallbacks_without_local_corpora(tmp_path):
+    """Test missing corpora resolve to the bundled pure-Python fallbacks"""
+    resources = TextResources(str(tmp_path))
+    resources._has_resource = lambda nltk, name: False
+
+    assert resources.stop_words is FALLBACK_STOPWORDS
+    assert resources.lemmatizer is None
+    assert resources.tokenize("uber ride to the airport's gate") == ['uber', 'ride', 'to', 'the', "airport's", 'gate']